@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Shared test helpers: a scratch home directory, and small PDFs written from page text"""
+
+import os
+import atexit
+import shutil
+import tempfile
+import zlib
+
+# The batch keeps its stats, templates and search index under the home
+# directory (pdf_batch_stats.STATS_DIR, read on import): point it at a
+# scratch directory before any test imports the modules
+_HOME = tempfile.mkdtemp(prefix="pdf_batch_tests_")
+os.environ['HOME'] = os.environ['USERPROFILE'] = _HOME
+atexit.register(shutil.rmtree, _HOME, ignore_errors=True)
+
+HEBREW_LETTERS = [chr(c) for c in range(0x05D0, 0x05EB)]
+
+
+def _encode(line):
+    """A line in the test font's encoding: Hebrew letters from 128 up (see write_pdf)"""
+    out = bytearray()
+    for ch in line:
+        if ch in HEBREW_LETTERS:
+            out.append(128 + HEBREW_LETTERS.index(ch))
+        else:
+            data = ch.encode('latin-1')
+            if data in (b'(', b')', b'\\'):
+                out += b'\\'
+            out += data
+    return bytes(out)
+
+
+def write_pdf(path, pages):
+    """
+    Write a PDF with one page per entry of pages: a list of text lines, or
+    None for a scanned page (one full-page image and no text layer)
+    """
+    objects = []
+
+    def add(data):
+        objects.append(data)
+        return len(objects)
+
+    differences = b"[128 " + b" ".join(b"/afii%d" % (57664 + i) for i in range(len(HEBREW_LETTERS))) + b"]"
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding << /Type /Encoding "
+               b"/BaseEncoding /WinAnsiEncoding /Differences " + differences + b" >> >>")
+    pixels = zlib.compress(bytes(range(256)) * 64)
+    image = add(b"<< /Type /XObject /Subtype /Image /Width 128 /Height 128 /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % len(pixels)
+                + pixels + b"\nendstream")
+    pages_id = add(b"")
+    kids = []
+    for lines in pages:
+        if lines is None:
+            ops = [b"q 600 0 0 780 6 6 cm /Im1 Do Q"]
+        else:
+            ops = [b"BT /F1 10 Tf"]
+            ops += [b"1 0 0 1 40 %d Tm (" % (770 - i * 14) + _encode(line) + b") Tj" for i, line in enumerate(lines)]
+            ops.append(b"ET")
+        content = zlib.compress(b"\n".join(ops))
+        contents = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Resources "
+                        b"<< /Font << /F1 %d 0 R >> /XObject << /Im1 %d 0 R >> >> /Contents %d 0 R >>"
+                        % (pages_id, font, image, contents)))
+    objects[pages_id - 1] = (b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids)
+                             + b"] /Count %d >>" % len(kids))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, data in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + data + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+    return str(path)
+
+
+def encounter_page(number, date, diagnosis):
+    """Text lines of a page holding one encounter"""
+    return [f"{number} מפגש", date, f"אבחנות: {diagnosis}"]
+
@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asyncio orchestrator for the PDF Batch Processor
+
+Drives a whole batch for both the CLI (batch_process) and the GUI:
+- directory listing, stat checks and file reads/writes run concurrently in
+  threads, bounded by a semaphore, so slow network-share calls overlap
+  instead of queueing up in front of the parsing
+- PDF extraction (the CPU-heavy part) is dispatched to the isolated worker
+  pool
+- groups run concurrently (up to the number of workers), started in
+  schedule order; the parts of a split group are extracted concurrently too
+  and reassembled in suffix order. One batch-wide semaphore keeps the
+  extractions in flight to the number of workers
+- image-only PDFs (see PageTriage) are either listed as needing OCR or, with
+  OCR enabled, OCR'd in a separate, smaller pool (pdf_batch_ocr)
+- split groups are merged in suffix order (streamed out as each part
+  finishes) or chronologically by encounter date (streamed from the parts'
+  cleaned files); see pdf_batch_merge
+- outputs are written atomically, and outputs whose content did not change
+  are left untouched (see pdf_batch_outputs)
+- a batch manifest of every input and output, with hashes and timings, is
+  written into the mother folder at the end (see pdf_batch_manifest)
+
+Progress is reported through an on_event(event, data) callback:
+    'groups'        { groups }
+    'prescan'       { pages, total, workers, eta }
+    'group_start'   { index, total, job, eta }
+    'file_start'    { job, file }
+    'file_done'     { job, file, chars }
+    'file_failed'   { job, file, reason }
+    'needs_ocr'     { job, file, triage }
+    'ocr_start'     { job, file, triage }
+    'ocr_done'      { job, file, ocr_pages, cached_pages }
+    'merged'        { job, path }
+    'merge_skipped' { job }
+    'group_done'    { index, total, job, ok, eta }
+    'warning'       { message }
+"""
+
+import os
+import time
+import sqlite3
+import asyncio
+
+from pdf_batch_processor import (
+    parse_folder_name,
+    build_job,
+    schedule_jobs,
+    extract_pdf_job,
+    finish_pages,
+    NeedsOCR,
+    DEFAULT_BACKEND,
+)
+from pdf_batch_stats import CostModel, EtaTracker, machine_key
+from pdf_batch_workers import IsolatedProcessPool
+from pdf_batch_pipeline import Prefetcher, DEFAULT_PREFETCH_MB
+from pdf_batch_templates import TemplateCache
+from pdf_batch_records import records_path, records_jsonl, output_name
+from pdf_batch_index import index_text, index_file, index_path
+from pdf_batch_codec import codec_path, check_codec, DEFAULT_CODEC
+from pdf_batch_outputs import OutputManifest, write_output
+from pdf_batch_timing import StageTimings
+from pdf_batch_profile import profiled_job, selected, write_profile, hot_functions, BATCH_PROFILE_NAME
+from pdf_batch_manifest import BatchManifest, output_entry, bytes_hash, BATCH_MANIFEST_NAME
+from pdf_batch_search import SearchIndex, SearchUnavailable
+from pdf_batch_merge import EncounterDeduplicator, MergeWriter, merge_chronological, DEFAULT_MERGE_ORDER
+from pdf_batch_ocr import ocr_available, ocr_pdf_job, DEFAULT_OCR_LANG, DEFAULT_OCR_WORKERS, DEFAULT_OCR_TIMEOUT
+
+DEFAULT_IO_CONCURRENCY = 16
+
+
+def pages_text(page_texts):
+    """Final text of page texts (see finish_pages), '' if none of them has any text"""
+    if not any(text and text.strip() for text in page_texts):
+        return ""
+    return finish_pages(page_texts)['text']
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class BatchOrchestrator:
+    """
+    One batch run over a mother folder.
+    - workers:        parallel groups / worker processes
+    - pool_options:   passed to IsolatedProcessPool (timeout, max_rss_mb, recycling)
+    - prefetch_mb:    memory budget for reading PDFs ahead (0 = off)
+    - io_concurrency: maximum concurrent filesystem calls
+    - backend:        text extraction backend (see EXTRACTION_BACKENDS)
+    - text_only:      skip paths and images while parsing
+    - triage:         classify the leading pages; image-only scans go to the needs-OCR list
+    - strip_headers:  remove repeated header/footer lines (templates cached per source)
+    - dedupe:         drop pages (suffix-order merges) and encounters first seen in another
+                      part of a merged split group; a part's own repeats are kept
+    - dedupe_within:  also drop repeated pages and encounters within each PDF
+    - ocr:            OCR image-only scans instead (requires Tesseract, see pdf_batch_ocr)
+    - ocr_options:    'lang', 'dpi', 'cache_dir' for ocr_pdf_job, plus 'workers' and 'timeout'
+                      (seconds per file, None = unlimited) for the OCR pool; OCR'd text is
+                      post-processed like extracted text (header stripping, dedupe, records)
+    - merge_order:    'suffix' or 'chronological' (see MERGE_ORDERS)
+    - records:        also write <name>_ENCOUNTERS.jsonl per output (see pdf_batch_records)
+    - index:          write a <file>.idx offset index next to each text output (see pdf_batch_index)
+    - codec:          compression of the text outputs: 'none', 'gzip' or 'zstd' (see pdf_batch_codec);
+                      compressed outputs get no offset index
+    - search_index:   keep the full-text search index up to date (see pdf_batch_search)
+    - manifest:       write a batch manifest at the end (see pdf_batch_manifest)
+    - manifest_path:  where to (default: batch_manifest.json in the mother folder)
+    - timings:        time each extraction stage, per page too (see pdf_batch_timing)
+    - profile:        extract under cProfile / tracemalloc and write the profiles next to the
+                      outputs (see pdf_batch_profile)
+    - profile_only:   fnmatch patterns of the file labels to profile (None = every file)
+    - on_event:       progress callback, called on the event loop thread
+    """
+
+    def __init__(self, mother_folder, workers=1, pool_options=None, prefetch_mb=DEFAULT_PREFETCH_MB,
+                 io_concurrency=DEFAULT_IO_CONCURRENCY, backend=DEFAULT_BACKEND, text_only=True,
+                 triage=True, strip_headers=False, dedupe=True, dedupe_within=False, ocr=False,
+                 ocr_options=None, merge_order=DEFAULT_MERGE_ORDER, records=False, index=True, search_index=True,
+                 codec=DEFAULT_CODEC, manifest=True, manifest_path=None, timings=False, profile=False,
+                 profile_only=None, on_event=None):
+        self.mother_folder = mother_folder
+        self.workers = max(1, workers)
+        self.pool_options = pool_options or {}
+        self.prefetch_mb = prefetch_mb
+        self.io_concurrency = io_concurrency
+        self.extract_options = {'backend': backend, 'text_only': text_only, 'triage': triage,
+                                'strip_headers': strip_headers, 'dedupe': dedupe_within, 'records': records,
+                                'timings': timings}
+        self.dedupe = dedupe
+        self.templates = TemplateCache() if strip_headers else None
+        self.ocr = ocr
+        self.ocr_options = dict(ocr_options or {})
+        self.ocr_workers = max(1, self.ocr_options.pop('workers', DEFAULT_OCR_WORKERS))
+        self.ocr_timeout = self.ocr_options.pop('timeout', DEFAULT_OCR_TIMEOUT)
+        self.ocr_options.update(strip_headers=strip_headers, dedupe=dedupe_within, records=records)
+        self.merge_order = merge_order
+        check_codec(codec)
+        self.codec = codec
+        # Byte offsets into a compressed file cannot be used for random access
+        self.index = index and codec == 'none'
+        self.search_index = search_index
+        self.manifest_path = None
+        if manifest:
+            self.manifest_path = manifest_path or os.path.join(mother_folder, BATCH_MANIFEST_NAME)
+        self.timings = StageTimings() if timings else None
+        self.profile = profile
+        self.profile_only = profile_only
+        self.on_event = on_event
+        # Backends differ in speed, so each one keeps its own timing history
+        machine = machine_key() if backend == DEFAULT_BACKEND else f"{machine_key()}/{backend}"
+        self.cost_model = CostModel(machine=machine)
+
+    def emit(self, event, **data):
+        if self.on_event:
+            self.on_event(event, data)
+
+    async def io(self, fn, *args):
+        """Run a blocking filesystem call in a thread, bounded by the I/O semaphore"""
+        async with self._io_sem:
+            return await asyncio.to_thread(fn, *args)
+
+    async def scan(self, names=None, pdf_names=None):
+        """
+        Discover folders and group them by base name.
+        names: folder names to consider (default: everything in the mother folder)
+        pdf_names: folder name -> PDF file name, for folders whose PDF is not
+                   named after the folder (see folder_pdf)
+        Returns dict: base -> list of { 'path', 'name', 'suffix' [, 'pdf_name'] }
+        """
+        if names is None:
+            names = await self.io(os.listdir, self.mother_folder)
+        candidates = []
+        for item in names:
+            base, suffix = parse_folder_name(item)
+            if base and suffix != 'מ':  # exclude special mem-suffix folders
+                candidates.append((item, base, suffix))
+        is_dirs = await asyncio.gather(*(
+            self.io(os.path.isdir, os.path.join(self.mother_folder, item)) for item, _, _ in candidates
+        ))
+        groups = {}
+        for (item, base, suffix), is_dir in zip(candidates, is_dirs):
+            if is_dir:
+                item_path = os.path.join(self.mother_folder, item)
+                part = {'path': item_path, 'name': item, 'suffix': suffix}
+                if pdf_names and pdf_names.get(item):
+                    part['pdf_name'] = pdf_names[item]
+                groups.setdefault(base, []).append(part)
+        return groups
+
+    async def plan(self, groups):
+        """Find every group's PDFs and prescan them concurrently; returns jobs in dispatch order"""
+        jobs = await asyncio.gather(*(
+            self.io(build_job, base, parts, self.cost_model) for base, parts in groups.items()
+        ))
+        if self.workers > 1:
+            return schedule_jobs(jobs)
+        return sorted(jobs, key=lambda j: j['base'])
+
+    async def prescan(self, names=None):
+        """Scan and prescan the batch without processing anything; returns its jobs in dispatch order"""
+        self._io_sem = asyncio.Semaphore(self.io_concurrency)
+        groups = await self.scan(names)
+        if not groups:
+            return []
+        return await self.plan(groups)
+
+    async def run(self, names=None, pdf_names=None):
+        """
+        Run the batch (names, pdf_names: see scan). Returns a summary dict:
+        { 'total', 'success', 'failed', 'failed_files', 'needs_ocr', 'ocr_files', 'ocr_pages',
+          'ocr_cached_pages', 'stripped_lines', 'duplicate_pages', 'duplicate_encounters',
+          'search_indexed', 'unchanged_outputs', 'recycled', 'elapsed', 'manifest', 'timings',
+          'profiled', 'hot_functions', 'profile' }
+        needs_ocr lists image-only PDFs that were not OCR'd: [{ 'path', 'pages' }]
+        manifest is the batch manifest's path (None if it was not written)
+        timings are the per-stage statistics (StageTimings.to_dict), or None when disabled
+        profiled counts the files profiled; hot_functions are the batch's top functions
+        (see hot_functions) and profile the combined .pstats file's path, or None
+        """
+        start = time.perf_counter()
+        self._io_sem = asyncio.Semaphore(self.io_concurrency)
+        self._group_sem = asyncio.Semaphore(self.workers)
+        # Extractions in flight across the whole batch (one per worker), so
+        # split parts cannot overrun the pool, the prefetch budget or the
+        # largest-first order
+        self._extract_sem = asyncio.Semaphore(self.workers)
+        summary = {'total': 0, 'success': 0, 'failed': 0, 'failed_files': [], 'needs_ocr': [],
+                   'ocr_files': 0, 'ocr_pages': 0, 'ocr_cached_pages': 0, 'stripped_lines': 0,
+                   'duplicate_pages': 0, 'duplicate_encounters': 0, 'search_indexed': 0,
+                   'unchanged_outputs': 0, 'recycled': 0, 'elapsed': 0.0, 'manifest': None,
+                   'timings': None, 'profiled': 0, 'hot_functions': [], 'profile': None}
+        self.manifest = BatchManifest(self.mother_folder, dict(
+            self.extract_options, workers=self.workers, ocr=self.ocr, merge_order=self.merge_order,
+            merge_dedupe=self.dedupe, codec=self.codec))
+
+        groups = await self.scan(names, pdf_names)
+        if not groups:
+            return summary
+        self.emit('groups', groups=groups)
+
+        jobs = await self.plan(groups)
+        summary['total'] = len(jobs)
+        self.eta = EtaTracker({j['base']: j['predicted'] for j in jobs}, self.workers)
+        self.emit('prescan', pages=sum(j['pages'] for j in jobs), total=len(jobs),
+                  workers=self.workers, eta=self.eta.remaining_seconds())
+
+        self.pool = IsolatedProcessPool(self.workers, **self.pool_options)
+        self.ocr_pool = None
+        if self.ocr:
+            lang = self.ocr_options.get('lang', DEFAULT_OCR_LANG)
+            available, reason = await asyncio.to_thread(ocr_available, lang)
+            if available:
+                # Separate from the extraction pool, so OCR can only ever occupy ocr_workers cores
+                ocr_pool_options = dict(self.pool_options, timeout=self.ocr_timeout)
+                self.ocr_pool = IsolatedProcessPool(self.ocr_workers, **ocr_pool_options)
+            else:
+                self.emit('warning', message=f"OCR disabled: {reason}")
+        self.outputs = await self.io(OutputManifest)
+        self.search = None
+        if self.search_index:
+            try:
+                self.search = await self.io(SearchIndex)
+            except (SearchUnavailable, sqlite3.Error, OSError) as e:
+                self.emit('warning', message=f"Search index disabled: {str(e)}")
+        self.prefetcher = None
+        if self.prefetch_mb:
+            # Read PDFs in the order the jobs will ask for them
+            self.prefetcher = Prefetcher([f['pdf'] for job in jobs for f in job['files']],
+                                         budget_bytes=self.prefetch_mb * 1024 * 1024,
+                                         sizes={p['path']: p['bytes'] for job in jobs for p in job['pdfs']})
+        self._writes = []
+        self._profiles = []  # .pstats files written
+        self._started = 0
+        self._finished = 0
+        # On Ctrl+C (the task is cancelled) or an error, extractions in flight
+        # are killed instead of waited for
+        abandoned = True
+        try:
+            results = await asyncio.gather(*(self.run_job(job, summary) for job in jobs))
+            await asyncio.gather(*self._writes)
+            abandoned = False
+        finally:
+            if self.prefetcher:
+                self.prefetcher.close()
+            await asyncio.to_thread(self.pool.shutdown, cancel_futures=True, kill=abandoned)
+            if self.ocr_pool:
+                await asyncio.to_thread(self.ocr_pool.shutdown, cancel_futures=True, kill=abandoned)
+
+        summary['success'] = sum(1 for ok in results if ok)
+        summary['failed'] = len(results) - summary['success']
+        summary['recycled'] = self.pool.recycled + (self.ocr_pool.recycled if self.ocr_pool else 0)
+        try:
+            await self.io(self.cost_model.save)
+        except OSError as e:
+            self.emit('warning', message=f"Could not save timing stats: {str(e)}")
+        if self.search:
+            try:
+                await self.io(self.search.close)
+                summary['search_indexed'] = self.search.indexed
+            except (sqlite3.Error, OSError) as e:
+                self.emit('warning', message=f"Could not update the search index: {str(e)}")
+        try:
+            await self.io(self.outputs.save)
+        except OSError as e:
+            self.emit('warning', message=f"Could not save the output manifest: {str(e)}")
+        if self.templates:
+            try:
+                await self.io(self.templates.save)
+            except OSError as e:
+                self.emit('warning', message=f"Could not save header/footer templates: {str(e)}")
+        if self._profiles:
+            batch_profile = os.path.join(self.mother_folder, BATCH_PROFILE_NAME)
+            try:
+                summary['hot_functions'] = await self.io(hot_functions, self._profiles, batch_profile)
+                summary['profile'] = batch_profile
+            except (OSError, ValueError, TypeError) as e:
+                self.emit('warning', message=f"Could not combine the profiles: {str(e)}")
+            summary['profiled'] = len(self._profiles)
+        summary['elapsed'] = time.perf_counter() - start
+        if self.timings:
+            summary['timings'] = self.timings.to_dict()
+        if self.manifest_path:
+            try:
+                await self.io(self.manifest.save, self.manifest_path, summary)
+                summary['manifest'] = self.manifest_path
+            except OSError as e:
+                self.emit('warning', message=f"Could not write the batch manifest: {str(e)}")
+        return summary
+
+    async def run_job(self, job, summary):
+        """Process one group; returns True if the output of at least one of its PDFs was written"""
+        async with self._group_sem:
+            self._started += 1
+            self.emit('group_start', index=self._started, total=summary['total'], job=job,
+                      eta=self.eta.remaining_seconds())
+            group_start = time.perf_counter()
+            group = self.manifest.group(job)
+            writes = []  # (output path, write task) of each part
+            seconds = 0.0
+            # Parts often overlap at their boundary
+            deduplicator = EncounterDeduplicator() if job['merged'] and self.dedupe else None
+            # In suffix order the merged file is streamed out part by part
+            merger = (MergeWriter(job['merged'], self.codec)
+                      if job['merged'] and self.merge_order != 'chronological' else None)
+            # Parts are independent files: they are extracted concurrently (each
+            # writes its own output as soon as it is done) and taken back in suffix order
+            tasks = [asyncio.create_task(self.run_part(job, file, self.manifest.file(job, file, probe), summary))
+                     for file, probe in zip(job['files'], job['pdfs'])]
+            try:
+                for part, (file, task) in enumerate(zip(job['files'], tasks)):
+                    done = await task
+                    if done is None:
+                        continue
+                    result, write = done
+                    seconds += result['seconds']
+                    writes.append((file['output'], write))
+                    if merger:
+                        text = result['text']
+                        if deduplicator:
+                            text = await self.dedupe_part(deduplicator, result, part)
+                        if text:
+                            merger = await self.merge_part(job, merger, text, summary)
+
+                if job['merged'] and len(writes) >= 2:
+                    if self.merge_order == 'chronological':
+                        await self.merge_by_date(job, writes, deduplicator, summary)
+                    elif merger:
+                        try:
+                            replaced = await self.io(merger.commit, self.outputs)
+                        except OSError as e:
+                            self.merge_failed(job, e, summary)
+                        else:
+                            await self.merged(job, replaced, summary)
+                    if deduplicator:
+                        summary['duplicate_pages'] += deduplicator.removed_pages
+                        summary['duplicate_encounters'] += deduplicator.removed
+                elif job['merged'] and writes:
+                    self.emit('merge_skipped', job=job)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                if merger:
+                    await self.io(merger.discard)
+
+            # A group succeeded if at least one of its outputs is in place
+            written = await asyncio.gather(*(task for _, task in writes))
+            ok = any(written)
+            group['seconds'] = round(time.perf_counter() - group_start, 3)
+            self._finished += 1
+            self.eta.done(job['base'], seconds)
+            self.emit('group_done', index=self._finished, total=summary['total'], job=job, ok=ok,
+                      eta=self.eta.remaining_seconds())
+            return ok
+
+    async def run_part(self, job, file, entry, summary):
+        """
+        Extract one PDF of a group and start writing its output.
+        entry: the file's batch manifest entry, filled in as it goes
+        Returns (result, write task), or None if it failed or awaits OCR
+        """
+        triage = None
+        async with self._extract_sem:
+            self.emit('file_start', job=job, file=file)
+            try:
+                result = await self.extract(file['pdf'], entry,
+                                            profile=self.profile and selected(file['label'], self.profile_only),
+                                            keep_pages=self.merge_pages(job))
+            except NeedsOCR as e:
+                triage = e.triage
+            except Exception as e:
+                summary['failed_files'].append({'path': file['pdf'], 'reason': str(e)})
+                entry.update(status='failed', reason=str(e))
+                self.emit('file_failed', job=job, file=file, reason=str(e))
+                return None
+        if triage:
+            # OCR has its own pool; it does not hold up the group's other parts
+            result = await self.ocr_fallback(job, file, triage, summary, entry, keep_pages=self.merge_pages(job))
+            if result is None:
+                return None
+            entry['timings']['ocr'] = round(result['seconds'], 3)
+        else:
+            entry['timings']['extract'] = round(result['seconds'], 3)
+        entry.update(status='ocr' if triage else 'ok', pages=result['pages'], chars=len(result['text']))
+        if result.get('profile'):
+            self._writes.append(asyncio.create_task(self.save_profile(file, result.pop('profile'))))
+        summary['stripped_lines'] += result.get('stripped_lines', 0)
+        summary['duplicate_pages'] += result.get('duplicate_pages', 0)
+        summary['duplicate_encounters'] += result.get('duplicate_encounters', 0)
+        write = self.write(file['output'], result['text'], summary, index=self.index, codec=self.codec,
+                           entry=entry)
+        # Indexed under the output's folder: for split PDFs inside one folder the
+        # label is a file name (ננ449א.pdf), which --folder would never match
+        folder = os.path.basename(os.path.dirname(file['output']))
+        if self.search and self.search.add(file['output'], folder, result['text']):
+            self._writes.append(asyncio.create_task(self.flush_search()))
+        if result.get('records') is not None:
+            # Tagged like the output, not the label, for the same reason
+            self.write(records_path(file['output']), records_jsonl(result['records'], output_name(file['output'])),
+                       summary, entry=entry)
+        self.emit('file_done', job=job, file=file, chars=len(result['text']))
+        return result, write
+
+    def merge_pages(self, job):
+        """Whether a group's parts return their page texts, for page dedupe in the suffix-order merge"""
+        return bool(job['merged']) and self.dedupe and self.merge_order != 'chronological'
+
+    async def extract(self, pdf_path, entry, profile=False, keep_pages=False):
+        """
+        Read a PDF (through the prefetcher) and extract it in the worker pool
+        (under cProfile / tracemalloc with profile, see pdf_batch_profile)
+        keep_pages: also return its page texts (see merge_pages)
+        """
+        read_start = time.perf_counter()
+        if self.prefetcher:
+            source = await asyncio.to_thread(self.prefetcher.get, pdf_path)
+        else:
+            source = await self.io(_read_bytes, pdf_path)
+        entry['timings']['read'] = round(time.perf_counter() - read_start, 3)
+        if self.timings:
+            self.timings.add('read', time.perf_counter() - read_start)
+        entry['input']['size'] = len(source)
+        if self.manifest_path:
+            entry['input']['hash'] = await asyncio.to_thread(bytes_hash, source)
+        # Equivalent to loop.run_in_executor(self.pool, ...), but tells the
+        # pool the input size so it can recycle workers by MB processed
+        options = dict(self.extract_options, keep_pages=keep_pages)
+        if self.templates:
+            # A snapshot: the dict is pickled on the pool's manager thread
+            options['templates'] = dict(self.templates.entries)
+        if profile:
+            future = self.pool.submit_sized(len(source), profiled_job, extract_pdf_job, source, **options)
+        else:
+            future = self.pool.submit_sized(len(source), extract_pdf_job, source, **options)
+        result = await asyncio.wrap_future(future)
+        if not profile:  # profiled runs are slower than usual
+            self.cost_model.record(result['pages'], len(source), result['seconds'])
+        if self.timings and result['timings']:
+            self.timings.merge(result['timings'])
+        if self.templates and result['template']:
+            self.templates.update(result['source'], result['template'])
+        return result
+
+    async def ocr_fallback(self, job, file, triage, summary, entry, keep_pages=False):
+        """OCR an image-only PDF in the OCR pool; returns its result, or None if it was not OCR'd"""
+        if not self.ocr_pool:
+            summary['needs_ocr'].append({'path': file['pdf'], 'pages': triage['pages']})
+            entry.update(status='needs_ocr', pages=triage['pages'])
+            self.emit('needs_ocr', job=job, file=file, triage=triage)
+            return None
+        self.emit('ocr_start', job=job, file=file, triage=triage)
+        try:
+            source = await self.io(_read_bytes, file['pdf'])
+            options = dict(self.ocr_options, keep_pages=keep_pages)
+            if self.templates:
+                options['templates'] = dict(self.templates.entries)
+            result = await asyncio.wrap_future(self.ocr_pool.submit_sized(
+                len(source), ocr_pdf_job, source, **options))
+        except Exception as e:
+            summary['failed_files'].append({'path': file['pdf'], 'reason': f"OCR failed: {str(e)}"})
+            entry.update(status='failed', reason=f"OCR failed: {str(e)}")
+            self.emit('file_failed', job=job, file=file, reason=f"OCR failed: {str(e)}")
+            return None
+        if self.templates and result['template']:
+            self.templates.update(result['source'], result['template'])
+        summary['ocr_files'] += 1
+        summary['ocr_pages'] += result['ocr_pages']
+        summary['ocr_cached_pages'] += result['cached_pages']
+        self.emit('ocr_done', job=job, file=file, ocr_pages=result['ocr_pages'],
+                  cached_pages=result['cached_pages'])
+        return result
+
+    async def dedupe_part(self, deduplicator, result, part):
+        """
+        A part's text for the merge, without the pages and encounter blocks
+        first seen in an earlier part ('' if nothing is left)
+        """
+        page_texts = result.pop('page_texts', None)
+        if page_texts is not None:
+            kept = deduplicator.unique_pages(page_texts, part)
+            if len(kept) < len(page_texts):
+                # Rebuilt from the remaining pages (the part's own output keeps them all)
+                return deduplicator.filter(await asyncio.to_thread(pages_text, [page_texts[i] for i in kept]),
+                                           part)
+        return deduplicator.filter(result['text'], part)
+
+    async def merge_part(self, job, merger, text, summary):
+        """Append a part to the streamed merge; returns the merger, or None once writing it failed"""
+        try:
+            await self.io(merger.add, text)
+            return merger
+        except OSError as e:
+            self.merge_failed(job, e, summary)
+            await self.io(merger.discard)
+            return None
+
+    async def merge_by_date(self, job, writes, deduplicator, summary):
+        """Merge a group's part files by encounter date, once they are written"""
+        written = await asyncio.gather(*(task for _, task in writes))
+        paths = [codec_path(path, self.codec) for (path, _), ok in zip(writes, written) if ok]
+        try:
+            _, replaced = await self.io(merge_chronological, paths, job['merged'], deduplicator,
+                                        self.codec, self.outputs)
+        except OSError as e:
+            self.merge_failed(job, e, summary)
+            return
+        await self.merged(job, replaced, summary)
+
+    async def merged(self, job, replaced, summary):
+        """
+        A group's merged file is in place: index it (streamed from disk) and report it.
+        replaced: False if the file was unchanged and left as it was
+        """
+        if not replaced:
+            summary['unchanged_outputs'] += 1
+        self.manifest.group(job)['outputs'].append(
+            output_entry(codec_path(job['merged'], self.codec), self.outputs, replaced))
+        if self.index and (replaced or not os.path.exists(index_path(job['merged']))):
+            try:
+                await self.io(index_file, job['merged'])
+            except OSError as e:
+                self.emit('warning', message=f"Could not index {job['merged']}: {str(e)}")
+        self.emit('merged', job=job, path=job['merged'])
+
+    async def save_profile(self, file, profile):
+        """Write a profiled file's .pstats and allocation report next to its output"""
+        try:
+            self._profiles.append(await self.io(write_profile, file['output'], file['label'], profile))
+        except OSError as e:
+            self.emit('warning', message=f"Could not write the profile of {file['label']}: {str(e)}")
+
+    def merge_failed(self, job, error, summary):
+        summary['failed_files'].append({'path': job['merged'], 'reason': f"merge failed: {str(error)}"})
+        self.manifest.group(job)['errors'].append(f"merge failed: {str(error)}")
+        self.emit('warning', message=f"Could not write {job['merged']}: {str(error)}")
+
+    async def flush_search(self):
+        """Write a batch of queued outputs to the search index"""
+        try:
+            await self.io(self.search.flush)
+        except (sqlite3.Error, OSError) as e:
+            self.emit('warning', message=f"Could not update the search index: {str(e)}")
+
+    def write(self, path, text, summary, index=False, codec=None, entry=None):
+        """
+        Write an output file in the background (awaited before the run ends),
+        with its offset index sidecar if index is set. With a codec, path is
+        a text output named without the codec suffix (see pdf_batch_codec).
+        entry: batch manifest entry of the file the output belongs to
+        Outputs whose content is unchanged are not rewritten (see pdf_batch_outputs).
+        Returns the task; it results in True if the file is in place.
+        """
+        async def write_task():
+            write_start = time.perf_counter()
+            try:
+                replaced = await self.io(write_output, path, text, codec or DEFAULT_CODEC, self.outputs)
+            except OSError as e:
+                summary['failed_files'].append({'path': path, 'reason': f"write failed: {str(e)}"})
+                if entry:
+                    entry.update(status='failed', reason=f"write failed: {str(e)}")
+                self.emit('warning', message=f"Could not write {path}: {str(e)}")
+                return False
+            if not replaced:
+                summary['unchanged_outputs'] += 1
+            if self.timings:
+                self.timings.add('write', time.perf_counter() - write_start)
+            if entry:
+                entry['timings']['write'] = round(entry['timings']['write'] + time.perf_counter() - write_start, 3)
+                entry['outputs'].append(output_entry(codec_path(path, codec or DEFAULT_CODEC), self.outputs,
+                                                     replaced))
+            if index and (replaced or not os.path.exists(index_path(path))):
+                try:
+                    await self.io(index_text, path, text)
+                except OSError as e:
+                    self.emit('warning', message=f"Could not index {path}: {str(e)}")
+            return True
+        task = asyncio.create_task(write_task())
+        self._writes.append(task)
+        return task
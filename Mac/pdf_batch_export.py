@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk export of a processed batch into one SQLite database
+
+    python pdf_batch_processor.py export MOTHER_FOLDER [-o batch.sqlite]
+
+Walks the batch's outputs the way the batch run lays them out (group_files)
+and loads every patient (group), split part, encounter and section into a
+single SQLite file, so analytics can query one database instead of reading
+thousands of text files. Page spans are taken from <name>_ENCOUNTERS.jsonl
+when it was written (--jsonl) and lists the same encounters as the text.
+
+- rows are inserted with executemany, in one transaction per EXPORT_BATCH parts
+- WAL journal, synchronous=NORMAL; indexes are created after the first bulk load
+- the schema version is stored in PRAGMA user_version
+- re-runnable: parts whose output size and mtime are unchanged are skipped,
+  changed parts are replaced, and parts whose output is gone are removed
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+
+from pdf_batch_processor import discover_groups, group_files
+from pdf_batch_records import encounter_records, records_path
+from pdf_batch_codec import find_output, read_text
+
+SCHEMA_VERSION = 1
+EXPORT_BATCH = 500  # parts per transaction
+DEFAULT_EXPORT_NAME = "batch_export.sqlite"
+
+SCHEMA = """
+CREATE TABLE patients (
+    id INTEGER PRIMARY KEY,
+    base TEXT UNIQUE NOT NULL,
+    merged_path TEXT
+);
+CREATE TABLE parts (
+    id INTEGER PRIMARY KEY,
+    patient_id INTEGER NOT NULL REFERENCES patients(id),
+    label TEXT NOT NULL,
+    part_order INTEGER NOT NULL,
+    pdf_path TEXT NOT NULL,
+    output_path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE encounters (
+    id INTEGER PRIMARY KEY,
+    part_id INTEGER NOT NULL REFERENCES parts(id),
+    position INTEGER NOT NULL,
+    encounter TEXT NOT NULL,
+    date TEXT,
+    first_page INTEGER,
+    last_page INTEGER,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE sections (
+    id INTEGER PRIMARY KEY,
+    encounter_id INTEGER NOT NULL REFERENCES encounters(id),
+    name TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+"""
+
+# Created after the first bulk load (inserting into indexed tables is slower)
+INDEXES = """
+CREATE INDEX IF NOT EXISTS parts_patient ON parts(patient_id);
+CREATE INDEX IF NOT EXISTS encounters_part ON encounters(part_id);
+CREATE INDEX IF NOT EXISTS encounters_encounter ON encounters(encounter);
+CREATE INDEX IF NOT EXISTS encounters_date ON encounters(date);
+CREATE INDEX IF NOT EXISTS sections_encounter ON sections(encounter_id);
+CREATE INDEX IF NOT EXISTS sections_name ON sections(name);
+"""
+
+
+class ExportSchemaError(Exception):
+    """The database was written by a different export schema version"""
+
+
+def open_export(path):
+    """Open (creating if needed) an export database; checks the schema version"""
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    if version == 0:
+        with db:
+            db.executescript(SCHEMA)
+            db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    elif version != SCHEMA_VERSION:
+        db.close()
+        raise ExportSchemaError(f"{path} has export schema version {version}, expected {SCHEMA_VERSION}; "
+                                f"export to a new file")
+    return db
+
+
+def read_page_spans(output_path):
+    """(encounter id, [first, last] page) of each record in _ENCOUNTERS.jsonl, or None"""
+    try:
+        with open(records_path(output_path), 'r', encoding='utf-8') as f:
+            return [(record['encounter'], record.get('pages')) for record in map(json.loads, f)]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def part_rows(text, spans, part_id, first_encounter_id, first_section_id):
+    """Encounter and section rows of one part's cleaned text"""
+    encounters = []
+    sections = []
+    records = encounter_records(text, [], [])
+    if spans is not None and [encounter for encounter, _ in spans] != [r['encounter'] for r in records]:
+        spans = None  # the JSONL does not describe this text
+    for position, record in enumerate(records):
+        encounter_id = first_encounter_id + position
+        pages = spans[position][1] if spans else None
+        encounters.append((encounter_id, part_id, position, record['encounter'], record['date'],
+                           pages[0] if pages else None, pages[1] if pages else None,
+                           record['start'], record['end'], text[record['start']:record['end']]))
+        for section in record['sections']:
+            sections.append((first_section_id + len(sections), encounter_id, section['name'],
+                             section['start'], section['end'], section['text']))
+    return encounters, sections
+
+
+def delete_part(db, part_id):
+    db.execute("DELETE FROM sections WHERE encounter_id IN (SELECT id FROM encounters WHERE part_id = ?)",
+               (part_id,))
+    db.execute("DELETE FROM encounters WHERE part_id = ?", (part_id,))
+
+
+def next_id(db, table):
+    return db.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+
+def export_batch(mother_folder, path, on_progress=None):
+    """
+    Export (or incrementally update) the outputs of a batch into path.
+    Returns dict: { 'patients', 'parts', 'exported', 'unchanged', 'removed',
+                    'encounters', 'sections', 'seconds' }
+    """
+    start = time.perf_counter()
+    stats = {'patients': 0, 'parts': 0, 'exported': 0, 'unchanged': 0, 'removed': 0,
+             'encounters': 0, 'sections': 0, 'seconds': 0.0}
+    db = open_export(path)
+    try:
+        known = {row[0]: row[1:] for row in db.execute("SELECT output_path, id, size, mtime_ns, hash FROM parts")}
+        patient_ids = dict(db.execute("SELECT base, id FROM patients"))
+        ids = {table: next_id(db, table) for table in ('patients', 'parts', 'encounters', 'sections')}
+        seen = set()
+        pending = []
+
+        def flush():
+            parts = [p for p in pending if p[0] == 'part']
+            with db:
+                for kind, *row in pending:
+                    if kind == 'patient':
+                        db.execute("INSERT OR REPLACE INTO patients (id, base, merged_path) VALUES (?, ?, ?)", row)
+                    elif kind == 'touch':
+                        db.execute("UPDATE parts SET size = ?, mtime_ns = ? WHERE id = ?", row)
+                    elif kind == 'drop':
+                        delete_part(db, row[0])
+                        db.execute("DELETE FROM parts WHERE id = ?", row)
+                for _, part, encounters, sections, replace in parts:
+                    if replace:
+                        delete_part(db, part[0])
+                db.executemany("INSERT OR REPLACE INTO parts (id, patient_id, label, part_order, pdf_path, "
+                               "output_path, size, mtime_ns, hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               [part for _, part, _, _, _ in parts])
+                db.executemany("INSERT INTO encounters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               [row for p in parts for row in p[2]])
+                db.executemany("INSERT INTO sections VALUES (?, ?, ?, ?, ?, ?)",
+                               [row for p in parts for row in p[3]])
+            pending.clear()
+
+        groups = discover_groups(mother_folder)
+        for base in sorted(groups):
+            files, merged_path, _ = group_files(base, groups[base])
+            if not files:
+                continue
+            stats['patients'] += 1
+            patient_id = patient_ids.get(base)
+            if patient_id is None:
+                patient_id = patient_ids[base] = ids['patients']
+                ids['patients'] += 1
+            pending.append(('patient', patient_id, base, merged_path))
+            for order, file in enumerate(files):
+                output = os.path.abspath(file['output'])
+                found = find_output(output)  # plain or compressed
+                if not found:
+                    continue  # not processed (yet)
+                st = os.stat(found)
+                seen.add(output)
+                stats['parts'] += 1
+                existing = known.get(output)
+                if existing and existing[1:3] == (st.st_size, st.st_mtime_ns):
+                    stats['unchanged'] += 1
+                    continue
+                text = read_text(found)
+                digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+                if existing and existing[3] == digest:
+                    pending.append(('touch', st.st_size, st.st_mtime_ns, existing[0]))
+                    stats['unchanged'] += 1
+                    continue
+                part_id = existing[0] if existing else ids['parts']
+                if not existing:
+                    ids['parts'] += 1
+                encounters, sections = part_rows(text, read_page_spans(output), part_id,
+                                                 ids['encounters'], ids['sections'])
+                ids['encounters'] += len(encounters)
+                ids['sections'] += len(sections)
+                part = (part_id, patient_id, file['label'], order, os.path.abspath(file['pdf']), output,
+                        st.st_size, st.st_mtime_ns, digest)
+                pending.append(('part', part, encounters, sections, bool(existing)))
+                stats['exported'] += 1
+                stats['encounters'] += len(encounters)
+                stats['sections'] += len(sections)
+                if stats['exported'] % EXPORT_BATCH == 0:
+                    flush()
+                    if on_progress:
+                        on_progress(stats)
+
+        # Parts of this mother folder whose output no longer exists
+        root = os.path.join(os.path.abspath(mother_folder), '')
+        for output, (part_id, *_) in known.items():
+            if output.startswith(root) and output not in seen:
+                pending.append(('drop', part_id))
+                stats['removed'] += 1
+        flush()
+        with db:
+            db.executescript(INDEXES)
+    finally:
+        db.close()
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None):
+    """export subcommand of pdf_batch_processor"""
+    parser = argparse.ArgumentParser(prog="pdf_batch_processor.py export",
+                                     description="Export a processed batch into one SQLite database")
+    parser.add_argument('mother_folder', help="Mother folder of a processed batch")
+    parser.add_argument('-o', '--output',
+                        help=f"Database file (default: {DEFAULT_EXPORT_NAME} in the mother folder)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.mother_folder):
+        print(f"❌ Error: Folder not found: {args.mother_folder}")
+        sys.exit(1)
+    path = args.output or os.path.join(args.mother_folder, DEFAULT_EXPORT_NAME)
+    print(f"\n📦 Exporting {args.mother_folder} → {path}")
+    try:
+        stats = export_batch(args.mother_folder, path,
+                             on_progress=lambda s: print(f"   … {s['exported']:,} part(s) exported"))
+    except (ExportSchemaError, sqlite3.Error, OSError) as e:
+        print(f"❌ Export failed: {str(e)}")
+        sys.exit(1)
+    print(f"✅ {stats['patients']:,} patient(s), {stats['parts']:,} part(s): "
+          f"{stats['exported']:,} exported, {stats['unchanged']:,} unchanged, {stats['removed']:,} removed")
+    print(f"   {stats['encounters']:,} encounter(s), {stats['sections']:,} section(s) written "
+          f"in {stats['seconds']:.2f}s")
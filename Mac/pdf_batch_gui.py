@@ -8,6 +8,7 @@ Clean, minimal interface inspired by Cursor
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox, simpledialog
 import threading
+import asyncio
 import sys
 import os
 from pathlib import Path
@@ -16,11 +17,13 @@ from pathlib import Path
 from pdf_batch_processor import (
     is_valid_folder_name,
     find_matching_pdf,
-    clean_and_structure_pdf,
-    reverse_hebrew_in_text,
     parse_folder_name,
     find_split_part_pdfs
 )
+from pdf_batch_stats import format_eta
+from pdf_batch_async import BatchOrchestrator
+from pdf_batch_timing import report_lines
+from pdf_batch_profile import report_lines as profile_report_lines
 
 
 class CursorStyleGUI:
@@ -53,6 +56,12 @@ class CursorStyleGUI:
         
         # Data
         self.selected_folder = tk.StringVar()
+        self.ocr_enabled = tk.BooleanVar(value=False)
+        self.chronological_merge = tk.BooleanVar(value=False)
+        self.strip_headers = tk.BooleanVar(value=False)
+        self.write_records = tk.BooleanVar(value=False)
+        self.measure_timings = tk.BooleanVar(value=False)
+        self.profile_files = tk.BooleanVar(value=False)
         self.is_processing = False
         self.folders_data = []
         
@@ -429,6 +438,90 @@ class CursorStyleGUI:
         )
         self.start_btn.pack(side='left')
         
+        # OCR for scanned PDFs (requires Tesseract; see pdf_batch_ocr)
+        self.ocr_check = tk.Checkbutton(
+            bar,
+            text="OCR לקבצים סרוקים",
+            variable=self.ocr_enabled,
+            font=('Arial', 11),
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text'],
+            selectcolor=self.COLORS['input_bg'],
+            activebackground=self.COLORS['bg'],
+            activeforeground=self.COLORS['text']
+        )
+        self.ocr_check.pack(side='left', padx=15)
+        
+        # Merge split groups by encounter date instead of part by part
+        self.chrono_check = tk.Checkbutton(
+            bar,
+            text="מיזוג כרונולוגי",
+            variable=self.chronological_merge,
+            font=('Arial', 11),
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text'],
+            selectcolor=self.COLORS['input_bg'],
+            activebackground=self.COLORS['bg'],
+            activeforeground=self.COLORS['text']
+        )
+        self.chrono_check.pack(side='left', padx=15)
+        
+        # Remove repeated page headers/footers (see pdf_batch_templates)
+        self.headers_check = tk.Checkbutton(
+            bar,
+            text="הסרת כותרות עליונות ותחתונות",
+            variable=self.strip_headers,
+            font=('Arial', 11),
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text'],
+            selectcolor=self.COLORS['input_bg'],
+            activebackground=self.COLORS['bg'],
+            activeforeground=self.COLORS['text']
+        )
+        self.headers_check.pack(side='left', padx=15)
+        
+        # <name>_ENCOUNTERS.jsonl: one record per encounter (see pdf_batch_records)
+        self.records_check = tk.Checkbutton(
+            bar,
+            text="פלט JSONL למפגשים",
+            variable=self.write_records,
+            font=('Arial', 11),
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text'],
+            selectcolor=self.COLORS['input_bg'],
+            activebackground=self.COLORS['bg'],
+            activeforeground=self.COLORS['text']
+        )
+        self.records_check.pack(side='left', padx=15)
+        
+        # Per-stage timing histograms (see pdf_batch_timing)
+        self.timings_check = tk.Checkbutton(
+            bar,
+            text="מדידת זמנים לפי שלב",
+            variable=self.measure_timings,
+            font=('Arial', 11),
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text'],
+            selectcolor=self.COLORS['input_bg'],
+            activebackground=self.COLORS['bg'],
+            activeforeground=self.COLORS['text']
+        )
+        self.timings_check.pack(side='left', padx=15)
+        
+        # cProfile / tracemalloc for the selected folders (see pdf_batch_profile)
+        self.profile_check = tk.Checkbutton(
+            bar,
+            text="פרופיילינג",
+            variable=self.profile_files,
+            font=('Arial', 11),
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text'],
+            selectcolor=self.COLORS['input_bg'],
+            activebackground=self.COLORS['bg'],
+            activeforeground=self.COLORS['text']
+        )
+        self.profile_check.pack(side='left', padx=15)
+        
     def create_log_section(self, parent):
         """Create log section"""
         section = tk.Frame(parent, bg=self.COLORS['card'])
@@ -666,101 +759,29 @@ class CursorStyleGUI:
         thread.start()
     
     def run_process(self, selected):
-        """Run processing"""
+        """Run processing (drives the asyncio orchestrator on this worker thread)"""
         try:
             self.log_message("═" * 60 + "\n")
             self.log_message("מתחיל עיבוד\n", 'info')
             self.log_message("═" * 60 + "\n\n")
             
-            success = 0
-            failed = 0
-            total = len(selected)
+            # Selected folders are grouped like the CLI does, so split parts are merged
+            # as soon as their group finishes; extraction runs in an isolated worker
+            # so a pathological PDF cannot take the GUI down
+            merge_order = 'chronological' if self.chronological_merge.get() else 'suffix'
+            orchestrator = BatchOrchestrator(self.selected_folder.get(), ocr=self.ocr_enabled.get(),
+                                             strip_headers=self.strip_headers.get(),
+                                             merge_order=merge_order, records=self.write_records.get(),
+                                             timings=self.measure_timings.get(), profile=self.profile_files.get(),
+                                             on_event=self.handle_event)
+            # PDFs the user renamed by hand (see edit_pdf_name); the rest are found by folder name
+            pdf_names = {f['name']: f['pdf_name'] for f in selected
+                         if f['pdf_name'].endswith('.pdf') and f['pdf_name'] != f"{f['name']}.pdf"}
+            summary = asyncio.run(orchestrator.run(names=[f['name'] for f in selected], pdf_names=pdf_names))
             
-            for i, folder_data in enumerate(selected, 1):
-                folder_path = folder_data['path']
-                folder_name = folder_data['name']
-                pdf_name = folder_data['pdf_name']
-                
-                self.log_message(f"[{i}/{total}] {folder_name}\n")
-                self.root.after(0, lambda t=f"מעבד {i}/{total}": 
-                              self.status_label.config(text=t))
-                
-                try:
-                    pdf_path = os.path.join(folder_path, pdf_name)
-                    
-                    if os.path.exists(pdf_path):
-                        self.log_message(f"  📖 קורא...\n")
-                        cleaned = clean_and_structure_pdf(pdf_path)
-                        self.log_message(f"  🔄 מתקן עברית...\n")
-                        fixed = reverse_hebrew_in_text(cleaned)
-                        output = f"{folder_name}_CLEANED.txt"
-                        output_path = os.path.join(folder_path, output)
-                        with open(output_path, 'w', encoding='utf-8') as f:
-                            f.write(fixed)
-                        self.log_message(f"  ✅ הושלם\n", 'success')
-                        success += 1
-                    else:
-                        # Try split parts inside the same folder
-                        parts = find_split_part_pdfs(folder_path, folder_name)
-                        if len(parts) >= 2:
-                            self.log_message(f"  📑 נמצאו {len(parts)} חלקים\n")
-                            texts = []
-                            for part in sorted(parts, key=lambda p: self.hebrew_suffix_key(p.get('suffix'))):
-                                self.log_message(f"    📖 {part['name']}\n")
-                                cleaned = clean_and_structure_pdf(part['path'])
-                                fixed = reverse_hebrew_in_text(cleaned)
-                                part_base = f"{folder_name}{part['suffix']}"
-                                out_individual = os.path.join(folder_path, f"{part_base}_CLEANED.txt")
-                                with open(out_individual, 'w', encoding='utf-8') as f:
-                                    f.write(fixed)
-                                texts.append(fixed)
-                            # Merge
-                            merged_name = f"{folder_name}_cleaned_merged.txt"
-                            # Save merged into the same folder where parts were found
-                            merged_path = os.path.join(folder_path, merged_name)
-                            with open(merged_path, 'w', encoding='utf-8') as f:
-                                f.write("\n\n".join(texts))
-                            self.log_message(f"  💾 נוצר קובץ מיזוג: {merged_name}\n", 'success')
-                            success += 1
-                        else:
-                            self.log_message(f"  ❌ לא נמצא\n", 'error')
-                            failed += 1
-                    
-                except Exception as e:
-                    self.log_message(f"  ❌ {str(e)}\n", 'error')
-                    failed += 1
-            
-            # Attempt merge for split groups among the selected items
-            try:
-                groups = {}
-                for folder_data in selected:
-                    base, suffix = parse_folder_name(folder_data['name'])
-                    if base and suffix != 'מ':
-                        groups.setdefault(base, []).append({
-                            'path': folder_data['path'],
-                            'name': folder_data['name'],
-                            'suffix': suffix
-                        })
-                
-                for base, parts in groups.items():
-                    if len(parts) >= 2:
-                        parts_sorted = sorted(parts, key=lambda p: self.hebrew_suffix_key(p.get('suffix')))
-                        texts = []
-                        for part in parts_sorted:
-                            cleaned_path = os.path.join(part['path'], f"{part['name']}_CLEANED.txt")
-                            if os.path.exists(cleaned_path):
-                                with open(cleaned_path, 'r', encoding='utf-8') as f:
-                                    texts.append(f.read())
-                        if len(texts) >= 2:
-                            # Save merged into the first part's folder (origin folder)
-                            dest_dir = parts_sorted[0]['path']
-                            merged_name = f"{base}_cleaned_merged.txt"
-                            merged_path = os.path.join(dest_dir, merged_name)
-                            with open(merged_path, 'w', encoding='utf-8') as f:
-                                f.write("\n\n".join(texts))
-                            self.log_message(f"\n  💾 נוצר קובץ מיזוג: {merged_name}\n", 'success')
-            except Exception as merge_err:
-                self.log_message(f"\n  ⚠ שגיאה במיזוג: {str(merge_err)}\n", 'warning')
+            success = summary['success']
+            failed = summary['failed']
+            total = summary['total']
             
             self.log_message("\n" + "═" * 60 + "\n")
             self.log_message("סיכום\n", 'info')
@@ -768,6 +789,39 @@ class CursorStyleGUI:
             self.log_message(f"✅ הצליחו: {success}\n", 'success')
             self.log_message(f"❌ נכשלו: {failed}\n", 'error' if failed > 0 else 'info')
             self.log_message(f"📁 סה״כ: {total}\n")
+            if summary['failed_files']:
+                self.log_message(f"\n⚠ קבצים שנכשלו ({len(summary['failed_files'])}):\n", 'warning')
+                for failure in summary['failed_files']:
+                    self.log_message(f"  • {os.path.basename(failure['path'])}: {failure['reason']}\n", 'warning')
+            if summary['needs_ocr']:
+                self.log_message(f"\n🔍 דרוש OCR - אין שכבת טקסט ({len(summary['needs_ocr'])}):\n", 'warning')
+                for item in summary['needs_ocr']:
+                    self.log_message(f"  • {os.path.basename(item['path'])} ({item['pages']} עמודים)\n", 'warning')
+            if summary['stripped_lines']:
+                self.log_message(f"🧹 הוסרו {summary['stripped_lines']:,} שורות כותרת/תחתית חוזרות\n")
+            if summary['duplicate_pages'] or summary['duplicate_encounters']:
+                self.log_message(f"🧬 הוסרו כפילויות: {summary['duplicate_pages']} עמודים, "
+                                 f"{summary['duplicate_encounters']} מפגשים\n")
+            if summary['ocr_files']:
+                self.log_message(f"🔍 OCR: {summary['ocr_files']} קבצים, {summary['ocr_pages']} עמודים "
+                                 f"({summary['ocr_cached_pages']} מהמטמון)\n")
+            if summary['search_indexed']:
+                self.log_message(f"🔎 אינדקס חיפוש: עודכנו {summary['search_indexed']} קבצים\n")
+            if summary['manifest']:
+                self.log_message(f"🧾 מניפסט אצווה: {summary['manifest']}\n")
+            if summary['unchanged_outputs']:
+                self.log_message(f"⏭ {summary['unchanged_outputs']} קבצי פלט לא השתנו ולא נכתבו מחדש\n")
+            if summary['timings']:
+                self.log_message("⏱ זמנים לפי שלב (נשמרים גם במניפסט האצווה):\n")
+                for line in report_lines(summary['timings']):
+                    self.log_message(line + "\n")
+            if summary['profiled']:
+                self.log_message(f"🔥 פונקציות חמות ב-{summary['profiled']} קבצים שנמדדו:\n")
+                for line in profile_report_lines(summary['hot_functions']):
+                    self.log_message(line + "\n")
+                if summary['profile']:
+                    self.log_message(f"   פרופיל משולב: {summary['profile']}\n")
+            self.log_message(f"⏱ משך: {format_eta(summary['elapsed'])}\n")
             self.log_message("\n🎉 הושלם!\n", 'success')
             
             self.finish_processing(success, failed, total)
@@ -776,6 +830,37 @@ class CursorStyleGUI:
             self.log_message(f"\nשגיאה: {str(e)}\n", 'error')
             self.finish_processing(0, 0, 0)
     
+    def handle_event(self, event, data):
+        """Log orchestrator progress events (called from the processing thread)"""
+        if event == 'group_start':
+            job = data['job']
+            eta_text = format_eta(data['eta'])
+            self.log_message(f"[{data['index']}/{data['total']}] {job['base']}\n")
+            self.root.after(0, lambda t=f"מעבד {data['index']}/{data['total']} · נותרו ~{eta_text}":
+                          self.status_label.config(text=t))
+            if len(job['files']) >= 2:
+                self.log_message(f"  📑 נמצאו {len(job['files'])} חלקים\n")
+            for name in job['missing']:
+                self.log_message(f"  ❌ לא נמצא: {name}\n", 'error')
+        elif event == 'file_start':
+            self.log_message(f"  📖 {data['file']['label']}\n")
+        elif event == 'file_done':
+            self.log_message(f"  ✅ הושלם: {os.path.basename(data['file']['output'])}\n", 'success')
+        elif event == 'file_failed':
+            self.log_message(f"  ❌ {data['file']['label']}: {data['reason']}\n", 'error')
+        elif event == 'needs_ocr':
+            self.log_message(f"  🔍 {data['file']['label']}: קובץ סרוק ללא טקסט - הועבר לתור OCR\n", 'warning')
+        elif event == 'ocr_start':
+            self.log_message(f"  🔍 {data['file']['label']}: קובץ סרוק - מריץ OCR על {data['triage']['pages']} עמודים\n")
+        elif event == 'ocr_done':
+            self.log_message(f"  🔍 OCR: {data['ocr_pages']} עמודים ({data['cached_pages']} מהמטמון)\n")
+        elif event == 'merged':
+            self.log_message(f"  💾 נוצר קובץ מיזוג: {os.path.basename(data['path'])}\n", 'success')
+        elif event == 'merge_skipped':
+            self.log_message("  ⚠ רק חלק אחד עובד; קובץ מיזוג לא נוצר\n", 'warning')
+        elif event == 'warning':
+            self.log_message(f"  ⚠ {data['message']}\n", 'warning')
+    
     def finish_processing(self, success, failed, total):
         """Finish processing"""
         self.is_processing = False
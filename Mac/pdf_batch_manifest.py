@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch manifest for the PDF Batch Processor
+
+Every batch run writes <mother folder>/batch_manifest.json describing what
+it read and wrote, so downstream jobs can diff two manifests and process
+only what changed instead of rescanning the tree:
+
+    { 'version', 'mother_folder', 'started', 'finished', 'elapsed', 'options', 'summary',
+      'groups': [ { 'base', 'status', 'seconds', 'missing', 'errors',
+                    'files': [ { 'label', 'status', 'reason', 'pages', 'chars',
+                                 'input':   { 'path', 'size', 'mtime_ns', 'hash' },
+                                 'outputs': [ { 'path', 'size', 'hash', 'written' } ],
+                                 'timings': { 'read', 'extract', 'ocr', 'write' } } ],
+                    'outputs': [ the merged file, as above ] } ] }
+
+- group status: 'ok', 'partial' (some PDFs missing or failed) or 'failed'
+- file status: 'ok', 'ocr' (OCR'd), 'needs_ocr' (image-only, not OCR'd) or 'failed'
+- hashes are BLAKE2b-128 (hex): of the PDF's bytes for inputs, and of the
+  text for outputs (also for compressed ones, see pdf_batch_outputs)
+- written: False when an unchanged output was left untouched
+- timings are in seconds; 'extract' and 'ocr' are measured in the worker
+"""
+
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+
+MANIFEST_VERSION = 1
+BATCH_MANIFEST_NAME = "batch_manifest.json"
+
+
+def bytes_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds).astimezone().isoformat(timespec='seconds')
+
+
+class BatchManifest:
+    """Collects the manifest while a batch runs; save() writes it"""
+
+    def __init__(self, mother_folder, options=None):
+        self.mother_folder = os.path.abspath(mother_folder)
+        self.options = dict(options or {})
+        self.started = time.time()
+        self.groups = {}
+
+    def group(self, job):
+        """The entry of a group (created on first use)"""
+        entry = self.groups.get(job['base'])
+        if entry is None:
+            entry = self.groups[job['base']] = {
+                'base': job['base'], 'status': None, 'seconds': 0.0, 'missing': list(job['missing']),
+                'errors': [], 'files': [], 'outputs': [],
+            }
+        return entry
+
+    def file(self, job, file, probe=None):
+        """A new entry for one PDF of a group (probe: its probe_pdf result, for the file's mtime)"""
+        entry = {
+            'label': file['label'], 'status': None, 'reason': None, 'pages': None, 'chars': None,
+            'input': {'path': os.path.abspath(file['pdf']), 'size': None,
+                      'mtime_ns': probe['mtime_ns'] if probe else None, 'hash': None},
+            'outputs': [], 'timings': {'read': 0.0, 'extract': 0.0, 'ocr': 0.0, 'write': 0.0},
+        }
+        self.group(job)['files'].append(entry)
+        return entry
+
+    def finish(self, summary):
+        """Settle group statuses and return the manifest as a dict"""
+        groups = []
+        for base in sorted(self.groups):
+            group = self.groups[base]
+            done = [f for f in group['files'] if f['status'] in ('ok', 'ocr')]
+            if not done:
+                group['status'] = 'failed'
+            elif len(done) < len(group['files']) or group['missing'] or group['errors']:
+                group['status'] = 'partial'
+            else:
+                group['status'] = 'ok'
+            groups.append(group)
+        finished = time.time()
+        return {
+            'version': MANIFEST_VERSION,
+            'mother_folder': self.mother_folder,
+            'started': _timestamp(self.started),
+            'finished': _timestamp(finished),
+            'elapsed': round(finished - self.started, 3),
+            'options': self.options,
+            'summary': summary,
+            'groups': groups,
+        }
+
+    def save(self, path, summary):
+        """Write the manifest to path (atomic replace)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.finish(summary), f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+def load_manifest(path):
+    """A batch manifest written by an earlier run, or None if there is none (or it is unreadable)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+        return None
+    return data
+
+
+def output_entry(path, outputs, written):
+    """Manifest entry of an output file, from the output manifest (see pdf_batch_outputs)"""
+    known = outputs.entry(path) if outputs else None
+    return {'path': os.path.abspath(path),
+            'size': known['size'] if known else None,
+            'hash': known['hash'] if known else None,
+            'written': written}
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Merging split-group outputs for the PDF Batch Processor
+
+Consolidated printouts often contain the same encounter twice, and split
+parts (ננ449א / ננ449ב) frequently overlap at their boundary. Pages and
+encounter blocks are identified by a hash of their whitespace-normalised
+content, so exact duplicates are dropped in linear time.
+
+Encounter blocks are found in the final (Hebrew-fixed) text by the marker
+clean_pdf_text inserts, in the form reverse_hebrew_in_text leaves it.
+
+In suffix order, a merged file is written part by part as each part
+finishes (MergeWriter), so no part's text is held for the merge. Both
+merges write (and read parts) in any output codec (see pdf_batch_codec).
+Split parts do not partition time cleanly, so a merged file can also be
+ordered chronologically: the parts' cleaned files are read as streams of
+encounter blocks, each dated by the first date under its marker, and
+k-way merged with a heap (heapq.merge), holding one block per part in
+memory at a time.
+"""
+
+import re
+import heapq
+import itertools
+import hashlib
+
+from pdf_batch_processor import reverse_hebrew_in_text
+from pdf_batch_codec import open_text, DEFAULT_CODEC
+from pdf_batch_outputs import AtomicTextWriter
+
+# Encounter marker as inserted by clean_pdf_text (before the Hebrew fix)
+ENCOUNTER_MARKER = "=== מפגש {} - START ==="
+_ID = "\x00"
+
+
+def _encounter_pattern():
+    """Regex for an encounter marker line in the final text; group 1 is the encounter id"""
+    before, after = reverse_hebrew_in_text(ENCOUNTER_MARKER.format(_ID)).split(_ID)
+    return re.compile('^' + re.escape(before) + r'(\d{3}/\d+)' + re.escape(after) + '$', re.MULTILINE)
+
+
+ENCOUNTER_START = _encounter_pattern()
+
+MERGE_ORDERS = ('suffix', 'chronological')
+DEFAULT_MERGE_ORDER = 'suffix'
+
+# Encounter dates are printed day first (08/02/2020)
+ENCOUNTER_DATE = re.compile(r'(?<!\d)(\d{1,2})[/.](\d{1,2})[/.](\d{4})(?!\d)')
+DATE_LINES = 3  # lines under the marker searched for the encounter date
+
+
+def content_key(text):
+    """Hash of text with all whitespace runs collapsed"""
+    return hashlib.blake2b(' '.join(text.split()).encode('utf-8'), digest_size=16).digest()
+
+
+def split_encounters(text):
+    """
+    Split final text into (preamble, blocks): each block runs from an
+    encounter marker line up to the next marker
+    """
+    starts = [m.start() for m in ENCOUNTER_START.finditer(text)]
+    if not starts:
+        return text, []
+    bounds = starts + [len(text)]
+    return text[:starts[0]], [text[bounds[i]:bounds[i + 1]] for i in range(len(starts))]
+
+
+def unique_pages(page_texts):
+    """Indexes of the pages whose content does not repeat an earlier page"""
+    seen = set()
+    kept = []
+    for index, text in enumerate(page_texts):
+        if text and text.strip():
+            key = content_key(text)
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(index)
+    return kept
+
+
+class EncounterDeduplicator:
+    """
+    Drops encounter blocks (and pages, see unique_pages) whose content was
+    already seen, across every text passed through the same instance.
+    When the texts are the parts of a split group, pass each one's part
+    number: only content first seen in a different part is dropped (the
+    overlap at a part boundary), while a part's own repeats are kept.
+    """
+
+    def __init__(self):
+        self.seen = {}        # block content key -> part it was first seen in
+        self.seen_pages = {}  # page content key -> part it was first seen in
+        self.removed = 0
+        self.removed_pages = 0
+
+    def keep(self, block, part=None):
+        """True unless the block's content was seen before (in another part, with part given)"""
+        if self._first(self.seen, content_key(block), part):
+            return True
+        self.removed += 1
+        return False
+
+    def unique_pages(self, page_texts, part):
+        """Indexes of a part's pages whose content was not first seen in another part"""
+        kept = []
+        for index, text in enumerate(page_texts):
+            if text and text.strip() and not self._first(self.seen_pages, content_key(text), part):
+                self.removed_pages += 1
+                continue
+            kept.append(index)
+        return kept
+
+    @staticmethod
+    def _first(seen, key, part):
+        """True if the content is new, or (with part given) was first seen in the same part"""
+        if key not in seen:
+            seen[key] = part
+            return True
+        return part is not None and seen[key] == part
+
+    def filter(self, text, part=None):
+        """Text with duplicate encounter blocks removed"""
+        preamble, blocks = split_encounters(text)
+        kept = [block for block in blocks if self.keep(block, part)]
+        if len(kept) == len(blocks):
+            return text
+        # Blocks carry the blank lines that separate them; the text ends without one
+        return (preamble + "".join(kept)).rstrip()
+
+
+class MergeWriter:
+    """
+    Writes a merged file one part at a time, in the order the parts are
+    added, to a temporary file next to it that commit() renames into place
+    (so a merge of a single part, or a failed one, leaves nothing behind)
+    """
+
+    def __init__(self, path, codec=DEFAULT_CODEC):
+        self.path = path
+        self.codec = codec
+        self.parts = 0
+        self._writer = None
+
+    def add(self, text):
+        """Append one part's text (parts are separated by a blank line)"""
+        if self._writer is None:
+            self._writer = AtomicTextWriter(self.path, self.codec)
+        if self.parts:
+            self._writer.write("\n\n")
+        self._writer.write(text)
+        self.parts += 1
+
+    def commit(self, manifest=None):
+        """Move the merged file into place; False if it was unchanged (see pdf_batch_outputs)"""
+        written = self._writer.commit(manifest)
+        self._writer = None
+        return written
+
+    def discard(self):
+        """Drop whatever was written (no-op after commit)"""
+        if self._writer is not None:
+            self._writer.discard()
+            self._writer = None
+
+
+def iter_blocks(lines):
+    """
+    Stream cleaned text given as lines (e.g. an open file): yields the
+    preamble first (possibly empty), then each encounter block
+    """
+    block = []
+    for line in lines:
+        if ENCOUNTER_START.match(line):
+            yield "".join(block)
+            block = []
+        block.append(line)
+    yield "".join(block)
+
+
+def encounter_date(block):
+    """(year, month, day) of the first date under an encounter's marker, or None"""
+    for line in block.split('\n')[1:1 + DATE_LINES]:
+        match = ENCOUNTER_DATE.search(line)
+        if match:
+            day, month, year = (int(g) for g in match.groups())
+            if 1 <= day <= 31 and 1 <= month <= 12:
+                return year, month, day
+    return None
+
+
+def dated_blocks(blocks, part):
+    """
+    Key each encounter block for the merge: (date, part, position). A block
+    without a date takes the date of the block before it, so it stays next
+    to it.
+    """
+    date = (0, 0, 0)
+    for position, block in enumerate(blocks):
+        date = encounter_date(block) or date
+        yield (date, part, position), block
+
+
+def write_pieces(out, pieces):
+    """Write text pieces separated by one blank line (as the suffix-order merge does)"""
+    first = True
+    for piece in pieces:
+        piece = piece.strip('\n')
+        if not piece:
+            continue
+        if not first:
+            out.write("\n\n")
+        out.write(piece)
+        first = False
+
+
+def merge_chronological(part_paths, merged_path, deduplicator=None, codec=DEFAULT_CODEC, manifest=None):
+    """
+    Merge the cleaned files of a split group by encounter date. Each part is
+    expected to be in date order already (as printouts are); ties keep the
+    suffix order. Part preambles come first, in suffix order.
+    part_paths: the parts' files (any codec); merged_path: the merged output
+    (named without a codec suffix)
+    deduplicator: an EncounterDeduplicator to drop blocks repeated across parts
+    (keyed by part, so a part's own repeats are kept)
+    manifest: an OutputManifest, to leave an unchanged merged file untouched
+    Returns (number of encounter blocks, whether the merged file was replaced)
+    """
+    files = []
+    out = None
+    try:
+        for path in part_paths:
+            files.append(open_text(path))
+        streams = [iter_blocks(f) for f in files]
+        preambles = [next(stream) for stream in streams]
+        merged = heapq.merge(*(dated_blocks(stream, part) for part, stream in enumerate(streams)),
+                             key=lambda item: item[0])
+        written = 0
+
+        def blocks():
+            nonlocal written
+            for (_, part, _), block in merged:
+                if deduplicator is None or deduplicator.keep(block, part):
+                    written += 1
+                    yield block
+
+        out = AtomicTextWriter(merged_path, codec)
+        write_pieces(out, itertools.chain(preambles, blocks()))
+        replaced = out.commit(manifest)
+        out = None
+        return written, replaced
+    finally:
+        if out is not None:
+            out.discard()
+        for f in files:
+            f.close()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reader stage of the PDF Batch Processor pipeline
+
+    reader (Prefetcher) -> extract + clean (worker pool) -> writer
+
+On a network share, opening a PDF stalls on I/O before any parsing starts.
+The reader stage loads upcoming PDFs into memory ahead of time (bounded by a
+byte budget), so that network latency overlaps with parsing instead of adding
+to it. Outputs are written by the orchestrator (pdf_batch_async) in the
+background.
+"""
+
+import os
+import threading
+
+DEFAULT_PREFETCH_MB = 256
+DEFAULT_READERS = 2
+
+
+class Prefetcher:
+    """
+    Reads PDFs (in the order they will be needed) into memory on background
+    threads, keeping at most budget_bytes loaded but not yet consumed.
+    A file that is requested before it was prefetched is read directly, so a
+    consumer never waits behind the budget.
+    sizes: path -> file size already known (e.g. from the prescan); other
+    files are stat'ed once, outside the lock
+    """
+
+    def __init__(self, paths, budget_bytes=DEFAULT_PREFETCH_MB * 1024 * 1024, readers=DEFAULT_READERS,
+                 sizes=None):
+        self.budget_bytes = budget_bytes
+        self._cond = threading.Condition()
+        self._queue = list(paths)
+        self._sizes = dict(sizes or {})
+        self._next = 0
+        self._loading = set()
+        self._loaded = {}      # path -> bytes (or the exception raised reading it)
+        self._claimed = set()  # requested before the reader got to them
+        self._buffered = 0
+        self._closed = False
+        self._threads = [threading.Thread(target=self._read_loop, daemon=True) for _ in range(max(1, readers))]
+        for thread in self._threads:
+            thread.start()
+
+    def _read_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    while self._next < len(self._queue) and self._queue[self._next] in self._claimed:
+                        self._next += 1
+                    if self._next >= len(self._queue):
+                        return
+                    path = self._queue[self._next]
+                    size = self._sizes.get(path)
+                    # Always allow one file in, even if it alone exceeds the budget
+                    if size is None or self._buffered == 0 or self._buffered + size <= self.budget_bytes:
+                        break
+                    self._cond.wait()
+                if size is not None:
+                    self._next += 1
+                    self._loading.add(path)
+                    self._buffered += size
+            if size is None:
+                # A stat can stall on a network share: never hold the lock for it
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    size = 0
+                with self._cond:
+                    self._sizes[path] = size
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                data = e
+            with self._cond:
+                self._loading.discard(path)
+                self._buffered += (len(data) if isinstance(data, bytes) else 0) - size
+                self._loaded[path] = data
+                self._cond.notify_all()
+
+    def get(self, path):
+        """Return the bytes of a PDF, waiting for it if it is being prefetched"""
+        with self._cond:
+            while path in self._loading:
+                self._cond.wait()
+            if path in self._loaded:
+                data = self._loaded.pop(path)
+                if isinstance(data, bytes):
+                    self._buffered -= len(data)
+                self._cond.notify_all()
+            else:
+                self._claimed.add(path)
+                data = None
+        if data is None:
+            with open(path, 'rb') as f:
+                return f.read()
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+    def close(self):
+        """Stop reading ahead and drop anything not consumed"""
+        with self._cond:
+            self._closed = True
+            self._loaded.clear()
+            self._buffered = 0
+            self._cond.notify_all()
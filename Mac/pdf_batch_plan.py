@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dry-run planning for the PDF Batch Processor
+
+    python pdf_batch_processor.py plan MOTHER_FOLDER [-j 4] [-v]
+
+Reports what a batch run would do, without processing anything: the same
+folder scan and PDF prescan the batch starts with (file size and the page
+tree's /Count; no page content is parsed), then
+
+- groups to process, with their page counts
+- groups unchanged since the last batch: every PDF has the size and mtime
+  recorded in the batch manifest (see pdf_batch_manifest) and every output
+  it lists is still in place. A batch run still reads them, but their
+  outputs come out the same and are left untouched (see pdf_batch_outputs)
+- groups with missing PDFs (find_matching_pdf found none)
+- the estimated wall time at the given number of workers: per-file cost
+  model predictions (this machine's timing history, see pdf_batch_stats)
+  dispatched the way the batch dispatches them (simulate_makespan)
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+
+from pdf_batch_processor import simulate_makespan, schedule_jobs, DEFAULT_BACKEND, EXTRACTION_BACKENDS
+from pdf_batch_async import BatchOrchestrator
+from pdf_batch_manifest import load_manifest, BATCH_MANIFEST_NAME
+from pdf_batch_stats import format_eta
+
+
+def manifest_entries(manifest):
+    """(input path -> file entry, base -> group entry) of a batch manifest"""
+    files = {}
+    groups = {}
+    for group in (manifest or {}).get('groups', []):
+        groups[group['base']] = group
+        for entry in group['files']:
+            files[entry['input']['path']] = entry
+    return files, groups
+
+
+def outputs_in_place(outputs):
+    """True if every output listed in a manifest entry still has its recorded size"""
+    for output in outputs:
+        try:
+            if os.path.getsize(output['path']) != output['size']:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def unchanged(job, files, groups):
+    """True if a group's PDFs and outputs are as the last batch manifest recorded them"""
+    group = groups.get(job['base'])
+    if not group or group['errors'] or not outputs_in_place(group['outputs']):
+        return False
+    if job['merged'] and len(job['files']) >= 2 and not group['outputs']:
+        return False  # the merged file was not written last time
+    for probe in job['pdfs']:
+        entry = files.get(os.path.abspath(probe['path']))
+        if (not entry or entry['status'] not in ('ok', 'ocr')
+                or entry['input']['size'] != probe['bytes']
+                or entry['input']['mtime_ns'] != probe['mtime_ns']
+                or not outputs_in_place(entry['outputs'])):
+            return False
+    return True
+
+
+def makespan(jobs, workers):
+    """Estimated wall seconds for jobs, dispatched as the batch does"""
+    if workers > 1:
+        jobs = schedule_jobs(jobs)
+    return simulate_makespan([job['predicted'] for job in jobs], workers)
+
+
+def plan_batch(mother_folder, workers=1, backend=DEFAULT_BACKEND, manifest_path=None):
+    """
+    Plan a batch run without processing it. Returns dict:
+    { 'process': [job], 'unchanged': [job], 'missing': [job], 'pages', 'changed_pages',
+      'seconds', 'changed_seconds', 'manifest': path of the manifest compared against, or None }
+    Jobs are build_job dicts; a job with some PDFs missing is in 'missing' and
+    also in 'process' / 'unchanged' for the PDFs it has.
+    """
+    orchestrator = BatchOrchestrator(mother_folder, workers=workers, backend=backend)
+    jobs = sorted(asyncio.run(orchestrator.prescan()), key=lambda j: j['base'])
+    manifest_path = manifest_path or os.path.join(mother_folder, BATCH_MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    files, groups = manifest_entries(manifest)
+
+    plan = {'process': [], 'unchanged': [], 'missing': [], 'manifest': manifest_path if manifest else None}
+    for job in jobs:
+        if job['missing'] or not job['files']:
+            plan['missing'].append(job)
+        if not job['files']:
+            continue
+        plan['unchanged' if unchanged(job, files, groups) else 'process'].append(job)
+    runnable = plan['process'] + plan['unchanged']
+    plan['pages'] = sum(job['pages'] for job in runnable)
+    plan['changed_pages'] = sum(job['pages'] for job in plan['process'])
+    plan['seconds'] = makespan(runnable, workers)
+    plan['changed_seconds'] = makespan(plan['process'], workers)
+    return plan
+
+
+def main(argv=None):
+    """plan subcommand of pdf_batch_processor"""
+    parser = argparse.ArgumentParser(prog="pdf_batch_processor.py plan",
+                                     description="Show what a batch run would do and how long it would take")
+    parser.add_argument('mother_folder', help="Mother folder to plan")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="Parallel workers the batch will run with (default: 1)")
+    parser.add_argument('--backend', choices=sorted(EXTRACTION_BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"Extraction backend the batch will use (default: {DEFAULT_BACKEND})")
+    parser.add_argument('--manifest', metavar='PATH',
+                        help="Batch manifest of the last run (default: batch_manifest.json in the mother folder)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="List every group")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.mother_folder):
+        print(f"❌ Error: Folder not found: {args.mother_folder}")
+        sys.exit(1)
+    workers = max(1, args.workers)
+    print(f"\n📋 Plan for {args.mother_folder} ({workers} worker(s))")
+    plan = plan_batch(args.mother_folder, workers=workers, backend=args.backend, manifest_path=args.manifest)
+    if not plan['process'] and not plan['unchanged'] and not plan['missing']:
+        print("❌ No valid folders found")
+        return
+
+    def pages(jobs):
+        return sum(job['pages'] for job in jobs)
+
+    print(f"\n▶ To process: {len(plan['process']):,} group(s), {pages(plan['process']):,} page(s)")
+    if args.verbose:
+        for job in plan['process']:
+            print(f"   • {job['base']}: {job['pages']:,} page(s), ~{format_eta(job['predicted'])}")
+    if plan['manifest']:
+        print(f"⏭ Unchanged since the last batch: {len(plan['unchanged']):,} group(s), "
+              f"{pages(plan['unchanged']):,} page(s) (outputs would be left untouched)")
+        if args.verbose:
+            for job in plan['unchanged']:
+                print(f"   • {job['base']}")
+    else:
+        print("⏭ No batch manifest yet: every group counts as changed")
+    if plan['missing']:
+        print(f"⚠ Missing PDFs: {len(plan['missing']):,} group(s)")
+        for job in plan['missing']:
+            print(f"   • {job['base']}: {', '.join(job['missing'])}")
+
+    print(f"\n⏱ Estimated wall time at -j {workers}: {format_eta(plan['seconds'])} "
+          f"for {plan['pages']:,} page(s)")
+    if plan['unchanged']:
+        print(f"   Changed groups only: {format_eta(plan['changed_seconds'])} "
+              f"for {plan['changed_pages']:,} page(s)")
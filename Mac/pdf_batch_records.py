@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Structured encounter records for the PDF Batch Processor
+
+Optionally, next to each <name>_CLEANED.txt the batch writes
+<name>_ENCOUNTERS.jsonl: one JSON record per encounter, so downstream
+pipelines do not have to re-parse the **אנמנזה:**-style markers themselves.
+Records are built in the worker, from the page texts and the cleaned text
+it has just produced:
+
+    { "file": "ננ449א", "encounter": "123/45", "date": "2020-02-08",
+      "pages": [3, 4], "start": 1234, "end": 2345,
+      "sections": [ { "name": "אנמנזה", "start": 1300, "end": 1400, "text": "..." }, ... ] }
+
+- pages:  first and last PDF page (1-based) the encounter is printed on
+- start/end, and the same in sections: character offsets into the
+  _CLEANED.txt (end exclusive), with surrounding whitespace excluded
+- date:   the encounter date (ISO), or null if none was found
+"""
+
+import os
+import re
+import json
+
+from pdf_batch_processor import reverse_hebrew_in_text
+from pdf_batch_merge import ENCOUNTER_START, encounter_date
+
+# Encounter headers in the raw page text, as clean_pdf_text finds them
+RAW_ENCOUNTER = re.compile(r'(\d{3}/\d+)\s+מפגש')
+
+SECTION_NAMES = ('אנמנזה', 'ממצאים', 'אבחנות', 'דיון ותוכנית', 'הפניות', 'תרופות במפגש')
+
+# Section marker lines as they appear in the final text -> section name
+SECTION_MARKERS = {reverse_hebrew_in_text(f"**{name}:**"): name for name in SECTION_NAMES}
+SECTION_START = re.compile('^(' + '|'.join(re.escape(m) for m in SECTION_MARKERS) + ')$', re.MULTILINE)
+
+
+def output_base(output_path):
+    """<name> of <name>_CLEANED.txt, with its directory"""
+    return output_path[:-len("_CLEANED.txt")] if output_path.endswith("_CLEANED.txt") else output_path
+
+
+def output_name(output_path):
+    """
+    <name> of <name>_CLEANED.txt: the file a record belongs to, named like
+    its output (the search index and the export key files by output path too)
+    """
+    return os.path.basename(output_base(output_path))
+
+
+def records_path(output_path):
+    """<name>_ENCOUNTERS.jsonl next to <name>_CLEANED.txt"""
+    return output_base(output_path) + "_ENCOUNTERS.jsonl"
+
+
+def encounter_pages(page_texts, page_numbers):
+    """
+    Where each encounter header is printed, in order:
+    list of (encounter id, page number, True if it is the page's first line)
+    """
+    starts = []
+    for text, number in zip(page_texts, page_numbers):
+        if not text:
+            continue
+        body = text.lstrip()
+        first_line_end = len(text) - len(body) + (body.find('\n') if '\n' in body else len(body))
+        for match in RAW_ENCOUNTER.finditer(text):
+            starts.append((match.group(1), number, match.start() < first_line_end))
+    return starts
+
+
+def page_spans(starts, last_page):
+    """(encounter id, first page, last page) for each entry of encounter_pages"""
+    spans = []
+    for i, (encounter, page, _) in enumerate(starts):
+        if i + 1 < len(starts):
+            _, next_page, opens_page = starts[i + 1]
+            # Ends where the next one starts, or on the page before if that one opens its page
+            end = next_page - 1 if opens_page else next_page
+        else:
+            end = last_page
+        spans.append((encounter, page, max(page, end)))
+    return spans
+
+
+def trimmed(text, start, end):
+    """(start, end) narrowed to exclude surrounding whitespace"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def block_sections(text, start, end):
+    """Sections of the encounter block text[start:end]"""
+    markers = list(SECTION_START.finditer(text, start, end))
+    sections = []
+    for i, marker in enumerate(markers):
+        section_end = markers[i + 1].start() if i + 1 < len(markers) else end
+        body_start, body_end = trimmed(text, marker.end(), section_end)
+        sections.append({'name': SECTION_MARKERS[marker.group(1)], 'start': body_start,
+                         'end': body_end, 'text': text[body_start:body_end]})
+    return sections
+
+
+def encounter_records(text, page_texts, page_numbers):
+    """
+    Records of every encounter in a cleaned text (see the module docstring)
+    page_texts: the page texts the cleaned text was built from
+    page_numbers: their PDF page numbers (pages dropped as duplicates are skipped)
+    """
+    spans = page_spans(encounter_pages(page_texts, page_numbers), page_numbers[-1] if page_numbers else 0)
+    starts = [match.start() for match in ENCOUNTER_START.finditer(text)]
+    bounds = starts + [len(text)]
+    records = []
+    next_span = 0
+    for i, block_start in enumerate(starts):
+        encounter = ENCOUNTER_START.match(text, block_start).group(1)
+        pages = None
+        # Blocks dropped as duplicates have no record, so look ahead for this one's header
+        for j in range(next_span, len(spans)):
+            if spans[j][0] == encounter:
+                pages = [spans[j][1], spans[j][2]]
+                next_span = j + 1
+                break
+        block_start, block_end = trimmed(text, block_start, bounds[i + 1])
+        date = encounter_date(text[block_start:block_end])
+        records.append({
+            'encounter': encounter,
+            'date': "%04d-%02d-%02d" % date if date else None,
+            'pages': pages,
+            'start': block_start,
+            'end': block_end,
+            'sections': block_sections(text, block_start, block_end),
+        })
+    return records
+
+
+def records_jsonl(records, name):
+    """JSON Lines text of a file's records, each tagged with the file's name (see output_name)"""
+    return "".join(json.dumps(dict({'file': name}, **record), ensure_ascii=False) + "\n"
+                   for record in records)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Full-text search over the PDF Batch Processor outputs
+
+Batch runs keep a local SQLite FTS5 index (~/.pdf_batch_processor/search.sqlite)
+of every _CLEANED.txt they write, one row per encounter section (text
+outside the sections, such as a preamble or a whole file without encounter
+markers, gets rows of its own), so finding every patient with a given
+diagnosis is a query instead of a grep over thousands of files:
+
+    python pdf_batch_processor.py search "סוכרת" [--section אבחנות] [--folder ננ449]
+
+Hebrew handling: niqqud and cantillation marks are removed (FTS5's unicode61
+tokenizer does not fold them), and every word that starts with a one-letter
+prefix (ו, ה, ב, כ, ל, מ, ש) is also indexed without it, so "סוכרת" finds
+"בסוכרת" and "והסוכרת".
+
+Updates are incremental: a file whose content hash is unchanged is skipped,
+and new or changed files are inserted in batches, one transaction each.
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+
+from pdf_batch_stats import STATS_DIR
+from pdf_batch_records import encounter_records
+
+SEARCH_DB_PATH = os.path.join(STATS_DIR, "search.sqlite")
+SEARCH_BATCH = 50        # files per transaction
+DEFAULT_SEARCH_LIMIT = 20
+
+# Niqqud and cantillation (not the maqaf, which separates words)
+HEBREW_MARKS = re.compile('[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7]')
+HEBREW_WORD = re.compile('[\u05D0-\u05EA]+')
+PREFIX_LETTERS = "ובכלמשה"
+MIN_STEM = 2             # letters left after removing prefixes
+ROWID_BITS = 20          # a file's sections get rowids file_id << ROWID_BITS + n (a cheap range delete)
+ROWS_VERSION = 2         # part of each file's hash: bumped when section_rows changes, so files are reindexed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    folder TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    indexed REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS sections USING fts5(
+    body, bare,
+    file_id UNINDEXED, folder UNINDEXED, encounter UNINDEXED, section UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+class SearchUnavailable(Exception):
+    """SQLite was built without FTS5"""
+
+
+def normalize_hebrew(text):
+    """Text without niqqud / cantillation marks, maqaf as a space"""
+    return HEBREW_MARKS.sub('', text).replace('\u05BE', ' ')
+
+
+def bare_words(text):
+    """Hebrew words of a (normalized) text with their one-letter prefixes removed, space-separated"""
+    stems = []
+    for word in HEBREW_WORD.findall(text):
+        stem = word
+        while len(stem) > MIN_STEM and stem[0] in PREFIX_LETTERS:
+            stem = stem[1:]
+            stems.append(stem)
+    return " ".join(stems)
+
+
+def content_hash(text):
+    return hashlib.blake2b(f"{ROWS_VERSION}\n{text}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+def section_rows(text):
+    """
+    (encounter, section, body) for every section of a cleaned text. Text
+    outside the sections gets a row without a section: the preamble before
+    the first encounter (the whole text when it has no encounter markers)
+    with an empty encounter, and each encounter's lines above its first section.
+    """
+    rows = []
+    records = encounter_records(text, [], [])
+    preamble = text[:records[0]['start']] if records else text
+    if preamble.strip():
+        rows.append(("", None, preamble.strip()))
+    for record in records:
+        head_end = record['sections'][0]['start'] if record['sections'] else record['end']
+        head = text[record['start']:head_end].strip()
+        if head:
+            rows.append((record['encounter'], None, head))
+        for section in record['sections']:
+            rows.append((record['encounter'], section['name'], section['text']))
+    return rows
+
+
+def match_expression(query):
+    """FTS5 MATCH expression for a free-text query: every word must appear (word* = prefix)"""
+    terms = []
+    for word in normalize_hebrew(query).split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+
+def connect(path=SEARCH_DB_PATH):
+    """Open (creating if needed) the search database"""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path, check_same_thread=False)
+    try:
+        db.executescript(SCHEMA)
+    except sqlite3.OperationalError as e:
+        db.close()
+        raise SearchUnavailable(f"SQLite FTS5 is not available: {str(e)}")
+    return db
+
+
+class SearchIndex:
+    """
+    Incremental writer used by the batch run: add() queues a written output,
+    and every SEARCH_BATCH files (and on close()) the queue is written in one
+    transaction. Safe to flush from a worker thread.
+    """
+
+    def __init__(self, path=SEARCH_DB_PATH):
+        self.db = connect(path)
+        self.pending = []
+        self.indexed = 0
+        self.unchanged = 0
+        self._lock = threading.Lock()          # one writer at a time
+        self._pending_lock = threading.Lock()
+
+    def add(self, path, folder, text):
+        """Queue an output file; returns True when a batch is ready to flush"""
+        with self._pending_lock:
+            self.pending.append((os.path.abspath(path), folder, text))
+            return len(self.pending) >= SEARCH_BATCH
+
+    def flush(self):
+        """Index the queued files whose content changed, in one transaction"""
+        with self._lock:
+            with self._pending_lock:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return
+            with self.db:
+                for path, folder, text in batch:
+                    digest = content_hash(text)
+                    row = self.db.execute("SELECT id, hash, folder FROM files WHERE path = ?", (path,)).fetchone()
+                    if row and row[1] == digest and row[2] == folder:
+                        self.unchanged += 1
+                        continue
+                    if row:
+                        file_id = row[0]
+                        self.db.execute("DELETE FROM sections WHERE rowid BETWEEN ? AND ?",
+                                        (file_id << ROWID_BITS, ((file_id + 1) << ROWID_BITS) - 1))
+                        self.db.execute("UPDATE files SET folder = ?, hash = ?, indexed = ? WHERE id = ?",
+                                        (folder, digest, time.time(), file_id))
+                    else:
+                        file_id = self.db.execute(
+                            "INSERT INTO files (path, folder, hash, indexed) VALUES (?, ?, ?, ?)",
+                            (path, folder, digest, time.time())).lastrowid
+                    rows = []
+                    for n, (encounter, section, body) in enumerate(section_rows(text)[:1 << ROWID_BITS]):
+                        body = normalize_hebrew(body)
+                        rows.append(((file_id << ROWID_BITS) + n, body, bare_words(body), file_id, folder,
+                                     encounter, section))
+                    self.db.executemany(
+                        "INSERT INTO sections (rowid, body, bare, file_id, folder, encounter, section) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                    self.indexed += 1
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.db.close()
+
+
+def search(query, section=None, folder=None, limit=DEFAULT_SEARCH_LIMIT, path=SEARCH_DB_PATH):
+    """
+    Search the index. Returns a list of
+    { 'folder', 'path', 'encounter', 'section', 'snippet' }, best matches first
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+    sql = ("SELECT sections.folder, files.path, encounter, section, "
+           "snippet(sections, 0, '[', ']', '…', 12) "
+           "FROM sections JOIN files ON files.id = sections.file_id "
+           "WHERE sections MATCH ?")
+    params = [expression]
+    if section:
+        sql += " AND section = ?"
+        params.append(section)
+    if folder:
+        sql += " AND sections.folder LIKE ?"
+        params.append(folder + '%')
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    db = connect(path)
+    try:
+        rows = db.execute(sql, params).fetchall()
+    finally:
+        db.close()
+    return [{'folder': row[0], 'path': row[1], 'encounter': row[2], 'section': row[3], 'snippet': row[4]}
+            for row in rows]
+
+
+def main(argv=None):
+    """search subcommand of pdf_batch_processor"""
+    parser = argparse.ArgumentParser(prog="pdf_batch_processor.py search",
+                                     description="Search the encounters of all processed outputs")
+    parser.add_argument('query', help="Words that must all appear (word* for a prefix)")
+    parser.add_argument('--section', help="Only this section (e.g. אבחנות)")
+    parser.add_argument('--folder', help="Only folders starting with this name")
+    parser.add_argument('--limit', type=int, default=DEFAULT_SEARCH_LIMIT,
+                        help=f"Maximum hits (default: {DEFAULT_SEARCH_LIMIT})")
+    parser.add_argument('--db', default=SEARCH_DB_PATH, help=f"Index file (default: {SEARCH_DB_PATH})")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"❌ No search index yet ({args.db}); run a batch first")
+        sys.exit(1)
+    start = time.perf_counter()
+    try:
+        hits = search(args.query, section=args.section, folder=args.folder, limit=args.limit, path=args.db)
+    except (SearchUnavailable, sqlite3.Error) as e:
+        print(f"❌ Search failed: {str(e)}")
+        sys.exit(1)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for hit in hits:
+        where = "".join(f" · {part}" for part in (hit['encounter'], hit['section']) if part)
+        print(f"📁 {hit['folder']}{where}")
+        print(f"   {' '.join(hit['snippet'].split())}")
+    print(f"\n🔍 {len(hits)} hit(s) in {elapsed_ms:.1f} ms")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-machine cost model for the PDF Batch Processor
+
+Records how long each PDF took to process (together with its page count and
+size) in a local stats file, and uses the history to predict job durations
+for ETA display and scheduling.
+"""
+
+import os
+import json
+import socket
+import tempfile
+
+STATS_DIR = os.path.join(os.path.expanduser("~"), ".pdf_batch_processor")
+STATS_PATH = os.path.join(STATS_DIR, "stats.json")
+
+# Used until the machine has some history
+DEFAULT_SECONDS_PER_PAGE = 0.25
+DEFAULT_SECONDS_PER_MB = 2.0
+
+# Older samples fade out so the model follows hardware/library changes
+DECAY = 0.98
+
+SUM_KEYS = ('files', 'pages', 'mb', 'seconds', 'pp', 'pm', 'mm', 'tp', 'tm')
+
+
+def machine_key():
+    """Identify this machine in the stats file"""
+    return f"{socket.gethostname()}/{os.cpu_count() or 1}cpu"
+
+
+def format_eta(seconds):
+    """Format seconds as H:MM:SS or M:SS"""
+    seconds = max(0, int(round(seconds)))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+class CostModel:
+    """
+    Least-squares fit of  seconds = a * pages + b * MB  over decayed running sums.
+    Falls back to plain seconds-per-page / seconds-per-MB ratios when the fit
+    is ill-conditioned, and to defaults when there is no history.
+    """
+
+    def __init__(self, path=STATS_PATH, machine=None):
+        self.path = path
+        self.machine = machine or machine_key()
+        self.sums = dict.fromkeys(SUM_KEYS, 0.0)
+        self.load()
+
+    def load(self):
+        """Load this machine's sums from the stats file (missing/corrupt file = no history)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            stored = data.get('machines', {}).get(self.machine, {})
+            for key in SUM_KEYS:
+                self.sums[key] = float(stored.get(key, 0.0))
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        """Merge this machine's sums into the stats file (atomic replace)"""
+        data = {'machines': {}}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            pass
+        data.setdefault('machines', {})[self.machine] = self.sums
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def record(self, pages, size_bytes, seconds):
+        """Add one processed file to the history"""
+        mb = size_bytes / (1024 * 1024)
+        for key in SUM_KEYS:
+            self.sums[key] *= DECAY
+        s = self.sums
+        s['files'] += 1
+        s['pages'] += pages
+        s['mb'] += mb
+        s['seconds'] += seconds
+        s['pp'] += pages * pages
+        s['pm'] += pages * mb
+        s['mm'] += mb * mb
+        s['tp'] += seconds * pages
+        s['tm'] += seconds * mb
+
+    @property
+    def seconds_per_page(self):
+        if self.sums['pages'] > 0:
+            return self.sums['seconds'] / self.sums['pages']
+        return DEFAULT_SECONDS_PER_PAGE
+
+    @property
+    def seconds_per_mb(self):
+        if self.sums['mb'] > 0:
+            return self.sums['seconds'] / self.sums['mb']
+        return DEFAULT_SECONDS_PER_MB
+
+    def coefficients(self):
+        """Return (seconds per page, seconds per MB) of the joint fit, or None"""
+        s = self.sums
+        if s['files'] < 3:
+            return None
+        det = s['pp'] * s['mm'] - s['pm'] * s['pm']
+        if det <= 1e-9 * max(1.0, s['pp'] * s['mm']):
+            return None
+        a = (s['tp'] * s['mm'] - s['tm'] * s['pm']) / det
+        b = (s['tm'] * s['pp'] - s['tp'] * s['pm']) / det
+        if a < 0 or b < 0:
+            return None
+        return a, b
+
+    def predict(self, pages, size_bytes):
+        """Predict processing seconds for one file (pages may be None if unknown)"""
+        mb = size_bytes / (1024 * 1024)
+        if pages is None:
+            return self.seconds_per_mb * mb
+        coefficients = self.coefficients()
+        if coefficients:
+            a, b = coefficients
+            return a * pages + b * mb
+        return self.seconds_per_page * pages
+
+
+class EtaTracker:
+    """
+    Remaining-time estimate for a batch: predicted remaining work divided across
+    workers, scaled by how actual durations compared to predictions so far.
+    """
+
+    def __init__(self, predictions, workers=1):
+        self.remaining = dict(predictions)  # job key -> predicted seconds
+        self.workers = max(1, workers)
+        self.predicted_done = 0.0
+        self.actual_done = 0.0
+
+    def done(self, key, seconds):
+        """Mark a job finished, with its actual processing time"""
+        predicted = self.remaining.pop(key, None)
+        if predicted:
+            self.predicted_done += predicted
+            self.actual_done += seconds
+
+    def remaining_seconds(self):
+        scale = 1.0
+        if self.predicted_done > 0:
+            scale = min(10.0, max(0.1, self.actual_done / self.predicted_done))
+        return scale * sum(self.remaining.values()) / min(self.workers, max(1, len(self.remaining)))
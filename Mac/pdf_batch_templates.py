@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Automatic header/footer detection for the PDF Batch Processor
+
+Printout templates put the same boilerplate (hospital name, "confidential"
+banners, page numbers, print dates) at the top and bottom of every page.
+Instead of a hand-maintained regex per line, the first and last few lines
+of each page are hashed together with their distance from the page edge
+(with digits normalised, so "Page 3 of 40" matches "Page 12 of 40"), and
+lines that repeat on a large fraction of the pages are stripped from the
+page edges. A repeated line's numbers must be constant or count with the
+page, so a table row that sits at the same spot on every page is not
+mistaken for boilerplate. Encounter headers and section lines (a section
+header such as "אבחנות:" with whatever follows it on the line, and the
+first line under a header that stands alone) are never stripped, even
+when a clinic's notes repeat them near the page edge on every page.
+
+Stripping is opt-in (--strip-headers, or the GUI checkbox).
+
+Learned templates are cached per document source (the PDF's Creator /
+Producer metadata) in ~/.pdf_batch_processor/templates.json, so later
+files from the same source skip the learning step. Only line hashes are
+stored, never the text. A cached template that no longer matches the
+pages (the source changed its layout) is learned again.
+"""
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+from collections import Counter
+
+from pdf_batch_stats import STATS_DIR
+
+TEMPLATES_PATH = os.path.join(STATS_DIR, "templates.json")
+
+EDGE_LINES = 3            # lines at the top and bottom of each page considered
+MIN_PAGES = 4             # pages needed to learn a template
+REPEAT_FRACTION = 0.5     # a line is boilerplate if it is on at least this fraction of pages
+MIN_TEMPLATE_HITS = 0.5   # a cached template must match at least this fraction of pages
+NUMBER_AGREEMENT = 0.8    # share of pages on which a repeated line's numbers must be constant/counting
+
+# Encounter headers can open many pages; they are structure, never boilerplate
+PROTECTED_LINE = re.compile(r'\d{3}/\d+\s+מפגש')
+
+# Section headers in the raw page text, as clean_pdf_text finds them (the
+# SECTION_NAMES of pdf_batch_records): a line holding one is clinical content
+SECTION_HEADER = re.compile(r'(אנמנזה|ממצאים|אבחנות|דיון ותוכנית|הפניות|תרופות במפגש)\s*:?')
+BARE_SECTION_HEADER = re.compile(r'^\s*(אנמנזה|ממצאים|אבחנות|דיון ותוכנית|הפניות|תרופות במפגש)\s*:?\s*$')
+
+
+def protected(lines, i):
+    """
+    True if line i of a page is never boilerplate: an encounter header, a
+    section line, or the first line under a section header that stands alone
+    """
+    line = lines[i]
+    if PROTECTED_LINE.search(line) or SECTION_HEADER.search(line):
+        return True
+    return i > 0 and bool(BARE_SECTION_HEADER.match(lines[i - 1]))
+
+
+def line_key(line, position):
+    """
+    Hash of an edge line (position: 0, 1, .. from the top or -1, -2, .. from
+    the bottom) with whitespace collapsed and digit runs replaced.
+    None for blank lines.
+    """
+    normalized = re.sub(r'\d+', '#', ' '.join(line.split()))
+    if not normalized:
+        return None
+    return hashlib.blake2b(f"{position}|{normalized}".encode('utf-8'), digest_size=8).hexdigest()
+
+
+def edge_keys(lines, edge=EDGE_LINES):
+    """
+    Keys of a page's edge lines: (top keys, bottom keys), each ordered from
+    the page edge inwards. None for blank and protected lines.
+    """
+    top_count = min(edge, (len(lines) + 1) // 2)
+    bottom_count = min(edge, len(lines) - top_count)
+    top = [None if protected(lines, i) else line_key(lines[i], i) for i in range(top_count)]
+    bottom = [None if protected(lines, len(lines) - 1 - i) else line_key(lines[-1 - i], -1 - i)
+              for i in range(bottom_count)]
+    return top, bottom
+
+
+def numbers_consistent(occurrences):
+    """
+    True if every number in a repeated line is, on most of its pages, either
+    the same everywhere (a print date) or counting with the page (a page
+    number; a repeated page keeps its old number). Numbers that vary any
+    other way (lab values in a row at a fixed position) are content.
+    occurrences: list of (page index, line text)
+    """
+    numbers = [(page, [int(n) for n in re.findall(r'\d+', text)]) for page, text in occurrences]
+    needed = NUMBER_AGREEMENT * len(numbers)
+    for column in range(len(numbers[0][1])):
+        values = [(page, nums[column]) for page, nums in numbers if column < len(nums)]
+        constant = Counter(value for _, value in values).most_common(1)[0][1]
+        counting = Counter(value - page for page, value in values).most_common(1)[0][1]
+        if max(constant, counting) < needed:
+            return False
+    return True
+
+
+def learn_boilerplate(pages, keys):
+    """Keys of edge lines repeated on enough pages (see numbers_consistent)"""
+    if len(pages) < MIN_PAGES:
+        return set()
+    occurrences = {}
+    for page, (lines, (top, bottom)) in enumerate(zip(pages, keys)):
+        edge = [(key, lines[i]) for i, key in enumerate(top)]
+        edge += [(key, lines[-1 - i]) for i, key in enumerate(bottom)]
+        for key, text in edge:
+            if key:
+                occurrences.setdefault(key, {}).setdefault(page, text)
+    needed = max(2, REPEAT_FRACTION * len(pages))
+    return {key for key, found in occurrences.items()
+            if len(found) >= needed and numbers_consistent(sorted(found.items()))}
+
+
+def edge_run(keys, boilerplate):
+    """Number of lines from the edge inwards that are all boilerplate"""
+    count = 0
+    for key in keys:
+        if key not in boilerplate:
+            break
+        count += 1
+    return count
+
+
+def strip_boilerplate(page_texts, boilerplate=None):
+    """
+    Remove repeated header/footer lines from page texts (only runs of
+    boilerplate lines starting at the top or bottom edge of a page).
+    boilerplate: set of line keys to strip; learned from these pages when None
+    Returns (page texts, boilerplate keys, pages with at least one stripped line,
+             number of lines stripped)
+    """
+    pages = [text.split('\n') if text else [] for text in page_texts]
+    keys = [edge_keys(lines) for lines in pages]
+
+    if boilerplate is None:
+        boilerplate = learn_boilerplate(pages, keys)
+
+    stripped_texts = []
+    pages_hit = 0
+    lines_stripped = 0
+    for lines, (top, bottom) in zip(pages, keys):
+        head = edge_run(top, boilerplate)
+        tail = edge_run(bottom, boilerplate)
+        # A page that would be left without any text is content, not a template
+        if (head or tail) and any(line.strip() for line in lines[head:len(lines) - tail]):
+            pages_hit += 1
+            lines_stripped += head + tail
+            lines = lines[head:len(lines) - tail]
+        stripped_texts.append('\n'.join(lines))
+    return stripped_texts, boilerplate, pages_hit, lines_stripped
+
+
+def remove_headers_footers(page_texts, source_key=None, templates=None):
+    """
+    Strip headers/footers using the cached template for source_key, learning
+    (or re-learning) it when there is none or it no longer matches.
+    templates: dict source_key -> list of line keys (see TemplateCache.entries)
+    Returns (page texts, learned template keys or None if the cached one was used,
+             number of lines stripped)
+    """
+    cached = (templates or {}).get(source_key) if source_key else None
+    if cached:
+        texts, _, pages_hit, stripped = strip_boilerplate(page_texts, set(cached))
+        if len(page_texts) < MIN_PAGES or pages_hit >= MIN_TEMPLATE_HITS * len(page_texts):
+            return texts, None, stripped
+    texts, boilerplate, _, stripped = strip_boilerplate(page_texts)
+    return texts, sorted(boilerplate), stripped
+
+
+class TemplateCache:
+    """Learned header/footer templates per document source (line hashes only)"""
+
+    def __init__(self, path=TEMPLATES_PATH):
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        self.load()
+
+    def load(self):
+        """Load cached templates (missing/corrupt file = none)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = dict(json.load(f).get('sources', {}))
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+
+    def update(self, source_key, keys):
+        """Remember the template learned for a source"""
+        if source_key and keys and self.entries.get(source_key) != keys:
+            self.entries[source_key] = keys
+            self.changed = True
+
+    def save(self):
+        """Write the templates file (atomic replace) if anything was learned"""
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'sources': self.entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self.changed = False
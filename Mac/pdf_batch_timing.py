@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-stage timing for the PDF Batch Processor
+
+With timings enabled (--timings, or the GUI checkbox), every stage of the
+extraction is measured with the monotonic clock (time.perf_counter):
+
+    triage       classifying the leading pages for scanned PDFs (PageTriage)
+    source       reading the document metadata (document_source)
+    open         opening the PDF and reading its page tree
+    page.parse   interpreting one page (per page)
+    page.text    building one page's text from its characters (per page)
+    headers      removing repeated headers/footers
+    dedupe       dropping repeated pages and encounters
+    cleanup      the regex cleanup (clean_pdf_text)
+    hebrew       fixing reversed Hebrew (reverse_hebrew_in_text)
+    records      building encounter records
+    read, write  reading PDFs / writing outputs (in the batch process)
+
+Spans are not kept individually: each stage keeps a count, a total, a
+maximum and a histogram over fixed buckets (HISTOGRAM_BOUNDS_MS), so a
+worker returns a small dict however many pages it parsed, and the batch
+merges them. Disabled, the stages go through NO_TIMINGS, whose spans do
+nothing.
+"""
+
+from bisect import bisect_left
+from contextlib import nullcontext
+from time import perf_counter
+
+# Bucket upper bounds in milliseconds; the last bucket is everything above
+HISTOGRAM_BOUNDS_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000, 10000, 30000)
+
+
+class _Span:
+    __slots__ = ('timings', 'stage', 'start')
+
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.stage, perf_counter() - self.start)
+
+
+class StageTimings:
+    """
+    Span statistics per stage: stage -> { 'count', 'total', 'max', 'buckets' }
+    (seconds; buckets counts spans per HISTOGRAM_BOUNDS_MS bucket)
+    """
+
+    def __init__(self, stages=None):
+        self.stages = stages if stages is not None else {}
+
+    def span(self, stage):
+        """Context manager timing one span of a stage"""
+        return _Span(self, stage)
+
+    def add(self, stage, seconds):
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {'count': 0, 'total': 0.0, 'max': 0.0,
+                                          'buckets': [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)}
+        entry['count'] += 1
+        entry['total'] += seconds
+        entry['max'] = max(entry['max'], seconds)
+        entry['buckets'][bisect_left(HISTOGRAM_BOUNDS_MS, seconds * 1000)] += 1
+
+    def merge(self, stages):
+        """Add the stages of another StageTimings (e.g. a worker's result)"""
+        for stage, other in stages.items():
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = {'count': other['count'], 'total': other['total'], 'max': other['max'],
+                                      'buckets': list(other['buckets'])}
+                continue
+            entry['count'] += other['count']
+            entry['total'] += other['total']
+            entry['max'] = max(entry['max'], other['max'])
+            entry['buckets'] = [a + b for a, b in zip(entry['buckets'], other['buckets'])]
+
+    def percentile(self, stage, fraction):
+        """Upper bound (seconds) of the bucket holding the given fraction of a stage's spans (at most the max)"""
+        entry = self.stages[stage]
+        wanted = fraction * entry['count']
+        seen = 0
+        for i, count in enumerate(entry['buckets']):
+            seen += count
+            if count and seen >= wanted:
+                if i < len(HISTOGRAM_BOUNDS_MS):
+                    return min(HISTOGRAM_BOUNDS_MS[i] / 1000, entry['max'])
+                return entry['max']
+        return entry['max']
+
+    def to_dict(self):
+        """JSON-ready statistics, in stage order"""
+        return {
+            stage: {'count': entry['count'], 'total': round(entry['total'], 6),
+                    'mean': round(entry['total'] / entry['count'], 6), 'max': round(entry['max'], 6),
+                    'p50': round(self.percentile(stage, 0.5), 6), 'p95': round(self.percentile(stage, 0.95), 6),
+                    'histogram_ms': dict(zip([f"<={b}" for b in HISTOGRAM_BOUNDS_MS] + ["more"], entry['buckets']))}
+            for stage, entry in sorted(self.stages.items(), key=lambda item: stage_order(item[0]))
+        }
+
+
+class _NoTimings:
+    """Timings disabled: spans are a shared no-op context manager"""
+
+    _null = nullcontext()
+
+    def span(self, stage):
+        return self._null
+
+    def add(self, stage, seconds):
+        pass
+
+
+NO_TIMINGS = _NoTimings()
+
+STAGE_ORDER = ('read', 'triage', 'source', 'open', 'page.parse', 'page.text', 'headers', 'dedupe',
+               'cleanup', 'hebrew', 'records', 'write')
+
+
+def stage_order(stage):
+    return (STAGE_ORDER.index(stage) if stage in STAGE_ORDER else len(STAGE_ORDER), stage)
+
+
+def format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def report_lines(stats):
+    """Text table of StageTimings.to_dict() statistics (for the CLI summary and the GUI log)"""
+    lines = [f"   {'stage':<11} {'count':>7} {'total':>9} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}"]
+    for stage, entry in stats.items():
+        lines.append(f"   {stage:<11} {entry['count']:>7,} {format_seconds(entry['total']):>9} "
+                     f"{format_seconds(entry['mean']):>9} {format_seconds(entry['p50']):>9} "
+                     f"{format_seconds(entry['p95']):>9} {format_seconds(entry['max']):>9}")
+    return lines
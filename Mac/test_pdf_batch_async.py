@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the batch orchestrator's success and failure counting (pdf_batch_async)"""
+
+import os
+import asyncio
+
+from conftest import write_pdf, encounter_page
+from pdf_batch_async import BatchOrchestrator
+
+
+def folder_with_pdf(root, name, pages, pdf_name=None):
+    folder = root / name
+    folder.mkdir()
+    write_pdf(folder / (pdf_name or f"{name}.pdf"), pages)
+    return folder
+
+
+def run(root, names=None, pdf_names=None, **options):
+    orchestrator = BatchOrchestrator(str(root), manifest=False, search_index=False, **options)
+    return asyncio.run(orchestrator.run(names=names, pdf_names=pdf_names))
+
+
+def page(n):
+    return encounter_page(f"100/{n}", f"0{n}/01/2020", "שפעת")
+
+
+def test_groups_count_as_failed_only_when_nothing_was_written(tmp_path):
+    folder_with_pdf(tmp_path, "אב123", [page(1), page(2)])
+    broken = tmp_path / "גד456"
+    broken.mkdir()
+    (broken / "גד456.pdf").write_bytes(b"not a pdf")
+    (tmp_path / "זח111").mkdir()  # no PDF at all
+    # A split group with one broken part still writes the other one
+    folder_with_pdf(tmp_path, "כל555א", [page(3)])
+    (tmp_path / "כל555ב").mkdir()
+    (tmp_path / "כל555ב" / "כל555ב.pdf").write_bytes(b"not a pdf either")
+
+    summary = run(tmp_path)
+    assert (summary['total'], summary['success'], summary['failed']) == (4, 2, 2)
+    assert sorted(os.path.basename(f['path']) for f in summary['failed_files']) == sorted(["גד456.pdf", "כל555ב.pdf"])
+    assert os.path.exists(tmp_path / "אב123" / "אב123_CLEANED.txt")
+    assert os.path.exists(tmp_path / "כל555א" / "כל555א_CLEANED.txt")
+
+
+def test_a_group_whose_output_cannot_be_written_failed(tmp_path):
+    folder = folder_with_pdf(tmp_path, "אב123", [page(1)])
+    (folder / "אב123_CLEANED.txt").mkdir()  # in the way of the output file
+    summary = run(tmp_path, workers=2)
+    assert (summary['success'], summary['failed']) == (0, 1)
+
+
+def test_pdf_names_pick_a_pdf_not_named_after_its_folder(tmp_path):
+    folder_with_pdf(tmp_path, "אב123", [page(1)], pdf_name="scan_2020.pdf")
+    assert run(tmp_path)['success'] == 0
+    summary = run(tmp_path, names=["אב123"], pdf_names={"אב123": "scan_2020.pdf"})
+    assert (summary['success'], summary['failed']) == (1, 0)
+    assert os.path.exists(tmp_path / "אב123" / "אב123_CLEANED.txt")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for output compression (pdf_batch_codec)"""
+
+import os
+
+import pytest
+
+from pdf_batch_codec import (
+    available_codecs,
+    codec_path,
+    find_output,
+    open_text,
+    read_text,
+    remove_other_codecs,
+    write_text,
+    check_codec,
+)
+
+TEXT = "=== START - 123/45 שגפמ ===\n08/02/2020\n\n**:הזנמנא**\nשאר באכ\n"
+
+
+@pytest.mark.parametrize('codec', available_codecs())
+def test_round_trip(tmp_path, codec):
+    path = codec_path(str(tmp_path / "x_CLEANED.txt"), codec)
+    write_text(path, TEXT, codec)
+    assert read_text(path) == TEXT
+    assert find_output(str(tmp_path / "x_CLEANED.txt")) == path
+
+
+def test_plain_output_is_written_with_lf_newlines(tmp_path):
+    # Offsets (index sidecars, JSONL records) are computed from the '\n' text
+    path = str(tmp_path / "x_CLEANED.txt")
+    with open_text(path, 'w', 'none') as f:
+        f.write(TEXT)
+    with open(path, 'rb') as f:
+        assert f.read() == TEXT.encode('utf-8')
+
+
+def test_other_codecs_are_removed(tmp_path):
+    base = str(tmp_path / "x_CLEANED.txt")
+    write_text(base, TEXT, 'none')
+    open(base + ".idx", 'wb').close()
+    write_text(base + ".gz", TEXT, 'gzip')
+    remove_other_codecs(base, 'gzip')
+    assert sorted(os.listdir(tmp_path)) == ["x_CLEANED.txt.gz"]
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        check_codec('brotli')
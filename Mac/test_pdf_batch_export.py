@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the SQLite export of a processed batch (pdf_batch_export)"""
+
+import os
+import asyncio
+import sqlite3
+
+from conftest import write_pdf, encounter_page
+from pdf_batch_async import BatchOrchestrator
+from pdf_batch_export import export_batch
+
+
+def processed_batch(root):
+    for name, count in (("אב123", 2), ("גד456", 3)):
+        (root / name).mkdir()
+        write_pdf(root / name / f"{name}.pdf",
+                  [encounter_page(f"100/{n}", f"0{n}/01/2020", "שפעת") for n in range(1, count + 1)])
+    summary = asyncio.run(BatchOrchestrator(str(root), manifest=False, search_index=False).run())
+    assert summary['success'] == 2
+
+
+def test_export_loads_the_batch_and_reruns_incrementally(tmp_path):
+    root = tmp_path / "batch"
+    root.mkdir()
+    processed_batch(root)
+    path = str(tmp_path / "export.sqlite")
+
+    stats = export_batch(str(root), path)
+    assert (stats['patients'], stats['parts'], stats['exported'], stats['encounters']) == (2, 2, 2, 5)
+    db = sqlite3.connect(path)
+    rows = db.execute("SELECT p.base, e.encounter, e.date FROM encounters e JOIN parts t ON e.part_id = t.id "
+                      "JOIN patients p ON t.patient_id = p.id ORDER BY e.id").fetchall()
+    db.close()
+    assert rows[0] == ("אב123", "100/1", "2020-01-01")
+    assert [row[1] for row in rows] == ["100/1", "100/2", "100/1", "100/2", "100/3"]
+
+    stats = export_batch(str(root), path)
+    assert (stats['exported'], stats['unchanged'], stats['removed']) == (0, 2, 0)
+
+    output = root / "גד456" / "גד456_CLEANED.txt"
+    text = output.read_text(encoding='utf-8')
+    output.write_text(text[:text.rindex("100/3")], encoding='utf-8')
+    os.remove(root / "אב123" / "אב123_CLEANED.txt")
+    stats = export_batch(str(root), path)
+    assert (stats['exported'], stats['unchanged'], stats['removed']) == (1, 0, 1)
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT COUNT(*) FROM parts").fetchone()[0] == 1
+    assert db.execute("SELECT COUNT(*) FROM encounters").fetchone()[0] == 2
+    db.close()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the offset index sidecars (pdf_batch_index)"""
+
+import pytest
+
+from pdf_batch_processor import clean_pdf_text, reverse_hebrew_in_text, join_pages
+from pdf_batch_outputs import write_output
+from pdf_batch_merge import split_encounters
+from pdf_batch_index import EncounterIndex, IndexUnavailable, index_text, index_file, index_path
+
+PAGES = [
+    "123/45 מפגש\n08/02/2020\nאנמנזה: כאב ראש\nממצאים: תקין\n",
+    "124/46 מפגש\n15/03/2020\nאבחנות: שפעת\nדיון ותוכנית: מעקב\n",
+]
+
+
+@pytest.fixture
+def output(tmp_path):
+    """A cleaned output written the way the batch writes it, with its sidecar"""
+    text = reverse_hebrew_in_text(clean_pdf_text(join_pages(PAGES)))
+    path = str(tmp_path / "x_CLEANED.txt")
+    write_output(path, text)
+    index_text(path, text)
+    return path, text
+
+
+def test_write_index_read_back(output):
+    path, text = output
+    with EncounterIndex(path) as index:
+        assert index.ids == ["123/45", "124/46"]
+        _, blocks = split_encounters(text)
+        assert index.encounter("123/45") == blocks[0].strip()
+        assert index.encounter(1) == blocks[1].strip()
+        assert index.sections("124/46") == {
+            'אבחנות': reverse_hebrew_in_text("שפעת"),
+            'דיון ותוכנית': reverse_hebrew_in_text("מעקב"),
+        }
+
+
+def test_index_from_disk_matches_index_from_text(output):
+    path, _ = output
+    with open(index_path(path), 'rb') as f:
+        from_text = f.read()
+    index_file(path)
+    with open(index_path(path), 'rb') as f:
+        assert f.read() == from_text
+
+
+def test_stale_index_is_refused(output):
+    path, text = output
+    write_output(path, text + "\nתוספת")
+    with pytest.raises(IndexUnavailable):
+        EncounterIndex(path)
+
+
+def test_missing_index(tmp_path):
+    with pytest.raises(IndexUnavailable):
+        EncounterIndex(str(tmp_path / "none_CLEANED.txt"))
+
+
+def test_unknown_encounter(output):
+    path, _ = output
+    with EncounterIndex(path) as index:
+        with pytest.raises(KeyError):
+            index.encounter("999/1")
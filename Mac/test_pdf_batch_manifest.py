@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the batch manifest (pdf_batch_manifest)"""
+
+import asyncio
+
+from conftest import write_pdf, encounter_page
+from pdf_batch_async import BatchOrchestrator
+from pdf_batch_manifest import load_manifest, bytes_hash, BATCH_MANIFEST_NAME
+
+
+def run_batch(root):
+    asyncio.run(BatchOrchestrator(str(root), search_index=False).run())
+    return {group['base']: group for group in load_manifest(str(root / BATCH_MANIFEST_NAME))['groups']}
+
+
+def test_manifest_records_inputs_outputs_and_statuses(tmp_path):
+    for name in ("אב123", "כל555א", "כל555ב", "סע777"):
+        (tmp_path / name).mkdir()
+    pdf = write_pdf(tmp_path / "אב123" / "אב123.pdf", [encounter_page("100/1", "01/01/2020", "שפעת")])
+    write_pdf(tmp_path / "כל555א" / "כל555א.pdf", [encounter_page("100/2", "02/01/2020", "שפעת")])
+    (tmp_path / "כל555ב" / "כל555ב.pdf").write_bytes(b"not a pdf")
+    write_pdf(tmp_path / "סע777" / "סע777.pdf", [None, None])
+
+    groups = run_batch(tmp_path)
+    assert {base: group['status'] for base, group in groups.items()} == {
+        "אב123": 'ok', "כל555": 'partial', "סע777": 'failed'}
+    entry, = groups["אב123"]['files']
+    assert (entry['status'], entry['pages']) == ('ok', 1)
+    with open(pdf, 'rb') as f:
+        assert entry['input']['hash'] == bytes_hash(f.read())
+    output, = entry['outputs']
+    with open(output['path'], 'rb') as f:
+        assert output['hash'] == bytes_hash(f.read())
+    assert output['written']
+    assert [(f['label'], f['status']) for f in groups["כל555"]['files']] == [("כל555א", 'ok'), ("כל555ב", 'failed')]
+    assert groups["כל555"]['files'][1]['reason']
+    assert groups["סע777"]['files'][0]['status'] == 'needs_ocr'
+
+    # A re-run leaves unchanged outputs untouched, and says so
+    groups = run_batch(tmp_path)
+    output, = groups["אב123"]['files'][0]['outputs']
+    assert not output['written']
+
+
+def test_unreadable_manifest_loads_as_none(tmp_path):
+    path = tmp_path / BATCH_MANIFEST_NAME
+    assert load_manifest(str(path)) is None
+    path.write_text("{ truncated", encoding='utf-8')
+    assert load_manifest(str(path)) is None
+    path.write_text('{"version": 0}', encoding='utf-8')
+    assert load_manifest(str(path)) is None
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for dedupe and split-group merging (pdf_batch_merge)"""
+
+from pdf_batch_processor import clean_pdf_text, reverse_hebrew_in_text, join_pages
+from pdf_batch_codec import read_text, write_text
+from pdf_batch_merge import (
+    EncounterDeduplicator,
+    MergeWriter,
+    merge_chronological,
+    split_encounters,
+    unique_pages,
+    encounter_date,
+)
+
+
+def encounter(number, date, diagnosis):
+    return f"{number} מפגש\n{date}\nאבחנות: {diagnosis}\n"
+
+
+def final_text(pages):
+    return reverse_hebrew_in_text(clean_pdf_text(join_pages(pages)))
+
+
+def test_unique_pages_keeps_first_occurrence_and_blank_pages():
+    pages = ["א  ב", "", "ג", "א ב", "", "ג\n"]
+    assert unique_pages(pages) == [0, 1, 2, 4]
+
+
+def test_deduplicator_drops_repeated_encounters_across_texts():
+    first = final_text([encounter("100/1", "01/01/2020", "שפעת"), encounter("100/2", "02/01/2020", "כאב")])
+    second = final_text([encounter("100/2", "02/01/2020", "כאב"), encounter("100/3", "03/01/2020", "חום")])
+    deduplicator = EncounterDeduplicator()
+    assert deduplicator.filter(first) == first
+    kept = deduplicator.filter(second)
+    assert deduplicator.removed == 1
+    _, blocks = split_encounters(kept)
+    assert len(blocks) == 1 and "100/3" in blocks[0]
+
+
+def test_merge_writer_joins_parts_with_a_blank_line(tmp_path):
+    path = str(tmp_path / "x_cleaned_merged.txt")
+    merger = MergeWriter(path)
+    merger.add("part one")
+    merger.add("part two")
+    assert merger.commit()
+    assert read_text(path) == "part one\n\npart two"
+
+
+def test_chronological_merge_interleaves_parts_by_date(tmp_path):
+    parts = [
+        [encounter("100/1", "01/01/2020", "שפעת"), encounter("100/3", "01/03/2020", "חום")],
+        [encounter("200/2", "01/02/2020", "כאב"), encounter("200/4", "01/04/2020", "מעקב")],
+    ]
+    paths = []
+    for n, pages in enumerate(parts):
+        paths.append(str(tmp_path / f"part{n}_CLEANED.txt"))
+        write_text(paths[-1], final_text(pages))
+    merged = str(tmp_path / "x_cleaned_merged.txt")
+    blocks, replaced = merge_chronological(paths, merged)
+    assert blocks == 4 and replaced
+    _, merged_blocks = split_encounters(read_text(merged))
+    assert [encounter_date(block) for block in merged_blocks] == [
+        (2020, 1, 1), (2020, 2, 1), (2020, 3, 1), (2020, 4, 1)]
+
+
+def test_chronological_merge_drops_overlap(tmp_path):
+    shared = encounter("100/2", "01/02/2020", "כאב")
+    paths = []
+    for n, pages in enumerate([[encounter("100/1", "01/01/2020", "שפעת"), shared],
+                               [shared, encounter("100/3", "01/03/2020", "חום")]]):
+        paths.append(str(tmp_path / f"part{n}_CLEANED.txt"))
+        write_text(paths[-1], final_text(pages))
+    deduplicator = EncounterDeduplicator()
+    blocks, _ = merge_chronological(paths, str(tmp_path / "x_cleaned_merged.txt"), deduplicator)
+    assert blocks == 3
+    assert deduplicator.removed == 1
+
+
+def test_deduplicator_keyed_by_part_keeps_repeats_within_a_part():
+    repeated = encounter("100/1", "01/01/2020", "שפעת")
+    first = final_text([repeated, encounter("100/2", "02/01/2020", "כאב"), repeated])
+    second = final_text([repeated, encounter("100/3", "03/01/2020", "חום")])
+    deduplicator = EncounterDeduplicator()
+    assert deduplicator.filter(first, part=0) == first
+    _, blocks = split_encounters(deduplicator.filter(second, part=1))
+    assert deduplicator.removed == 1
+    assert len(blocks) == 1 and "100/3" in blocks[0]
+    # Without parts every repeat is dropped (dedupe within one PDF)
+    assert len(split_encounters(EncounterDeduplicator().filter(first))[1]) == 2
+
+
+def test_part_pages_dropped_only_when_first_seen_in_another_part():
+    deduplicator = EncounterDeduplicator()
+    assert deduplicator.unique_pages(["א", "ב", "א", ""], 0) == [0, 1, 2, 3]
+    assert deduplicator.unique_pages(["ב ", "ג", "ג", ""], 1) == [1, 2, 3]
+    assert deduplicator.removed_pages == 1
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for atomic, skip-unchanged output writing (pdf_batch_outputs)"""
+
+import os
+
+from pdf_batch_outputs import OutputManifest, AtomicTextWriter, write_output
+
+
+def test_unchanged_output_is_not_rewritten(tmp_path):
+    manifest = OutputManifest(str(tmp_path / "outputs.json"))
+    path = str(tmp_path / "x_CLEANED.txt")
+    assert write_output(path, "שלום\n", manifest=manifest)
+    os.utime(path, ns=(0, 0))
+    assert not write_output(path, "שלום\n", manifest=manifest)
+    assert os.stat(path).st_mtime_ns == 0
+    assert write_output(path, "שלום עולם\n", manifest=manifest)
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == "שלום עולם\n"
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest_path = str(tmp_path / "outputs.json")
+    path = str(tmp_path / "x_CLEANED.txt")
+    manifest = OutputManifest(manifest_path)
+    write_output(path, "text", manifest=manifest)
+    manifest.save()
+    assert not write_output(path, "text", manifest=OutputManifest(manifest_path))
+
+
+def test_output_without_entry_is_compared_once(tmp_path):
+    path = str(tmp_path / "x_CLEANED.txt")
+    write_output(path, "text")
+    manifest = OutputManifest(str(tmp_path / "outputs.json"))
+    assert not write_output(path, "text", manifest=manifest)
+    assert manifest.entry(path) is not None
+
+
+def test_file_changed_on_disk_is_rewritten(tmp_path):
+    manifest = OutputManifest(str(tmp_path / "outputs.json"))
+    path = str(tmp_path / "x_CLEANED.txt")
+    write_output(path, "text", manifest=manifest)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("edited by hand")
+    assert write_output(path, "text", manifest=manifest)
+
+
+def test_discarded_writer_leaves_nothing(tmp_path):
+    writer = AtomicTextWriter(str(tmp_path / "x_CLEANED.txt"))
+    writer.write("partial")
+    writer.discard()
+    assert os.listdir(tmp_path) == []
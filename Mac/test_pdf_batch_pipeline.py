@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the read-ahead prefetcher (pdf_batch_pipeline)"""
+
+from pdf_batch_pipeline import Prefetcher
+
+
+def test_prefetcher_returns_every_file_within_a_small_budget(tmp_path):
+    paths = []
+    for n in range(5):
+        paths.append(str(tmp_path / f"{n}.pdf"))
+        with open(paths[-1], 'wb') as f:
+            f.write(bytes([n]) * (1000 * (n + 1)))
+    prefetcher = Prefetcher(paths, budget_bytes=1500, sizes={paths[0]: 1000})
+    try:
+        assert [prefetcher.get(path) for path in paths] == [bytes([n]) * (1000 * (n + 1)) for n in range(5)]
+    finally:
+        prefetcher.close()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for dry-run planning (pdf_batch_plan)"""
+
+import os
+import asyncio
+
+from conftest import write_pdf, encounter_page
+from pdf_batch_async import BatchOrchestrator
+from pdf_batch_plan import plan_batch
+
+
+def pages(count):
+    return [encounter_page(f"100/{n}", "01/01/2020", "שפעת") for n in range(count)]
+
+
+def bases(jobs):
+    return sorted(job['base'] for job in jobs)
+
+
+def test_plan_compares_the_tree_with_the_last_batch(tmp_path):
+    for name, count in (("אב123", 2), ("גד456", 3), ("הו789", 1)):
+        (tmp_path / name).mkdir()
+        write_pdf(tmp_path / name / f"{name}.pdf", pages(count))
+    (tmp_path / "זח111").mkdir()  # no PDF
+
+    plan = plan_batch(str(tmp_path), workers=2)
+    assert plan['manifest'] is None
+    assert bases(plan['process']) == ["אב123", "גד456", "הו789"] and plan['unchanged'] == []
+    assert bases(plan['missing']) == ["זח111"]
+    assert plan['pages'] == plan['changed_pages'] == 6
+    assert plan['seconds'] > 0
+
+    asyncio.run(BatchOrchestrator(str(tmp_path), search_index=False).run())
+    plan = plan_batch(str(tmp_path), workers=2)
+    assert plan['manifest'] and plan['process'] == []
+    assert bases(plan['unchanged']) == ["אב123", "גד456", "הו789"]
+    assert plan['changed_pages'] == 0 and plan['changed_seconds'] == 0
+
+    write_pdf(tmp_path / "אב123" / "אב123.pdf", pages(4))  # changed input
+    os.remove(tmp_path / "גד456" / "גד456_CLEANED.txt")      # output gone
+    plan = plan_batch(str(tmp_path), workers=2)
+    assert bases(plan['process']) == ["אב123", "גד456"] and bases(plan['unchanged']) == ["הו789"]
+    assert (plan['pages'], plan['changed_pages']) == (8, 7)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the prescan, scheduling, text extraction and triage (pdf_batch_processor)"""
+
+import os
+
+import pytest
+
+from conftest import write_pdf, encounter_page
+from pdf_batch_processor import (
+    probe_pdf,
+    estimated_pages,
+    build_job,
+    schedule_jobs,
+    simulate_makespan,
+    discover_groups,
+    extract_pages,
+    finish_pages,
+    extract_pdf_job,
+    triage_pdf,
+    PageTriage,
+    NeedsOCR,
+    EXTRACTION_BACKENDS,
+    ESTIMATED_BYTES_PER_PAGE,
+)
+
+
+def pages(count):
+    return [encounter_page(f"100/{n}", "01/01/2020", "שפעת") for n in range(count)]
+
+
+def test_probe_reads_the_page_count_without_parsing_pages(tmp_path):
+    path = write_pdf(tmp_path / "x.pdf", pages(7))
+    info = probe_pdf(path)
+    assert info['pages'] == 7
+    assert info['bytes'] == os.path.getsize(path)
+    assert info['mtime_ns'] == os.stat(path).st_mtime_ns
+
+
+def test_probe_of_a_broken_pdf_falls_back_to_its_size(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"%PDF-1.4\n" + b"x" * (3 * ESTIMATED_BYTES_PER_PAGE))
+    info = probe_pdf(str(path))
+    assert info['pages'] is None
+    assert estimated_pages(info) == 3
+    assert probe_pdf(str(tmp_path / "missing.pdf"))['bytes'] == 0
+
+
+def test_build_job_weighs_a_split_group_by_all_of_its_parts(tmp_path):
+    for suffix, count in (('א', 2), ('ב', 5)):
+        folder = tmp_path / f"כל555{suffix}"
+        folder.mkdir()
+        write_pdf(folder / f"כל555{suffix}.pdf", pages(count))
+    (tmp_path / "כל555מ").mkdir()  # mem-suffix folders are not part of the group
+    groups = discover_groups(str(tmp_path))
+    assert list(groups) == ["כל555"]
+    job = build_job("כל555", groups["כל555"])
+    assert [f['label'] for f in job['files']] == ["כל555א", "כל555ב"]
+    assert job['pages'] == job['weight'] == 7
+    assert job['merged'] == os.path.join(str(tmp_path), "כל555א", "כל555_cleaned_merged.txt")
+    assert job['missing'] == []
+
+
+class FixedCost:
+    def predict(self, pages, size_bytes):
+        return pages * 2.0
+
+
+def test_build_job_weighs_by_predicted_seconds_with_a_cost_model(tmp_path):
+    folder = tmp_path / "אב123"
+    folder.mkdir()
+    write_pdf(folder / "אב123.pdf", pages(3))
+    job = build_job("אב123", [{'path': str(folder), 'name': "אב123", 'suffix': None}], FixedCost())
+    assert job['predicted'] == job['weight'] == 6.0
+
+
+def test_missing_pdf_is_reported(tmp_path):
+    folder = tmp_path / "זח111"
+    folder.mkdir()
+    job = build_job("זח111", [{'path': str(folder), 'name': "זח111", 'suffix': None}])
+    assert job['files'] == [] and job['missing'] == ["זח111.pdf"]
+
+
+def test_largest_first_order_and_its_makespan():
+    jobs = [{'base': base, 'weight': weight} for base, weight in
+            (("אא001", 1), ("אא002", 1), ("אא003", 1), ("אא004", 1), ("אא005", 4))]
+    ordered = schedule_jobs(jobs)
+    assert [j['base'] for j in ordered] == ["אא005", "אא001", "אא002", "אא003", "אא004"]
+    # The large job last leaves one worker busy long after the others are done
+    assert simulate_makespan([j['weight'] for j in jobs], 2) == 6
+    assert simulate_makespan([j['weight'] for j in ordered], 2) == 4
+    assert simulate_makespan([], 3) == 0
+
+
+@pytest.mark.parametrize('text_only', [True, False])
+def test_fast_backend_gives_the_layout_backends_text(tmp_path, text_only):
+    path = write_pdf(tmp_path / "x.pdf", [
+        encounter_page("100/1", "01/01/2020", "שפעת") + ["Paracetamol 500 mg", "לחץ דם 120/80"],
+        None,
+        encounter_page("100/2", "02/01/2020", "כאב ראש") + ["ECG: normal (sinus)"],
+    ])
+    texts = {}
+    for backend in EXTRACTION_BACKENDS:
+        page_texts, page_count = extract_pages(path, backend, text_only)
+        assert page_count == 3
+        texts[backend] = finish_pages(page_texts)['text']
+    assert texts['fast'] == texts['layout']
+    assert "Paracetamol 500 mg" in texts['fast'] and "100/2" in texts['fast']
+
+
+def test_triage_tells_scans_from_text(tmp_path):
+    text = write_pdf(tmp_path / "text.pdf", pages(4))
+    scan = write_pdf(tmp_path / "scan.pdf", [None] * 4)
+    mixed = write_pdf(tmp_path / "mixed.pdf", [None] + pages(3))
+    assert triage_pdf(text)['kind'] == 'text'
+    assert triage_pdf(scan)['kind'] == 'image'
+    result = triage_pdf(mixed)
+    assert (result['kind'], result['text_pages'], result['image_pages']) == ('mixed', 3, 1)
+
+
+@pytest.mark.parametrize('backend', sorted(EXTRACTION_BACKENDS))
+@pytest.mark.parametrize('text_only', [True, False])
+def test_extraction_raises_needs_ocr_for_scans_only(tmp_path, backend, text_only):
+    scan = write_pdf(tmp_path / "scan.pdf", [None] * 5)
+    with pytest.raises(NeedsOCR) as error:
+        extract_pdf_job(scan, backend, text_only)
+    assert error.value.triage['image_pages'] == error.value.triage['sampled'] == 3
+    mixed = write_pdf(tmp_path / "mixed.pdf", [None] + pages(2))
+    result = extract_pdf_job(mixed, backend, text_only)
+    assert (result['kind'], result['pages']) == ('mixed', 3)
+
+
+def test_page_triage_stops_after_the_leading_pages():
+    triage = PageTriage(leading=2)
+    triage.start(10)
+    triage.add_page(0, 900, 1000)
+    assert triage.sampling
+    with pytest.raises(NeedsOCR):
+        triage.add_page(5, 900, 1000)
+    # A text page among the leading ones makes the PDF mixed, not a scan
+    triage = PageTriage(leading=2)
+    triage.start(10)
+    triage.add_page(0, 900, 1000)
+    triage.add_page(100, 0, 1000)
+    assert not triage.sampling and triage.result['kind'] == 'mixed'
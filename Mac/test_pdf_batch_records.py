@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for structured encounter records (pdf_batch_records)"""
+
+import json
+
+from pdf_batch_processor import clean_pdf_text, reverse_hebrew_in_text, join_pages
+from pdf_batch_records import encounter_records, records_jsonl, records_path, output_name, SECTION_MARKERS, SECTION_NAMES
+
+PAGES = [
+    "123/45 מפגש\n08/02/2020\nאנמנזה: כאב ראש\nממצאים: תקין\n",
+    "המשך ממצאים\n124/46 מפגש\n15/03/2020\nאבחנות: שפעת\n",
+    "125/47 מפגש\nדיון ותוכנית: מעקב\n",
+]
+
+
+def final_text(pages):
+    return reverse_hebrew_in_text(clean_pdf_text(join_pages(pages)))
+
+
+def test_offsets_point_into_the_text():
+    text = final_text(PAGES)
+    records = encounter_records(text, PAGES, [1, 2, 3])
+    assert [r['encounter'] for r in records] == ["123/45", "124/46", "125/47"]
+    for record in records:
+        block = text[record['start']:record['end']]
+        assert block == block.strip()
+        assert record['encounter'] in block
+        for section in record['sections']:
+            assert text[section['start']:section['end']] == section['text']
+    assert records[0]['sections'][0] == {
+        'name': 'אנמנזה', 'start': records[0]['sections'][0]['start'],
+        'end': records[0]['sections'][0]['end'], 'text': reverse_hebrew_in_text("כאב ראש")}
+
+
+def test_dates_and_pages():
+    records = encounter_records(final_text(PAGES), PAGES, [1, 2, 3])
+    assert [r['date'] for r in records] == ["2020-02-08", "2020-03-15", None]
+    # The first encounter continues on page 2, above the next header
+    assert [r['pages'] for r in records] == [[1, 2], [2, 2], [3, 3]]
+
+
+def test_jsonl_lines_are_tagged_with_the_file():
+    records = encounter_records(final_text(PAGES), PAGES, [1, 2, 3])
+    lines = records_jsonl(records, "ננ449א").splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[1])['file'] == "ננ449א"
+    assert records_path("/x/ננ449א_CLEANED.txt") == "/x/ננ449א_ENCOUNTERS.jsonl"
+
+
+def test_every_section_has_a_marker():
+    assert sorted(SECTION_MARKERS.values()) == sorted(SECTION_NAMES)
+
+
+def test_records_are_named_after_the_output():
+    # Split PDFs inside one folder: the label would be the PDF's file name
+    assert output_name("/x/ננ449/ננ449א_CLEANED.txt") == "ננ449א"
+    assert records_path("/x/ננ449/ננ449א_CLEANED.txt") == "/x/ננ449/ננ449א_ENCOUNTERS.jsonl"
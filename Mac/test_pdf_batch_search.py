@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the full-text search index (pdf_batch_search)"""
+
+import pytest
+
+from pdf_batch_processor import clean_pdf_text, reverse_hebrew_in_text, join_pages
+from pdf_batch_search import SearchIndex, SearchUnavailable, search, bare_words, normalize_hebrew
+
+PAGES = [
+    "123/45 מפגש\n08/02/2020\nאנמנזה: כאב ראש\nאבחנות: סוכרת\n",
+    "124/46 מפגש\n15/03/2020\nאבחנות: שפעת\n",
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "search.sqlite")
+    try:
+        SearchIndex(path).close()
+    except SearchUnavailable:
+        pytest.skip("SQLite without FTS5")
+    return path
+
+
+def final_text(pages):
+    return reverse_hebrew_in_text(clean_pdf_text(join_pages(pages)))
+
+
+def indexed(db_path, *outputs):
+    index = SearchIndex(db_path)
+    for path, folder, text in outputs:
+        index.add(path, folder, text)
+    index.close()
+    return index
+
+
+def test_search_by_section_and_folder(tmp_path, db_path):
+    text = final_text(PAGES)
+    indexed(db_path, (str(tmp_path / "ננ449" / "ננ449א_CLEANED.txt"), "ננ449", text))
+    word = reverse_hebrew_in_text("שפעת")
+    hits = search(word, path=db_path)
+    assert [(hit['encounter'], hit['section'], hit['folder']) for hit in hits] == [("124/46", "אבחנות", "ננ449")]
+    assert search(word, folder="ננ44", path=db_path)
+    assert not search(word, folder="בל1", path=db_path)
+    assert not search(word, section="אנמנזה", path=db_path)
+
+
+def test_unchanged_file_is_skipped_and_moved_file_reindexed(tmp_path, db_path):
+    path = str(tmp_path / "x_CLEANED.txt")
+    text = final_text(PAGES)
+    assert indexed(db_path, (path, "x", text)).indexed == 1
+    index = indexed(db_path, (path, "x", text))
+    assert (index.indexed, index.unchanged) == (0, 1)
+    assert indexed(db_path, (path, "y", text)).indexed == 1
+    assert search(reverse_hebrew_in_text("שפעת"), folder="y", path=db_path)
+
+
+def test_hebrew_prefixes_and_niqqud():
+    assert normalize_hebrew("שָׁלוֹם") == "שלום"
+    assert bare_words("והסוכרת") == "הסוכרת סוכרת"
+
+
+def test_text_outside_sections_is_searchable(tmp_path, db_path):
+    with_preamble = final_text(["סיכום מחלה ממוסד אחר\n"] + PAGES)
+    no_markers = final_text(["מכתב שחרור ללא מפגשים\nאבחנה: אסתמה\n"])
+    indexed(db_path, (str(tmp_path / "a_CLEANED.txt"), "a", with_preamble),
+            (str(tmp_path / "b_CLEANED.txt"), "b", no_markers))
+    hits = search(reverse_hebrew_in_text("ממוסד"), path=db_path)
+    assert [(hit['folder'], hit['encounter'], hit['section']) for hit in hits] == [("a", "", None)]
+    hits = search(reverse_hebrew_in_text("אסתמה"), path=db_path)
+    assert [(hit['folder'], hit['encounter'], hit['section']) for hit in hits] == [("b", "", None)]
+    # An encounter's date line, above its first section
+    hits = search("15/03/2020", path=db_path)
+    assert [(hit['encounter'], hit['section']) for hit in hits] == [("124/46", None)]
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the per-machine cost model and ETA (pdf_batch_stats)"""
+
+import json
+
+import pytest
+
+from pdf_batch_stats import CostModel, EtaTracker, format_eta, DEFAULT_SECONDS_PER_PAGE
+
+MB = 1024 * 1024
+
+
+def test_defaults_without_history(tmp_path):
+    model = CostModel(path=str(tmp_path / "stats.json"), machine="m")
+    assert model.coefficients() is None
+    assert model.predict(10, MB) == pytest.approx(10 * DEFAULT_SECONDS_PER_PAGE)
+
+
+def test_fit_recovers_page_and_size_costs(tmp_path):
+    model = CostModel(path=str(tmp_path / "stats.json"), machine="m")
+    for pages, mb in ((10, 1), (40, 2), (5, 8), (100, 3), (20, 20)):
+        model.record(pages, mb * MB, 0.1 * pages + 0.5 * mb)
+    a, b = model.coefficients()
+    assert a == pytest.approx(0.1) and b == pytest.approx(0.5)
+    assert model.predict(50, 4 * MB) == pytest.approx(7.0)
+    # Unknown page count: seconds per MB of the history
+    assert model.predict(None, 4 * MB) == pytest.approx(4 * model.seconds_per_mb)
+
+
+def test_history_is_saved_per_machine(tmp_path):
+    path = str(tmp_path / "stats" / "stats.json")
+    first = CostModel(path=path, machine="a")
+    first.record(10, MB, 2.0)
+    first.save()
+    other = CostModel(path=path, machine="b")
+    other.record(10, MB, 8.0)
+    other.save()
+    with open(path, encoding='utf-8') as f:
+        assert sorted(json.load(f)['machines']) == ["a", "b"]
+    assert CostModel(path=path, machine="a").seconds_per_page == pytest.approx(0.2)
+    assert CostModel(path=path, machine="b").seconds_per_page == pytest.approx(0.8)
+
+
+def test_corrupt_stats_file_means_no_history(tmp_path):
+    path = tmp_path / "stats.json"
+    path.write_text("{not json", encoding='utf-8')
+    assert CostModel(path=str(path), machine="m").sums['files'] == 0
+
+
+def test_eta_divides_work_and_follows_actual_durations():
+    eta = EtaTracker({'a': 10.0, 'b': 10.0, 'c': 20.0}, workers=2)
+    assert eta.remaining_seconds() == pytest.approx(20.0)
+    eta.done('a', 20.0)  # twice as slow as predicted
+    assert eta.remaining_seconds() == pytest.approx(2 * 30.0 / 2)
+    eta.done('b', 20.0)
+    # One job left: it cannot be split across workers
+    assert eta.remaining_seconds() == pytest.approx(2 * 20.0)
+    eta.done('c', 40.0)
+    assert eta.remaining_seconds() == 0
+
+
+def test_format_eta():
+    assert format_eta(59.6) == "1:00"
+    assert format_eta(3725) == "1:02:05"
+    assert format_eta(-5) == "0:00"
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for header/footer detection (pdf_batch_templates)"""
+
+from pdf_batch_templates import strip_boilerplate, remove_headers_footers, numbers_consistent, protected, MIN_PAGES
+from pdf_batch_records import SECTION_NAMES
+
+
+def page(n, body):
+    """A printout page: two header lines, the body, a page-number footer"""
+    return "\n".join(["בית חולים כללי", "סודי רפואי"] + body + [f"עמוד {n} מתוך 6"])
+
+
+def test_headers_and_page_numbers_are_stripped():
+    pages = [page(n, [f"{100 + n}/{n} מפגש", f"תוכן מספר {n * 7}"]) for n in range(1, 7)]
+    texts, boilerplate, pages_hit, stripped = strip_boilerplate(pages)
+    assert pages_hit == 6
+    assert stripped == 18
+    assert texts[0] == "101/1 מפגש\nתוכן מספר 7"
+
+
+def test_section_lines_survive_stripping():
+    body = lambda n: [f"{100 + n}/{n} מפגש", "תוכן", "אבחנות: שפעת", "הפניות: אין",
+                      f"דיון ותוכנית: מעקב {n}", "הפניות:", "אין"]
+    pages = [page(n, body(n)) for n in range(1, 7)]
+    texts, _, _, _ = strip_boilerplate(pages)
+    for n, text in enumerate(texts, 1):
+        assert text.split("\n") == body(n)
+
+
+def test_every_section_header_is_protected():
+    for name in SECTION_NAMES:
+        assert protected([f"{name}:"], 0)
+        assert protected([f"{name}: טקסט"], 0)
+        assert protected([f"{name}:", "אין"], 1)
+    assert not protected(["בית חולים כללי"], 0)
+
+
+def test_a_page_is_never_emptied():
+    pages = ["123/45 סיכום\nשורה קבועה"] * 6
+    texts, _, pages_hit, stripped = strip_boilerplate(pages)
+    assert texts == pages
+    assert pages_hit == stripped == 0
+
+
+def test_too_few_pages_are_left_alone():
+    pages = [page(n, ["תוכן"]) for n in range(1, MIN_PAGES)]
+    texts, template, stripped = remove_headers_footers(pages)
+    assert texts == pages
+    assert template == [] and stripped == 0
+
+
+def test_cached_template_is_reused():
+    pages = [page(n, [f"תוכן {n * 7}"]) for n in range(1, 7)]
+    _, template, _ = remove_headers_footers(pages, "source")
+    texts, learned, stripped = remove_headers_footers(pages, "source", {"source": template})
+    assert learned is None
+    assert stripped == 18
+    assert texts[2] == "תוכן 21"
+
+
+def test_numbers_must_be_constant_or_count_with_the_page():
+    assert numbers_consistent([(0, "עמוד 1 הודפס 2024"), (1, "עמוד 2 הודפס 2024"), (2, "עמוד 3 הודפס 2024")])
+    assert not numbers_consistent([(0, "המוגלובין 13"), (1, "המוגלובין 9"), (2, "המוגלובין 15")])
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for per-stage timing statistics (pdf_batch_timing)"""
+
+from pdf_batch_timing import StageTimings, NO_TIMINGS
+
+
+def test_percentiles_never_exceed_the_maximum():
+    timings = StageTimings()
+    for seconds in (0.0002, 0.0002, 0.0004, 0.002):
+        timings.add('page.parse', seconds)
+    stats = timings.to_dict()['page.parse']
+    assert stats['count'] == 4
+    assert stats['p50'] == 0.0003
+    assert stats['p95'] == stats['max'] == 0.002
+
+
+def test_worker_timings_merge():
+    batch = StageTimings()
+    for _ in range(2):
+        worker = StageTimings()
+        with worker.span('hebrew'):
+            pass
+        worker.add('cleanup', 0.5)
+        batch.merge(worker.stages)
+    stats = batch.to_dict()
+    assert list(stats) == ['cleanup', 'hebrew']
+    assert stats['cleanup']['count'] == 2 and stats['cleanup']['total'] == 1.0
+
+
+def test_disabled_timings_do_nothing():
+    with NO_TIMINGS.span('open'):
+        pass
+    NO_TIMINGS.add('open', 1.0)
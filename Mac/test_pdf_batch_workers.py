@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the isolated worker pool (pdf_batch_workers)"""
+
+import os
+import time
+
+import pytest
+
+from pdf_batch_workers import IsolatedProcessPool, WorkerError
+
+
+def sleep_then_pid(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def test_recycled_workers_still_return_every_result():
+    pool = IsolatedProcessPool(2, recycle_files=1)
+    try:
+        futures = [pool.submit(sleep_then_pid, 0) for _ in range(6)]
+        pids = [future.result(timeout=60) for future in futures]
+    finally:
+        pool.shutdown()
+    assert len(set(pids)) == 6
+    assert pool.recycled == 6
+
+
+def test_task_errors_and_timeouts_fail_only_their_task():
+    pool = IsolatedProcessPool(1, timeout=1)
+    try:
+        slow = pool.submit(sleep_then_pid, 30)
+        failing = pool.submit(fail, "bad pdf")
+        ok = pool.submit(sleep_then_pid, 0)
+        with pytest.raises(WorkerError) as error:
+            slow.result(timeout=60)
+        assert error.value.reason == 'timeout'
+        with pytest.raises(ValueError):
+            failing.result(timeout=60)
+        assert ok.result(timeout=60)
+    finally:
+        pool.shutdown()
+
+
+def test_kill_shutdown_does_not_wait_for_running_tasks():
+    pool = IsolatedProcessPool(2)
+    running = [pool.submit(sleep_then_pid, 30) for _ in range(2)]
+    queued = pool.submit(sleep_then_pid, 0)
+    time.sleep(1)
+    start = time.monotonic()
+    pool.shutdown(cancel_futures=True, kill=True)
+    assert time.monotonic() - start < 10
+    for future in running:
+        with pytest.raises(WorkerError) as error:
+            future.result(timeout=0)
+        assert error.value.reason == 'cancelled'
+    assert queued.cancelled()
+    assert pool.worker_pids() == []
@@ -54,7 +54,13 @@ if not exist "%VENV%\Scripts\python.exe" (
   )
   "%VENV%\Scripts\python.exe" -m ensurepip --upgrade >nul 2>&1
   "%VENV%\Scripts\python.exe" -m pip install --quiet --upgrade pip >nul 2>&1
-  "%VENV%\Scripts\python.exe" -m pip install --quiet --disable-pip-version-check --no-warn-script-location pdfplumber python-bidi Pillow >nul 2>&1
+)
+
+REM -------- Install missing packages (every launch, so older environments get new ones) --------
+"%VENV%\Scripts\python.exe" -c "import pdfplumber, bidi, PIL, psutil, pytesseract" >nul 2>&1
+if errorlevel 1 (
+  echo Installing packages...
+  "%VENV%\Scripts\python.exe" -m pip install --quiet --disable-pip-version-check --no-warn-script-location pdfplumber python-bidi Pillow psutil pytesseract >nul 2>&1
 )
 
 REM -------- Verify tkinter exists --------
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the PDF Batch Processor
+
+Usage:
+    python3 pdf_batch_bench.py makespan <mother_folder> --workers 4
+    python3 pdf_batch_bench.py makespan --synthetic 200 --workers 4
+    python3 pdf_batch_bench.py soak <folder_with_pdfs> --files 10000 --plot rss.png
+    python3 pdf_batch_bench.py backends <folder_with_pdfs> --golden golden/
+    python3 pdf_batch_bench.py textonly --synthetic 100
+    python3 pdf_batch_bench.py codecs <mother_folder>
+    python3 pdf_batch_bench.py codecs --synthetic 50
+"""
+
+import os
+import sys
+import csv
+import time
+import zlib
+import random
+import difflib
+import tempfile
+import argparse
+import threading
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from pdf_batch_processor import (
+    discover_groups,
+    build_job,
+    schedule_jobs,
+    simulate_makespan,
+    extract_pdf_job,
+    extract_pages,
+    join_pages,
+    clean_pdf_text,
+    reverse_hebrew_in_text,
+    EXTRACTION_BACKENDS,
+    DEFAULT_BACKEND,
+)
+from pdf_batch_codec import available_codecs, codec_path, write_text, read_text, CODEC_SUFFIXES
+from pdf_batch_workers import (
+    IsolatedProcessPool,
+    process_rss_mb,
+    DEFAULT_RECYCLE_FILES,
+    DEFAULT_RECYCLE_MB,
+    DEFAULT_RECYCLE_RSS_MB,
+)
+
+
+def synthetic_jobs(count, seed=0):
+    """
+    Generate jobs with log-uniform page counts (roughly 5..900 pages),
+    about a fifth of them split into 2-6 parts.
+    """
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(count):
+        parts = rng.randint(2, 6) if rng.random() < 0.2 else 1
+        pages = sum(int(round(5 * (180 ** rng.random()))) for _ in range(parts))
+        jobs.append({'base': f"job{i:05d}", 'pages': pages, 'weight': pages})
+    return jobs
+
+
+def bench_makespan(args):
+    """Compare simulated makespan of name order vs. longest-first order"""
+    if args.synthetic:
+        jobs = synthetic_jobs(args.synthetic, seed=args.seed)
+        source = f"synthetic ({args.synthetic} groups, seed {args.seed})"
+    else:
+        if not args.mother_folder or not os.path.isdir(args.mother_folder):
+            print("❌ Error: provide a mother folder or --synthetic N")
+            sys.exit(1)
+        start = time.perf_counter()
+        groups = discover_groups(args.mother_folder)
+        jobs = [build_job(base, parts) for base, parts in groups.items()]
+        elapsed = time.perf_counter() - start
+        source = args.mother_folder
+        print(f"🔎 Prescan: {len(jobs)} groups in {elapsed:.2f}s")
+
+    if not jobs:
+        print("❌ No groups found")
+        sys.exit(1)
+
+    by_name = [j['weight'] for j in sorted(jobs, key=lambda j: j['base'])]
+    lpt = [j['weight'] for j in schedule_jobs(jobs)]
+    total = sum(by_name)
+    lower_bound = max(max(by_name), total / args.workers)
+
+    print(f"\n📊 Makespan (pages) - {source}, {args.workers} workers")
+    print(f"   Total work:        {total:,}")
+    print(f"   Lower bound:       {lower_bound:,.0f}")
+    name_makespan = simulate_makespan(by_name, args.workers)
+    lpt_makespan = simulate_makespan(lpt, args.workers)
+    for label, makespan in (("Sorted by name", name_makespan), ("Largest first", lpt_makespan)):
+        print(f"   {label + ':':<18} {makespan:,} ({makespan / lower_bound:.2f}x bound)")
+    print(f"\n✅ Reduction: {100 * (name_makespan - lpt_makespan) / name_makespan:.1f}%")
+
+
+def find_pdfs(folder):
+    """All PDFs under a folder (recursive), sorted"""
+    pdfs = []
+    for dirpath, _, filenames in os.walk(folder):
+        pdfs.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith('.pdf'))
+    return sorted(pdfs)
+
+
+def ascii_chart(values, width=60, height=12):
+    """Render a list of numbers as a small text chart"""
+    if len(values) > width:
+        step = len(values) / width
+        values = [max(values[int(i * step):max(int(i * step) + 1, int((i + 1) * step))]) for i in range(width)]
+    top = max(values) or 1
+    rows = []
+    for level in range(height, 0, -1):
+        threshold = top * (level - 0.5) / height
+        label = f"{top * level / height:8.0f} |" if level in (height, 1) or level == height // 2 else "         |"
+        rows.append(label + ''.join('█' if v >= threshold else ' ' for v in values))
+    rows.append("         +" + "-" * len(values))
+    return "\n".join(rows)
+
+
+def bench_soak(args):
+    """Run many files through the worker pool and record worker RSS over time"""
+    pdfs = find_pdfs(args.folder)
+    if not pdfs:
+        print(f"❌ No PDFs found in {args.folder}")
+        sys.exit(1)
+
+    if args.no_recycle:
+        recycle = {'recycle_files': None, 'recycle_mb': None, 'recycle_rss_mb': None}
+    else:
+        recycle = {'recycle_files': args.recycle_files or None,
+                   'recycle_mb': args.recycle_mb or None,
+                   'recycle_rss_mb': args.recycle_rss or None}
+    pool = IsolatedProcessPool(args.workers, timeout=None, max_rss_mb=None, **recycle)
+
+    samples = []  # (elapsed seconds, files done, total worker RSS MB, max worker RSS MB)
+    done = [0, 0]  # files done, failures
+    stop = threading.Event()
+    start = time.perf_counter()
+
+    def sampler():
+        while not stop.is_set():
+            rss = [r for r in (process_rss_mb(pid) for pid in pool.worker_pids()) if r is not None]
+            samples.append((time.perf_counter() - start, done[0], sum(rss), max(rss, default=0)))
+            stop.wait(args.interval)
+
+    thread = threading.Thread(target=sampler, daemon=True)
+    thread.start()
+    print(f"🔁 Soak: {args.files:,} files from {len(pdfs)} PDFs, {args.workers} workers, "
+          f"recycling {'off' if args.no_recycle else 'on'}")
+
+    in_flight = set()
+    submitted = 0
+    while done[0] < args.files:
+        while submitted < args.files and len(in_flight) < args.workers * 2:
+            path = pdfs[submitted % len(pdfs)]
+            in_flight.add(pool.submit_sized(os.path.getsize(path), extract_pdf_job, path))
+            submitted += 1
+        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+            done[0] += 1
+            if future.exception() is not None:
+                done[1] += 1
+        if done[0] % max(1, args.files // 20) == 0:
+            print(f"   {done[0]:,}/{args.files:,} files")
+    stop.set()
+    thread.join()
+    pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['seconds', 'files_done', 'total_worker_rss_mb', 'max_worker_rss_mb'])
+        writer.writerows((f"{t:.2f}", n, f"{total:.1f}", f"{peak:.1f}") for t, n, total, peak in samples)
+
+    totals = [total for _, _, total, _ in samples if total > 0]
+    print(f"\n📊 {args.files:,} files in {elapsed:.1f}s ({args.files / elapsed:.1f} files/s), "
+          f"{done[1]} failed, {pool.recycled} worker(s) recycled")
+    if totals:
+        tenth = max(1, len(totals) // 10)
+        first = sum(totals[:tenth]) / tenth
+        last = sum(totals[-tenth:]) / tenth
+        print(f"   Total worker RSS: first 10% avg {first:.0f} MB, last 10% avg {last:.0f} MB, "
+              f"peak {max(totals):.0f} MB, growth {100 * (last - first) / first:+.1f}%")
+        print("\n" + ascii_chart(totals))
+    print(f"\n💾 Samples saved: {args.csv}")
+
+    if args.plot:
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("⚠ matplotlib is not installed; skipping plot")
+            return
+        fig, ax = plt.subplots(figsize=(10, 4))
+        ax.plot([n for _, n, _, _ in samples], [total for _, _, total, _ in samples], label='total worker RSS')
+        ax.plot([n for _, n, _, _ in samples], [peak for _, _, _, peak in samples], label='largest worker RSS')
+        ax.set_xlabel('files processed')
+        ax.set_ylabel('MB')
+        ax.set_title(f"Worker RSS, recycling {'off' if args.no_recycle else 'on'}")
+        ax.legend()
+        fig.tight_layout()
+        fig.savefig(args.plot)
+        print(f"💾 Plot saved: {args.plot}")
+
+
+def golden_path(golden_dir, pdf_path):
+    """Reference output file for a PDF in the golden directory"""
+    return os.path.join(golden_dir, os.path.splitext(os.path.basename(pdf_path))[0] + "_CLEANED.txt")
+
+
+def final_text(page_texts):
+    """The output text of extracted pages (cleanup and Hebrew fix, as extract_pdf_job does by default)"""
+    return reverse_hebrew_in_text(clean_pdf_text(join_pages(page_texts)))
+
+
+def bench_backends(args):
+    """
+    Run every extraction backend over sample PDFs: throughput (pages/s of the
+    backend's extract_pages alone) and fidelity of the final text against
+    golden outputs (or against the default backend's output when no golden
+    directory is given). PDFs the default backend cannot extract (scans
+    needing OCR, broken files) are skipped.
+    """
+    pdfs = find_pdfs(args.folder)
+    if not pdfs:
+        print(f"❌ No PDFs found in {args.folder}")
+        sys.exit(1)
+    backends = args.backends or sorted(EXTRACTION_BACKENDS)
+    for backend in backends:
+        if backend not in EXTRACTION_BACKENDS:
+            print(f"❌ Unknown backend: {backend} (available: {', '.join(sorted(EXTRACTION_BACKENDS))})")
+            sys.exit(1)
+
+    if args.update_golden:
+        if not args.golden:
+            print("❌ --update-golden requires --golden DIR")
+            sys.exit(1)
+        os.makedirs(args.golden, exist_ok=True)
+        for path in pdfs:
+            try:
+                text = extract_pdf_job(path, DEFAULT_BACKEND)['text']
+            except Exception as e:
+                print(f"  ⏭ {os.path.basename(path)}: skipped ({str(e)})")
+                continue
+            with open(golden_path(args.golden, path), 'w', encoding='utf-8') as f:
+                f.write(text)
+        print(f"💾 Golden outputs ({DEFAULT_BACKEND}) written to {args.golden}")
+
+    references = {}
+    for path in pdfs:
+        if args.golden:
+            try:
+                with open(golden_path(args.golden, path), 'r', encoding='utf-8') as f:
+                    references[path] = f.read()
+            except OSError:
+                pass
+        else:
+            try:
+                references[path] = extract_pdf_job(path, DEFAULT_BACKEND)['text']
+            except Exception as e:
+                print(f"  ⏭ {os.path.basename(path)}: skipped ({str(e)})")
+    if not args.golden:
+        pdfs = [path for path in pdfs if path in references]
+    reference_name = args.golden or f"'{DEFAULT_BACKEND}' backend"
+    print(f"🔬 {len(pdfs)} PDFs, {args.repeat} run(s) each, reference: {reference_name} "
+          f"({len(references)} available)")
+
+    rows = []
+    for backend in backends:
+        pages = 0
+        seconds = 0.0
+        failed = 0
+        exact = 0
+        ratios = []
+        for path in pdfs:
+            try:
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    page_texts, page_count = extract_pages(path, backend)
+                    seconds += time.perf_counter() - start
+                    pages += page_count
+                text = final_text(page_texts)
+            except Exception as e:
+                failed += 1
+                print(f"  ❌ {backend}: {os.path.basename(path)}: {str(e)}")
+                continue
+            if path in references:
+                expected = references[path]
+                if text == expected:
+                    exact += 1
+                    ratios.append(1.0)
+                else:
+                    ratios.append(difflib.SequenceMatcher(
+                        None, expected.splitlines(), text.splitlines(), autojunk=False).ratio())
+                    if args.verbose:
+                        print(f"  ≠ {backend}: {os.path.basename(path)} ({ratios[-1]:.3f})")
+        rows.append((backend, pages, seconds, failed, exact, ratios))
+
+    print(f"\n📊 {'Backend':<10} {'pages/s':>9} {'seconds':>9} {'exact':>9} {'mean sim':>9} {'min sim':>9} {'failed':>7}")
+    baseline = None
+    for backend, pages, seconds, failed, exact, ratios in rows:
+        rate = pages / seconds if seconds else 0.0
+        if backend == DEFAULT_BACKEND:
+            baseline = rate
+        mean = f"{sum(ratios) / len(ratios):.3f}" if ratios else "-"
+        low = f"{min(ratios):.3f}" if ratios else "-"
+        print(f"   {backend:<10} {rate:>9.1f} {seconds:>9.2f} {f'{exact}/{len(ratios)}':>9} "
+              f"{mean:>9} {low:>9} {failed:>7}")
+    if baseline:
+        for backend, pages, seconds, *_ in rows:
+            if backend != DEFAULT_BACKEND and seconds:
+                print(f"\n⚡ {backend}: {pages / seconds / baseline:.2f}x the speed of {DEFAULT_BACKEND}")
+    print("   (pages/s = the backend's page extraction alone; similarity = line-level difflib ratio "
+          "of the final output)")
+
+
+def write_synthetic_pdf(path, pages, text_lines=40, rulings=120, images=4, seed=0):
+    """
+    Write an image-heavy test PDF: every page has a table grid of ruling
+    lines, filled boxes, a few stamp/logo images and some lines of text.
+    """
+    rng = random.Random(seed)
+    objects = []
+
+    def add(data):
+        objects.append(data)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pixels = zlib.compress(bytes(rng.randrange(256) for _ in range(96 * 96)))
+    stamp = add(b"<< /Type /XObject /Subtype /Image /Width 96 /Height 96 /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % len(pixels)
+                + pixels + b"\nendstream")
+    pages_id = add(b"")
+    kids = []
+    for p in range(pages):
+        ops = []
+        for r in range(rulings):
+            if r % 2:
+                y = 60 + (r * 6) % 680
+                ops.append(f"40 {y} m 570 {y} l S".encode())
+            else:
+                ops.append(f"{40 + (r * 9) % 520} {60 + (r * 13) % 660} 30 8 re f".encode())
+        for i in range(images):
+            ops.append(f"q 60 0 0 60 {400 + (i % 2) * 80} {620 - (i // 2) * 80} cm /Im1 Do Q".encode())
+        ops.append(b"BT /F1 10 Tf")
+        for line in range(text_lines):
+            text = f"Page {p + 1} line {line} visit 0{1 + line % 9}/0{1 + p % 9}/2023 value {rng.randint(10, 999)}"
+            ops.append(f"1 0 0 1 40 {770 - line * 17} Tm ({text}) Tj".encode())
+        ops.append(b"ET")
+        content = zlib.compress(b"\n".join(ops))
+        contents = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Resources "
+                        b"<< /Font << /F1 %d 0 R >> /XObject << /Im1 %d 0 R >> >> /Contents %d 0 R >>"
+                        % (pages_id, font, stamp, contents)))
+    objects[pages_id - 1] = (b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids)
+                             + b"] /Count %d >>" % pages)
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, data in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + data + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def bench_textonly(args):
+    """
+    Per-page cost with and without text-only parsing, for every backend
+    (the backend's extract_pages alone). PDFs the default backend cannot
+    extract (scans needing OCR, broken files) are skipped.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            pdfs = []
+            for i in range(args.files):
+                path = os.path.join(tmp, f"synthetic{i}.pdf")
+                write_synthetic_pdf(path, args.synthetic, rulings=args.rulings, images=args.images, seed=i)
+                pdfs.append(path)
+            source = (f"synthetic ({args.files} x {args.synthetic} pages, "
+                      f"{args.rulings} paths + {args.images} images per page)")
+        else:
+            if not args.folder:
+                print("❌ Error: provide a folder with PDFs or --synthetic N")
+                sys.exit(1)
+            pdfs = find_pdfs(args.folder)
+            source = args.folder
+        if not pdfs:
+            print(f"❌ No PDFs found in {args.folder}")
+            sys.exit(1)
+
+        print(f"🔬 Text-only parsing - {source}")
+        usable = []
+        for path in pdfs:
+            try:
+                extract_pdf_job(path, DEFAULT_BACKEND)
+            except Exception as e:
+                print(f"  ⏭ {os.path.basename(path)}: skipped ({str(e)})")
+                continue
+            usable.append(path)
+        if len(usable) < len(pdfs):
+            print(f"  ⏭ {len(pdfs) - len(usable)} of {len(pdfs)} PDFs skipped")
+        if not usable:
+            print("❌ No extractable PDFs")
+            sys.exit(1)
+
+        print(f"\n📊 {'Backend':<10} {'all objects':>14} {'text only':>14} {'saving':>8} {'same text':>10} {'failed':>7}")
+        for backend in sorted(EXTRACTION_BACKENDS):
+            rates = {}
+            outputs = {}
+            failed = set()
+            for text_only in (False, True):
+                pages = 0
+                seconds = 0.0
+                outputs[text_only] = {}
+                for path in usable:
+                    try:
+                        for _ in range(args.repeat):
+                            start = time.perf_counter()
+                            page_texts, page_count = extract_pages(path, backend, text_only)
+                            seconds += time.perf_counter() - start
+                            pages += page_count
+                    except Exception as e:
+                        failed.add(path)
+                        print(f"  ❌ {backend}: {os.path.basename(path)}: {str(e)}")
+                        continue
+                    outputs[text_only][path] = page_texts
+                rates[text_only] = pages / seconds if seconds else 0.0
+            per_page = {k: 1000 / v if v else 0.0 for k, v in rates.items()}
+            saving = 100 * (per_page[False] - per_page[True]) / per_page[False] if per_page[False] else 0.0
+            same = "yes" if all(outputs[False].get(path) == outputs[True].get(path)
+                                for path in usable if path not in failed) else "NO"
+            print(f"   {backend:<10} {per_page[False]:>9.1f} ms/p {per_page[True]:>9.1f} ms/p "
+                  f"{saving:>7.1f}% {same:>10} {len(failed):>7}")
+        print("   (ms/p = the backend's page extraction alone, per page)")
+
+
+def find_outputs(folder):
+    """Cleaned/merged text outputs (any codec) under a folder"""
+    names = tuple(f"{name}{suffix}" for name in ("_CLEANED.txt", "_cleaned_merged.txt")
+                  for suffix in CODEC_SUFFIXES.values())
+    return sorted(os.path.join(root, name) for root, _, files in os.walk(folder)
+                  for name in files if name.endswith(names))
+
+
+def synthetic_output(encounters, seed):
+    """Cleaned-output-like Hebrew text with the given number of encounters"""
+    rng = random.Random(seed)
+    words = ["מטופל", "כאב", "ראש", "חום", "לחץ", "דם", "בדיקה", "מעקב", "טיפול", "המשך",
+             "הפניה", "רופא", "תרופתי", "משפחה", "שיעול", "דופק", "תקין", "ללא", "ממצאים"]
+    blocks = []
+    for n in range(encounters):
+        lines = [f"=== START - {100 + n}/{n + 1} שגפמ ===",
+                 f"{1 + n % 28:02d}/{1 + n % 12:02d}/20{10 + n % 14}"]
+        for section in ("**:הזנמנא**", "**:םיאצממ**", "**:תונחבא**"):
+            lines += ["", section]
+            lines += [" ".join(rng.choice(words) for _ in range(rng.randint(4, 12)))
+                      for _ in range(rng.randint(1, 8))]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def bench_codecs(args):
+    """Output codecs: write/read throughput and disk usage"""
+    if args.synthetic:
+        texts = [synthetic_output(args.encounters, seed) for seed in range(args.synthetic)]
+        source = f"synthetic ({args.synthetic} outputs x {args.encounters} encounters)"
+    else:
+        if not args.folder:
+            print("❌ Error: provide a processed mother folder or --synthetic N")
+            sys.exit(1)
+        texts = [read_text(path) for path in find_outputs(args.folder)]
+        source = args.folder
+    if not texts:
+        print(f"❌ No _CLEANED.txt outputs found in {args.folder}")
+        sys.exit(1)
+    raw_mb = sum(len(text.encode('utf-8')) for text in texts) / (1024 * 1024)
+
+    print(f"🔬 Output codecs - {source}, {raw_mb:.1f} MB of text")
+    print(f"\n📊 {'Codec':<6} {'write':>11} {'read':>11} {'on disk':>10} {'ratio':>7}")
+    for codec in available_codecs():
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            paths = [codec_path(os.path.join(tmp, f"out{i}_CLEANED.txt"), codec) for i in range(len(texts))]
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for path, text in zip(paths, texts):
+                    write_text(path, text, codec)
+            write_seconds = (time.perf_counter() - start) / args.repeat
+            disk = sum(os.path.getsize(path) for path in paths)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for path in paths:
+                    read_text(path)
+            read_seconds = (time.perf_counter() - start) / args.repeat
+        disk_mb = disk / (1024 * 1024)
+        print(f"   {codec:<6} {raw_mb / write_seconds:>7.1f} MB/s {raw_mb / read_seconds:>7.1f} MB/s "
+              f"{disk_mb:>7.2f} MB {raw_mb / disk_mb if disk_mb else 0:>6.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF Batch Processor benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('makespan', help="Scheduling order vs. makespan")
+    p.add_argument('mother_folder', nargs='?')
+    p.add_argument('-j', '--workers', type=int, default=4)
+    p.add_argument('--synthetic', type=int, default=0, help="Use N synthetic groups instead of a folder")
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_makespan)
+
+    p = sub.add_parser('soak', help="Worker RSS over a long run (recycling check)")
+    p.add_argument('folder', help="Folder with sample PDFs (cycled through)")
+    p.add_argument('--files', type=int, default=10000)
+    p.add_argument('-j', '--workers', type=int, default=2)
+    p.add_argument('--interval', type=float, default=1.0, help="RSS sampling interval in seconds")
+    p.add_argument('--recycle-files', type=int, default=DEFAULT_RECYCLE_FILES)
+    p.add_argument('--recycle-mb', type=int, default=DEFAULT_RECYCLE_MB)
+    p.add_argument('--recycle-rss', type=int, default=DEFAULT_RECYCLE_RSS_MB)
+    p.add_argument('--no-recycle', action='store_true', help="Disable recycling (baseline)")
+    p.add_argument('--csv', default='soak_rss.csv')
+    p.add_argument('--plot', help="Write a PNG plot (requires matplotlib)")
+    p.set_defaults(func=bench_soak)
+
+    p = sub.add_parser('backends', help="Extraction backends: throughput and fidelity")
+    p.add_argument('folder', help="Folder with sample PDFs")
+    p.add_argument('--backends', nargs='+', help="Backends to compare (default: all)")
+    p.add_argument('--golden', help="Directory of reference outputs (<pdf name>_CLEANED.txt)")
+    p.add_argument('--update-golden', action='store_true',
+                   help=f"Regenerate the golden outputs with the '{DEFAULT_BACKEND}' backend first")
+    p.add_argument('--repeat', type=int, default=1, help="Runs per PDF for the timing")
+    p.add_argument('-v', '--verbose', action='store_true', help="List every PDF whose output differs")
+    p.set_defaults(func=bench_backends)
+
+    p = sub.add_parser('textonly', help="Text-only parsing vs. parsing every page object")
+    p.add_argument('folder', nargs='?', help="Folder with sample PDFs")
+    p.add_argument('--synthetic', type=int, default=0, help="Generate image-heavy PDFs of N pages instead")
+    p.add_argument('--files', type=int, default=3, help="Number of synthetic PDFs")
+    p.add_argument('--rulings', type=int, default=120, help="Ruling lines/boxes per synthetic page")
+    p.add_argument('--images', type=int, default=4, help="Images per synthetic page")
+    p.add_argument('--repeat', type=int, default=1, help="Runs per PDF for the timing")
+    p.set_defaults(func=bench_textonly)
+
+    p = sub.add_parser('codecs', help="Output compression: throughput and disk savings")
+    p.add_argument('folder', nargs='?', help="Processed mother folder (its _CLEANED.txt outputs are used)")
+    p.add_argument('--synthetic', type=int, default=0, help="Generate N synthetic outputs instead")
+    p.add_argument('--encounters', type=int, default=200, help="Encounters per synthetic output")
+    p.add_argument('--repeat', type=int, default=3, help="Runs per codec for the timing")
+    p.add_argument('--dir', help="Directory to write to, e.g. on the network share (default: temp)")
+    p.set_defaults(func=bench_codecs)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Output compression for the PDF Batch Processor
+
+_CLEANED.txt and _cleaned_merged.txt can be written compressed (streamed
+through the compressor, never held twice in memory):
+
+    none   X_CLEANED.txt
+    gzip   X_CLEANED.txt.gz
+    zstd   X_CLEANED.txt.zst   (pip install zstandard)
+
+Readers in this project open outputs through open_text / find_output, which
+detect the format from the file's first bytes, so compressed and plain
+outputs can be mixed (e.g. after switching codecs between runs).
+"""
+
+import os
+import gzip
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+CODEC_SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+DEFAULT_CODEC = 'none'
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def available_codecs():
+    return [codec for codec in CODEC_SUFFIXES if codec != 'zstd' or ZSTD_AVAILABLE]
+
+
+def check_codec(codec):
+    """Raise ValueError if codec cannot be used here"""
+    if codec not in CODEC_SUFFIXES:
+        raise ValueError(f"Unknown output codec: {codec}")
+    if codec == 'zstd' and not ZSTD_AVAILABLE:
+        raise ValueError("zstd output requires the zstandard package (pip install zstandard)")
+
+
+def codec_path(path, codec):
+    """Path of an output (named without a suffix, e.g. X_CLEANED.txt) written with codec"""
+    return path + CODEC_SUFFIXES[codec]
+
+
+def find_output(path):
+    """The existing file for an output named path, in any codec (None if there is none)"""
+    for suffix in CODEC_SUFFIXES.values():
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return None
+
+
+def remove_other_codecs(path, codec):
+    """Remove copies of an output written with a different codec (they would be stale)"""
+    stale = [path + suffix for other, suffix in CODEC_SUFFIXES.items() if other != codec]
+    if codec != 'none':
+        stale.append(path + ".idx")  # offset index sidecars describe plain files only
+    for stale_path in stale:
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
+
+
+def open_text(path, mode='r', codec=None):
+    """
+    Open an output as UTF-8 text.
+    mode 'r': the codec is detected from the file's first bytes
+    mode 'w': codec is required ('none', 'gzip' or 'zstd'); newlines are
+    written as '\n' on every platform, so the bytes on disk match the offsets
+    computed from the text (see pdf_batch_index and pdf_batch_records)
+    """
+    if mode == 'r':
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+        if magic.startswith(GZIP_MAGIC):
+            codec = 'gzip'
+        elif magic.startswith(ZSTD_MAGIC):
+            codec = 'zstd'
+        else:
+            codec = 'none'
+    check_codec(codec)
+    newline = '' if mode == 'w' else None
+    if codec == 'gzip':
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=GZIP_LEVEL, newline=newline)
+    if codec == 'zstd':
+        if mode == 'r':
+            return zstandard.open(path, 'rt', encoding='utf-8')
+        return zstandard.open(path, 'wt', cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL), encoding='utf-8',
+                              newline=newline)
+    return open(path, mode, encoding='utf-8', newline=newline)
+
+
+def read_text(path):
+    with open_text(path) as f:
+        return f.read()
+
+
+def write_text(path, text, codec=DEFAULT_CODEC):
+    with open_text(path, 'w', codec) as f:
+        f.write(text)
+
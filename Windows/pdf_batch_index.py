@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offset index sidecars for the PDF Batch Processor outputs
+
+Every _CLEANED.txt / _cleaned_merged.txt gets a small binary <file>.idx next
+to it with the byte offsets of each encounter (=== ... START ===) and of each
+section in it, so a reader can jump straight to one encounter of a 40 MB
+merged file instead of scanning it:
+
+    with EncounterIndex(path) as index:
+        text = index.encounter("123/45")
+        sections = index.sections("123/45")   # { 'אנמנזה': '...', ... }
+
+The text file is memory-mapped; only the slice asked for is read.
+
+File layout (little-endian):
+    header       magic b'PBIX', version (H), reserved (H), text file size (Q),
+                 encounters N (I), sections M (I), id bytes (I)
+    encounters   2N x Q: start, end byte offset of each encounter block
+    first        N+1 x I: index of each encounter's first section (prefix sums)
+    sections     2M x Q: start, end byte offset of each section body
+    names        M x B: section name, as an index into SECTION_NAMES
+    ids          UTF-8 encounter ids, newline-separated
+"""
+
+import os
+import sys
+import mmap
+import struct
+from array import array
+
+from pdf_batch_merge import ENCOUNTER_START
+from pdf_batch_records import SECTION_MARKERS, SECTION_NAMES
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b'PBIX'
+INDEX_VERSION = 1
+HEADER = struct.Struct('<4sHHQIII')
+
+
+class IndexUnavailable(Exception):
+    """Index sidecar missing, corrupt, or out of date with its text file"""
+
+
+def index_path(text_path):
+    return text_path + INDEX_SUFFIX
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def scan_lines(lines):
+    """
+    Offsets of encounters and sections in a text given as UTF-8 byte lines.
+    Returns (ids, encounters, first, sections, names) as in the file layout
+    """
+    ids = []
+    encounters = array('Q')
+    first = array('I')
+    sections = array('Q')
+    names = array('B')
+    section_codes = {marker: SECTION_NAMES.index(name) for marker, name in SECTION_MARKERS.items()}
+    offset = 0
+    in_section = False
+    for line in lines:
+        text = line.decode('utf-8', errors='replace').strip()
+        match = ENCOUNTER_START.match(text)
+        if match:
+            if in_section:
+                sections.append(offset)
+                in_section = False
+            if encounters:
+                encounters.append(offset)  # the previous encounter ends here
+            ids.append(match.group(1))
+            encounters.append(offset)
+            first.append(len(names))
+        elif encounters and text in section_codes:
+            if in_section:
+                sections.append(offset)
+            names.append(section_codes[text])
+            sections.append(offset + len(line))
+            in_section = True
+        offset += len(line)
+    if in_section:
+        sections.append(offset)
+    if encounters:
+        encounters.append(offset)
+    first.append(len(names))
+    return ids, encounters, first, sections, names
+
+
+def write_index(text_path, lines, text_size):
+    """Write the sidecar of text_path from its lines (atomic replace)"""
+    ids, encounters, first, sections, names = scan_lines(lines)
+    id_bytes = "\n".join(ids).encode('utf-8')
+    path = index_path(text_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, text_size, len(ids), len(names), len(id_bytes)))
+            for values in (encounters, first, sections, names):
+                _little_endian(values).tofile(f)
+            f.write(id_bytes)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def index_text(text_path, text):
+    """Index an output whose text is still in memory (as written by _write_text)"""
+    data = text.encode('utf-8')
+    write_index(text_path, data.splitlines(keepends=True), len(data))
+
+
+def index_file(text_path):
+    """Index an output by streaming it from disk (e.g. a merged file)"""
+    with open(text_path, 'rb') as f:
+        write_index(text_path, f, os.fstat(f.fileno()).st_size)
+
+
+def _read_array(data, offset, typecode, count):
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    values.frombytes(data[offset:end])
+    return _little_endian(values), end
+
+
+class EncounterIndex:
+    """
+    Random access to the encounters of an output file through its sidecar.
+    Raises IndexUnavailable if the sidecar is missing, corrupt or stale (the text
+    file changed size since it was indexed); rebuild it with index_file().
+    """
+
+    def __init__(self, text_path):
+        self.text_path = text_path
+        try:
+            with open(index_path(text_path), 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise IndexUnavailable(f"No index for {text_path}: {str(e)}")
+        if len(data) < HEADER.size:
+            raise IndexUnavailable(f"Corrupt index for {text_path}")
+        magic, version, _, text_size, count, section_count, id_length = HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise IndexUnavailable(f"Unsupported index for {text_path}")
+        offset = HEADER.size
+        self._encounters, offset = _read_array(data, offset, 'Q', 2 * count)
+        self._first, offset = _read_array(data, offset, 'I', count + 1)
+        self._sections, offset = _read_array(data, offset, 'Q', 2 * section_count)
+        self._names, offset = _read_array(data, offset, 'B', section_count)
+        self.ids = data[offset:offset + id_length].decode('utf-8').split("\n") if count else []
+        if len(self.ids) != count or len(self._names) != section_count:
+            raise IndexUnavailable(f"Corrupt index for {text_path}")
+        self._positions = {}
+        for position, encounter in enumerate(self.ids):
+            self._positions.setdefault(encounter, position)
+
+        try:
+            self._file = open(text_path, 'rb')
+        except OSError as e:
+            raise IndexUnavailable(f"Cannot open {text_path}: {str(e)}")
+        size = os.fstat(self._file.fileno()).st_size
+        if size != text_size:
+            self._file.close()
+            raise IndexUnavailable(f"Index for {text_path} is out of date")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def position(self, encounter):
+        """Position of an encounter (its first occurrence) given its id, or the position itself"""
+        if isinstance(encounter, int):
+            if not 0 <= encounter < len(self.ids):
+                raise KeyError(encounter)
+            return encounter
+        return self._positions[encounter]
+
+    def _slice(self, start, end):
+        return self._map[start:end].decode('utf-8', errors='replace').strip()
+
+    def encounter(self, encounter):
+        """Text of one encounter block (by id or position)"""
+        position = self.position(encounter)
+        return self._slice(self._encounters[2 * position], self._encounters[2 * position + 1])
+
+    def sections(self, encounter):
+        """Sections of one encounter: { section name: text } in file order"""
+        position = self.position(encounter)
+        sections = {}
+        for i in range(self._first[position], self._first[position + 1]):
+            name = SECTION_NAMES[self._names[i]]
+            sections[name] = self._slice(self._sections[2 * i], self._sections[2 * i + 1])
+        return sections
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optional OCR stage for the PDF Batch Processor
+
+PDFs that triage classifies as image-only (faxed or scanned reports, see
+PageTriage) can be run through a local Tesseract install with the Hebrew
+language pack. Only pages without a text layer are rendered and OCR'd;
+pages that do have text are extracted as usual.
+
+OCR runs in its own small worker pool (separate from extraction, at lower
+CPU priority, one Tesseract thread per worker), so it never starves normal
+extraction. Results are cached by page-image hash, so re-running a batch
+never OCRs the same page twice.
+
+Requirements (optional):
+    pip install pytesseract
+    Tesseract with the Hebrew language data ('heb'), e.g.
+        macOS:   brew install tesseract tesseract-lang
+        Windows: https://github.com/UB-Mannheim/tesseract/wiki
+"""
+
+import os
+import io
+import time
+import hashlib
+import tempfile
+
+import pdfplumber
+
+try:
+    import pytesseract
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+
+from pdf_batch_processor import (
+    text_only_layout,
+    page_content_stats,
+    document_source,
+    finish_pages,
+    reverse_hebrew_in_text,
+    MIN_TEXT_CHARS,
+)
+from pdf_batch_stats import STATS_DIR
+
+OCR_CACHE_DIR = os.path.join(STATS_DIR, "ocr")
+DEFAULT_OCR_LANG = 'heb'
+DEFAULT_OCR_DPI = 300
+DEFAULT_OCR_WORKERS = 1
+DEFAULT_OCR_TIMEOUT = 2 * 60 * 60  # seconds per file (OCR is slow; --ocr-timeout)
+
+_priority_lowered = False
+
+
+def ocr_available(lang=DEFAULT_OCR_LANG):
+    """Returns (True, None) if OCR can run, else (False, reason)"""
+    if not PYTESSERACT_AVAILABLE:
+        return False, "pytesseract is not installed (pip install pytesseract)"
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False, "Tesseract is not installed or not on PATH"
+    try:
+        languages = pytesseract.get_languages(config='')
+    except Exception:
+        return True, None
+    missing = [code for code in lang.split('+') if code not in languages]
+    if missing:
+        return False, f"Tesseract language data missing: {', '.join(missing)}"
+    return True, None
+
+
+def lower_priority():
+    """Run this worker (and the Tesseract processes it starts) at low priority, on one thread each"""
+    global _priority_lowered
+    if _priority_lowered:
+        return
+    _priority_lowered = True
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    try:
+        import psutil
+        process = psutil.Process()
+        process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if os.name == 'nt' else 10)
+    except Exception:
+        if hasattr(os, 'nice'):
+            try:
+                os.nice(10)
+            except OSError:
+                pass
+
+
+def page_image_key(image, lang, dpi):
+    """Cache key of a rendered page: sha256 of its pixels plus the OCR settings"""
+    digest = hashlib.sha256()
+    digest.update(f"{lang}|{dpi}|{image.mode}|{image.width}x{image.height}|".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def cache_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key + ".txt")
+
+
+def read_cached(cache_dir, key):
+    """Cached OCR text for a page image, or None"""
+    try:
+        with open(cache_path(cache_dir, key), 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_cached(cache_dir, key, text):
+    """Store OCR text for a page image (atomic replace, errors ignored)"""
+    path = cache_path(cache_dir, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def ocr_page(page, lang, dpi, cache_dir):
+    """
+    Render one pdfplumber page and OCR it (or take the text from the cache).
+    Returns (text in text-layer order, True if it came from the cache)
+    """
+    image = page.to_image(resolution=dpi).original.convert('L')
+    key = page_image_key(image, lang, dpi)
+    text = read_cached(cache_dir, key) if cache_dir else None
+    if text is not None:
+        return text, True
+    text = pytesseract.image_to_string(image, lang=lang)
+    # Tesseract returns Hebrew in logical order; a PDF text layer comes out of
+    # pdfplumber in visual order. reverse_hebrew_in_text is its own inverse, so
+    # this gives OCR pages the same form as extracted pages for cleanup
+    text = reverse_hebrew_in_text("\n".join(line.strip() for line in text.splitlines() if line.strip()))
+    if cache_dir:
+        write_cached(cache_dir, key, text)
+    return text, False
+
+
+def ocr_pdf_job(source, lang=DEFAULT_OCR_LANG, dpi=DEFAULT_OCR_DPI, cache_dir=OCR_CACHE_DIR,
+                strip_headers=False, templates=None, dedupe=False, records=False, keep_pages=False):
+    """
+    OCR worker entry point: like extract_pdf_job, but pages without a text
+    layer are rendered and OCR'd. The page texts then go through the same
+    post-processing (finish_pages).
+    source: a path, or the PDF's bytes
+    cache_dir: OCR cache directory (None = no cache)
+    strip_headers, templates, dedupe, records, keep_pages: as for extract_pdf_job
+    Returns dict: { 'text', 'pages', 'seconds', 'ocr_pages', 'cached_pages', 'source', 'template',
+                    'stripped_lines', 'duplicate_pages', 'duplicate_encounters', 'records', 'page_texts' }
+    """
+    lower_priority()
+    start = time.perf_counter()
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    source_key = document_source(source) if strip_headers else None
+    page_texts = []
+    ocr_pages = 0
+    cached_pages = 0
+    with pdfplumber.open(source) as pdf:
+        page_count = len(pdf.pages)
+        for page in pdf.pages:
+            page._layout = text_only_layout(page)
+            chars, _ = page_content_stats(page._layout)
+            if chars >= MIN_TEXT_CHARS:
+                page_texts.append(page.extract_text())
+                continue
+            text, cached = ocr_page(page, lang, dpi, cache_dir)
+            page_texts.append(text)
+            ocr_pages += 1
+            cached_pages += cached
+    result = finish_pages(page_texts, strip_headers=strip_headers, source_key=source_key,
+                          templates=templates, dedupe=dedupe, records=records, keep_pages=keep_pages)
+    result.update(pages=page_count, seconds=time.perf_counter() - start, source=source_key,
+                  ocr_pages=ocr_pages, cached_pages=cached_pages)
+    return result
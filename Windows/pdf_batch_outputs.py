@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Output writing for the PDF Batch Processor
+
+Every text output is written to a temporary file next to it and renamed
+into place (os.replace), so readers never see a partial file.
+
+Outputs whose content did not change since the last run are not rewritten
+at all, so their mtime stays put and backup/sync tools do not re-upload
+them. ~/.pdf_batch_processor/outputs.json records, per output, the size
+of the file written and a hash of its text; an output is unchanged when
+the file on disk still has that size and the new text has that hash.
+Outputs the manifest does not know yet (e.g. written by an older version)
+are read back once and compared.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+from pdf_batch_stats import STATS_DIR
+from pdf_batch_codec import open_text, read_text, codec_path, remove_other_codecs, DEFAULT_CODEC
+
+OUTPUTS_MANIFEST_PATH = os.path.join(STATS_DIR, "outputs.json")
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class OutputManifest:
+    """Size and text hash of every output written (see the module docstring)"""
+
+    def __init__(self, path=OUTPUTS_MANIFEST_PATH):
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the manifest (missing/corrupt file = empty)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = dict(json.load(f).get('outputs', {}))
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+
+    def unchanged(self, path, digest):
+        """True if the file at path already holds text with this hash"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry:
+            return entry['size'] == size and entry['hash'] == digest
+        # Not written through the manifest yet: compare the content once
+        try:
+            same = text_hash(read_text(path)) == digest
+        except (OSError, ValueError, EOFError):
+            return False
+        if same:
+            self.record(path, digest)
+        return same
+
+    def entry(self, path):
+        """{ 'size', 'hash' } last recorded for path, or None"""
+        with self._lock:
+            entry = self.entries.get(os.path.abspath(path))
+        return dict(entry) if entry else None
+
+    def record(self, path, digest):
+        """Remember what was written to path"""
+        entry = {'size': os.path.getsize(path), 'hash': digest}
+        with self._lock:
+            key = os.path.abspath(path)
+            if self.entries.get(key) != entry:
+                self.entries[key] = entry
+                self.changed = True
+
+    def save(self):
+        """Write the manifest (atomic replace) if anything changed"""
+        with self._lock:
+            if not self.changed:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'outputs': self.entries}, f)
+            os.replace(tmp_path, self.path)
+            self.changed = False
+
+
+class AtomicTextWriter:
+    """
+    A text output written piece by piece to <path>.<pid>.tmp and renamed into
+    place by commit(). path is the output's name without codec suffix.
+    """
+
+    def __init__(self, path, codec=DEFAULT_CODEC):
+        self.path = path
+        self.codec = codec
+        self.final_path = codec_path(path, codec)
+        self._hash = hashlib.blake2b(digest_size=16)
+        # A plain open (not mkstemp), so the file gets the usual permissions
+        self._tmp_path = f"{self.final_path}.{os.getpid()}.tmp"
+        self._file = open_text(self._tmp_path, 'w', codec)
+
+    def write(self, text):
+        self._hash.update(text.encode('utf-8'))
+        self._file.write(text)
+
+    def commit(self, manifest=None):
+        """
+        Move the output into place, unless the manifest shows the file there
+        already has this content. Returns True if the file was replaced.
+        """
+        self._file.close()
+        digest = self._hash.hexdigest()
+        if manifest and manifest.unchanged(self.final_path, digest):
+            self._remove_tmp()
+            written = False
+        else:
+            os.replace(self._tmp_path, self.final_path)
+            if manifest:
+                manifest.record(self.final_path, digest)
+            written = True
+        remove_other_codecs(self.path, self.codec)
+        self._file = self._tmp_path = None
+        return written
+
+    def discard(self):
+        """Drop whatever was written (no-op after commit)"""
+        if self._file is not None:
+            self._file.close()
+            self._remove_tmp()
+            self._file = self._tmp_path = None
+
+    def _remove_tmp(self):
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+def write_output(path, text, codec=DEFAULT_CODEC, manifest=None):
+    """
+    Write a text output (named without codec suffix) atomically, skipping
+    the write when the manifest shows it unchanged. Returns True if written.
+    """
+    digest = text_hash(text)
+    if manifest and manifest.unchanged(codec_path(path, codec), digest):
+        remove_other_codecs(path, codec)
+        return False
+    writer = AtomicTextWriter(path, codec)
+    try:
+        writer.write(text)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.commit(manifest)
@@ -7,13 +7,43 @@ Processes multiple folders automatically
 Usage:
     python3 pdf_batch_processor.py
     (Will prompt for folder path)
+
+    python3 pdf_batch_processor.py <mother_folder> --workers 4
+    (Process groups in parallel, longest jobs first)
 """
 
 import os
 import sys
 import re
+import io
+import json
+import time
+import heapq
+import asyncio
+import argparse
 import pdfplumber
+from pdfplumber.page import PDFPageAggregatorWithMarkedContent
 from pathlib import Path
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdftypes import resolve1
+from pdfminer.utils import decode_text
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LTChar, LTImage, LTContainer
+
+from pdf_batch_stats import format_eta
+from pdf_batch_timing import StageTimings, NO_TIMINGS
+from pdf_batch_templates import remove_headers_footers
+from pdf_batch_pipeline import DEFAULT_PREFETCH_MB
+from pdf_batch_workers import (
+    DEFAULT_TIMEOUT,
+    DEFAULT_MAX_RSS_MB,
+    DEFAULT_RECYCLE_FILES,
+    DEFAULT_RECYCLE_MB,
+    DEFAULT_RECYCLE_RSS_MB,
+)
 
 try:
     from bidi.algorithm import get_display
@@ -91,6 +121,17 @@ def find_matching_pdf(folder_path, folder_name):
     return None
 
 
+def folder_pdf(part):
+    """
+    The PDF of a folder: the file the user picked for it ('pdf_name', e.g. in
+    the GUI) when given, otherwise the one matching the folder's name
+    """
+    if part.get('pdf_name'):
+        pdf_path = os.path.join(part['path'], part['pdf_name'])
+        return pdf_path if os.path.exists(pdf_path) else None
+    return find_matching_pdf(part['path'], part['name'])
+
+
 def find_split_part_pdfs(folder_path, base_name):
     """
     Find split part PDFs that live inside a single base folder.
@@ -98,6 +139,7 @@ def find_split_part_pdfs(folder_path, base_name):
     Returns list of dicts: { 'suffix': 'א', 'path': full_path, 'name': filename }
     """
     results = []
+    # Regex matches: start with base_name, then a single Hebrew letter, then .pdf (case-insensitive)
     pattern = re.compile(rf'^{re.escape(base_name)}([\u0590-\u05FF])\.pdf$', re.IGNORECASE)
     try:
         for file in os.listdir(folder_path):
@@ -112,16 +154,382 @@ def find_split_part_pdfs(folder_path, base_name):
     return results
 
 
-def clean_and_structure_pdf(input_pdf_path):
-    """Clean and structure PDF text"""
-    
-    # Read PDF
-    full_text = ""
-    with pdfplumber.open(input_pdf_path) as pdf:
+#
+# Prescan and scheduling
+#
+# A group's cost is dominated by its page count, which can be read cheaply from
+# the trailer and the root page tree without parsing any page content. When the
+# page tree is unreadable we fall back to an estimate based on file size.
+#
+ESTIMATED_BYTES_PER_PAGE = 60 * 1024
+
+
+def probe_pdf(pdf_path):
+    """
+    Cheap prescan of a PDF: file size plus the /Count of the root page tree.
+    Only the xref/trailer and the catalog are read; no page is parsed.
+    Returns dict: { 'path': pdf_path, 'bytes': int, 'mtime_ns': int or None, 'pages': int or None }
+    """
+    info = {'path': pdf_path, 'bytes': 0, 'mtime_ns': None, 'pages': None}
+    try:
+        st = os.stat(pdf_path)
+        info['bytes'] = st.st_size
+        info['mtime_ns'] = st.st_mtime_ns
+        with open(pdf_path, 'rb') as fp:
+            doc = PDFDocument(PDFParser(fp))
+            pages = resolve1(doc.catalog['Pages'])
+            info['pages'] = int(resolve1(pages['Count']))
+    except Exception:
+        pass
+    return info
+
+
+def estimated_pages(info):
+    """Page count from a probe result, estimated from file size when unknown"""
+    if info['pages'] is not None:
+        return info['pages']
+    return max(1, info['bytes'] // ESTIMATED_BYTES_PER_PAGE)
+
+
+def discover_groups(mother_folder):
+    """
+    Discover folders in the mother folder and group them by base name.
+    Returns dict: base -> list of { 'path', 'name', 'suffix' }
+    """
+    groups = {}  # base -> list of parts dicts
+    for item in os.listdir(mother_folder):
+        item_path = os.path.join(mother_folder, item)
+        if not os.path.isdir(item_path):
+            continue
+        base, suffix = parse_folder_name(item)
+        if base:
+            if suffix == 'מ':  # exclude special mem-suffix folders
+                continue
+            groups.setdefault(base, []).append({'path': item_path, 'name': item, 'suffix': suffix})
+    return groups
+
+
+def group_files(base, parts):
+    """
+    Work out which PDFs a group reads and where its outputs go, in suffix order.
+    - Single base folder: its matching PDF, or the split part PDFs inside it
+      (merged into the same folder)
+    - Split group: the matching PDF of each part folder (merged into the
+      first part's folder)
+    A part's 'pdf_name', when set, names its PDF instead (see folder_pdf).
+    Returns (files, merged_path, missing) where files is a list of
+    { 'label', 'pdf', 'output' }, merged_path is None for single PDFs and
+    missing lists the names whose PDF was not found.
+    """
+    if len(parts) == 1 and parts[0]['suffix'] is None:
+        folder_path = parts[0]['path']
+        folder_name = parts[0]['name']
+        pdf_path = folder_pdf(parts[0])
+        if pdf_path:
+            output = os.path.join(folder_path, f"{folder_name}_CLEANED.txt")
+            return [{'label': folder_name, 'pdf': pdf_path, 'output': output}], None, []
+        # Split PDFs inside the same folder (e.g., ננ449א.pdf, ננ449ב.pdf)
+        part_pdfs = find_split_part_pdfs(folder_path, folder_name)
+        if len(part_pdfs) < 2:
+            return [], None, [f"{folder_name}.pdf"]
+        files = []
+        for part in sorted(part_pdfs, key=lambda p: hebrew_suffix_key(p.get('suffix'))):
+            part_base = f"{folder_name}{part['suffix']}"
+            output = os.path.join(folder_path, f"{part_base}_CLEANED.txt")
+            files.append({'label': part['name'], 'pdf': part['path'], 'output': output})
+        return files, os.path.join(folder_path, f"{folder_name}_cleaned_merged.txt"), []
+
+    # Exclude special 'mem' suffix
+    parts_sorted = sorted((p for p in parts if p.get('suffix') != 'מ'),
+                          key=lambda p: hebrew_suffix_key(p.get('suffix')))
+    files = []
+    missing = []
+    for part in parts_sorted:
+        pdf_path = folder_pdf(part)
+        if not pdf_path:
+            missing.append(part['name'])
+            continue
+        output = os.path.join(part['path'], f"{part['name']}_CLEANED.txt")
+        files.append({'label': part['name'], 'pdf': pdf_path, 'output': output})
+    # Merged file goes into the first part's folder (origin folder), not the mother folder
+    merged_path = os.path.join(parts_sorted[0]['path'], f"{base}_cleaned_merged.txt") if parts_sorted else None
+    return files, merged_path, missing
+
+
+def build_job(base, parts, cost_model=None):
+    """
+    Build a schedulable job for one group, prescanning all of its PDFs.
+    Split groups are weighted by the sum of their parts: predicted seconds when
+    a cost model is given, page counts otherwise.
+    """
+    files, merged_path, missing = group_files(base, parts)
+    probes = [probe_pdf(f['pdf']) for f in files]
+    job = {
+        'base': base,
+        'parts': parts,
+        'files': files,
+        'merged': merged_path,
+        'missing': missing,
+        'pdfs': probes,
+        'pages': sum(estimated_pages(p) for p in probes),
+        'bytes': sum(p['bytes'] for p in probes),
+        'weight': sum(estimated_pages(p) for p in probes),
+        'predicted': None,
+    }
+    if cost_model is not None:
+        job['predicted'] = sum(cost_model.predict(p['pages'], p['bytes']) for p in probes)
+        job['weight'] = job['predicted']
+    return job
+
+
+def schedule_jobs(jobs):
+    """Order jobs longest-processing-time-first (ties broken by name)"""
+    return sorted(jobs, key=lambda j: (-j['weight'], j['base']))
+
+
+def simulate_makespan(weights, workers):
+    """
+    Simulate greedy dispatch of jobs (in the given order) onto a pool of workers.
+    Returns the makespan in the same unit as the weights.
+    """
+    finish_times = [0] * max(1, workers)
+    for weight in weights:
+        earliest = heapq.heappop(finish_times)
+        heapq.heappush(finish_times, earliest + weight)
+    return max(finish_times)
+
+
+class TextOnlyDeviceMixin:
+    """
+    Layout device mixin for text-only parsing: paths (table rulings, boxes,
+    curves) and images (logos, stamps, scans) are dropped as the interpreter
+    emits them, so no layout objects are built for them. Characters,
+    including those inside form XObjects, are kept.
+    """
+
+    def paint_path(self, *args, **kwargs):
+        pass
+
+    def begin_page(self, page, ctm):
+        super().begin_page(page, ctm)
+        self.image_area = 0.0
+
+    def render_image(self, name, stream):
+        # The image is dropped; only the area it covers is kept, for triage
+        self.image_area += self.cur_item.width * self.cur_item.height
+
+    def receive_layout(self, ltpage):
+        ltpage.image_area = self.image_area
+        super().receive_layout(ltpage)
+
+
+class TextOnlyAggregator(TextOnlyDeviceMixin, PDFPageAggregator):
+    """pdfminer page aggregator that records characters only"""
+
+
+class TextOnlyPlumberAggregator(TextOnlyDeviceMixin, PDFPageAggregatorWithMarkedContent):
+    """pdfplumber's page aggregator that records characters only"""
+
+
+def text_only_layout(page):
+    """Build a pdfplumber page's layout with TextOnlyPlumberAggregator (same as page.layout otherwise)"""
+    device = TextOnlyPlumberAggregator(page.pdf.rsrcmgr, pageno=page.page_number, laparams=page.pdf.laparams)
+    interpreter = PDFPageInterpreter(page.pdf.rsrcmgr, device)
+    interpreter.process_page(page.page_obj)
+    return device.get_result()
+
+
+def extract_pages_layout(source, text_only=True, timings=NO_TIMINGS, triage=None):
+    """
+    'layout' backend: pdfplumber's character/layout pipeline (reference output).
+    text_only: skip paths and images while parsing (see TextOnlyDeviceMixin)
+    timings: StageTimings for the open / page.parse / page.text stages
+    triage: a PageTriage fed the leading pages (raises NeedsOCR for scans)
+    Returns (list of page texts, page_count)
+    """
+    page_texts = []
+    with timings.span('open'):
+        pdf = pdfplumber.open(source)
+    with pdf:
+        with timings.span('open'):
+            page_count = len(pdf.pages)
+        if triage:
+            triage.start(page_count)
         for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                full_text += page_text + "\n"
+            with timings.span('page.parse'):
+                if text_only:
+                    # page.layout is computed once and cached in page._layout;
+                    # filling it first means pdfplumber never sees the non-text objects
+                    page._layout = text_only_layout(page)
+                else:
+                    page.layout
+            with timings.span('page.text'):
+                page_texts.append(page.extract_text())
+            if triage and triage.sampling:
+                with timings.span('triage'):
+                    triage.add_page(len(page.chars), layout_image_area(page.layout), page.width * page.height)
+    return page_texts, page_count
+
+
+# pdfplumber's extract_text() defaults, so both backends agree on word and line breaks
+FAST_X_TOLERANCE = 3
+FAST_Y_TOLERANCE = 3
+
+
+def collect_chars(container, chars):
+    """Append every LTChar of a pdfminer layout object (recursing into figures) to chars"""
+    for obj in container:
+        if isinstance(obj, LTChar):
+            chars.append(obj)
+        elif isinstance(obj, LTContainer):
+            collect_chars(obj, chars)
+    return chars
+
+
+def chars_to_text(chars, x_tolerance=FAST_X_TOLERANCE, y_tolerance=FAST_Y_TOLERANCE):
+    """
+    Rebuild page text from characters the way pdfplumber does: cluster into
+    lines by vertical position, order each line left to right, split words on
+    blanks and gaps wider than x_tolerance, join words with single spaces.
+    """
+    lines = []
+    last_y = None
+    for char in sorted(chars, key=lambda c: -c.y1):
+        if last_y is None or last_y - char.y1 > y_tolerance:
+            lines.append([])
+        lines[-1].append(char)
+        last_y = char.y1
+
+    text_lines = []
+    for line in lines:
+        words = []
+        word = ""
+        previous = None
+        for char in sorted(line, key=lambda c: c.x0):
+            text = char.get_text()
+            if text.isspace():
+                if word:
+                    words.append(word)
+                word = ""
+                previous = None
+                continue
+            if word and previous is not None and char.x0 > previous.x1 + x_tolerance:
+                words.append(word)
+                word = ""
+            word += text
+            previous = char
+        if word:
+            words.append(word)
+        text_lines.append(" ".join(words))
+    return "\n".join(text_lines)
+
+
+def extract_pages_fast(source, text_only=True, timings=NO_TIMINGS, triage=None):
+    """
+    'fast' backend: pdfminer's interpreter without layout analysis
+    (laparams=None), then a single clustering pass over the characters.
+    Skips pdfplumber's per-object dictionaries and pdfminer's text-box grouping.
+    text_only: skip paths and images while parsing (see TextOnlyDeviceMixin)
+    timings: StageTimings for the open / page.parse / page.text stages
+    triage: a PageTriage fed the leading pages (raises NeedsOCR for scans)
+    Returns (list of page texts, page_count)
+    """
+    should_close = not hasattr(source, 'read')
+    fp = open(source, 'rb') if should_close else source
+    try:
+        with timings.span('open'):
+            doc = PDFDocument(PDFParser(fp))
+            pages = list(PDFPage.create_pages(doc))
+        if triage:
+            triage.start(len(pages))
+        rsrcmgr = PDFResourceManager(caching=True)
+        device_class = TextOnlyAggregator if text_only else PDFPageAggregator
+        device = device_class(rsrcmgr, laparams=None)
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        page_texts = []
+        for page in pages:
+            with timings.span('page.parse'):
+                interpreter.process_page(page)
+            layout = device.get_result()
+            with timings.span('page.text'):
+                chars = collect_chars(layout, [])
+                page_texts.append(chars_to_text(chars))
+            if triage and triage.sampling:
+                with timings.span('triage'):
+                    triage.add_page(len(chars), layout_image_area(layout), layout.width * layout.height)
+        return page_texts, len(pages)
+    finally:
+        if should_close:
+            fp.close()
+
+
+# Extraction backends: name -> function(source, text_only, timings, triage) -> (page texts, page_count)
+EXTRACTION_BACKENDS = {
+    'layout': extract_pages_layout,
+    'fast': extract_pages_fast,
+}
+DEFAULT_BACKEND = 'layout'
+
+
+def extract_pages(source, backend=DEFAULT_BACKEND, text_only=True, timings=NO_TIMINGS, triage=None):
+    """
+    Extract the raw text of each page of a PDF.
+    source: a path, or an in-memory file (e.g. io.BytesIO of prefetched bytes)
+    backend: a key of EXTRACTION_BACKENDS
+    text_only: do not build layout objects for paths and images
+    timings: a StageTimings to record the stages in (see pdf_batch_timing)
+    triage: a PageTriage classifying the leading pages as they are parsed;
+            NeedsOCR is raised once they turn out to be scans
+    Returns (list of page texts, page_count)
+    """
+    if backend not in EXTRACTION_BACKENDS:
+        raise ValueError(f"Unknown extraction backend: {backend}")
+    return EXTRACTION_BACKENDS[backend](source, text_only, timings, triage)
+
+
+def join_pages(page_texts):
+    """Raw full text from page texts (empty pages skipped)"""
+    return "".join(text + "\n" for text in page_texts if text)
+
+
+def extract_pdf_text(source, backend=DEFAULT_BACKEND, text_only=True, timings=NO_TIMINGS):
+    """
+    Extract the raw text of a PDF (see extract_pages).
+    Returns (full_text, page_count)
+    """
+    page_texts, page_count = extract_pages(source, backend, text_only, timings)
+    return join_pages(page_texts), page_count
+
+
+def document_source(source):
+    """
+    The program that produced a PDF (Creator / Producer metadata), which
+    identifies its printout template. Returns a string, or None if unknown.
+    source: a path or a file object (rewound afterwards)
+    """
+    should_close = not hasattr(source, 'read')
+    fp = open(source, 'rb') if should_close else source
+    try:
+        parts = []
+        for info in PDFDocument(PDFParser(fp)).info:
+            for field in ('Creator', 'Producer'):
+                value = resolve1(info.get(field))
+                if isinstance(value, bytes):
+                    value = decode_text(value)
+                if value:
+                    parts.append(f"{field}={str(value).strip()}")
+        return "; ".join(parts) or None
+    except Exception:
+        return None
+    finally:
+        if should_close:
+            fp.close()
+        else:
+            fp.seek(0)
+
+
+def clean_pdf_text(full_text):
+    """Clean and structure raw PDF text (see extract_pdf_text)"""
     
     if not full_text.strip():
         raise Exception("No text found in PDF")
@@ -227,142 +635,330 @@ def reverse_hebrew_in_text(text):
     return '\n'.join(fixed_lines)
 
 
-def process_folder(folder_path, folder_name):
-    """Process a single folder"""
-    
-    print(f"\n{'='*60}")
-    print(f"📁 Processing: {folder_name}")
-    print(f"{'='*60}")
-    
-    # Find PDF
-    pdf_path = find_matching_pdf(folder_path, folder_name)
-    
-    if not pdf_path:
-        # Try to detect split PDFs inside the same folder (e.g., ננ449א.pdf, ננ449ב.pdf)
-        part_pdfs = find_split_part_pdfs(folder_path, folder_name)
-        if len(part_pdfs) >= 2:
-            print(f"🔎 Found split parts in folder: {', '.join(p['name'] for p in part_pdfs)}")
-            texts = []
-            success = False
-            for part in sorted(part_pdfs, key=lambda p: hebrew_suffix_key(p.get('suffix'))):
-                try:
-                    print(f"  📖 Reading {part['name']}...")
-                    cleaned = clean_and_structure_pdf(part['path'])
-                    print(f"  🔄 Fixing Hebrew for {part['name']}...")
-                    fixed = reverse_hebrew_in_text(cleaned)
-                    # Save individual cleaned
-                    part_base = f"{folder_name}{part['suffix']}"
-                    out_individual = os.path.join(folder_path, f"{part_base}_CLEANED.txt")
-                    with open(out_individual, 'w', encoding='utf-8') as f:
-                        f.write(fixed)
-                    print(f"  ✅ Saved {os.path.basename(out_individual)}")
-                    texts.append(fixed)
-                    success = True
-                except Exception as e:
-                    print(f"  ❌ Error processing {part['name']}: {str(e)}")
-            if len(texts) >= 2:
-                merged = "\n\n".join(texts)
-                merged_name = f"{folder_name}_cleaned_merged.txt"
-                # Save merged into the same folder where parts were found
-                merged_path = os.path.join(folder_path, merged_name)
-                with open(merged_path, 'w', encoding='utf-8') as f:
-                    f.write(merged)
-                print(f"💾 Merged saved: {merged_path}")
-            return success
-        else:
-            print(f"❌ PDF not found: {folder_name}.pdf")
-            return False
-    
-    print(f"✓ Found PDF: {os.path.basename(pdf_path)}")
-    
-    try:
-        # Process PDF
-        print("📖 Reading PDF...")
-        cleaned_text = clean_and_structure_pdf(pdf_path)
-        print(f"✓ Read {len(cleaned_text):,} characters")
-        
-        print("🔄 Fixing Hebrew...")
-        fixed_text = reverse_hebrew_in_text(cleaned_text)
-        print("✓ Hebrew fixed")
-        
-        # Save in same folder
-        output_filename = f"{folder_name}_CLEANED.txt"
-        output_path = os.path.join(folder_path, output_filename)
-        
-        print(f"💾 Saving: {output_filename}")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(fixed_text)
-        
-        print(f"✅ Success! Saved: {output_path}")
-        print(f"📊 Stats: {len(fixed_text):,} chars, {len(fixed_text.splitlines()):,} lines")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        return False
+# Scanned-page triage: the leading pages are classified as the extraction
+# parses them (PageTriage), so image-only scans fail after a few pages instead
+# of after every page has been parsed, and text PDFs are not opened twice.
+# triage_pdf classifies a PDF on its own, without extracting it.
+#
+TRIAGE_LEADING_PAGES = 3     # pages classified (triage_pdf also samples the middle and the last page)
+MIN_TEXT_CHARS = 20          # characters for a page to count as having a text layer
+MIN_IMAGE_COVERAGE = 0.5     # fraction of the page covered by images for a scanned page
+
+
+class NeedsOCR(Exception):
+    """The PDF has no text layer (image-only scan); it has to go through OCR"""
+
+    def __init__(self, triage):
+        super().__init__(triage)
+        self.triage = triage
+
+    def __str__(self):
+        return (f"no text layer ({self.triage['image_pages']}/{self.triage['sampled']} sampled pages "
+                f"are images) - needs OCR")
 
 
-def process_split_group(mother_folder, base_name, parts):
+class TriageAggregator(PDFPageAggregator):
+    """pdfminer page aggregator that records characters and images only"""
+
+    def paint_path(self, *args, **kwargs):
+        pass
+
+
+class PageTriage:
     """
-    Process a split group of folders sharing the same base (e.g., ננ449א, ננ449ב).
-    - Creates individual *_CLEANED.txt in each part folder
-    - Merges all texts (ordered by Hebrew suffix) into base_cleaned_merged.txt in the mother folder
+    Scanned-page check fed by the extraction backends (see extract_pages): the
+    first `leading` pages are classified from the characters and images the
+    parser produced anyway. If none of them has a text layer and at least one
+    is covered by images, NeedsOCR is raised before the rest is parsed.
+    result: { 'kind', 'pages', 'sampled', 'text_pages', 'image_pages', 'chars' }
+    (as for triage_pdf; kind is None until extraction starts)
     """
-    print(f"\n{'-'*60}")
-    print(f"🔗 Split detected for base: {base_name}")
-    print(f"{'-'*60}")
 
-    texts = []
-    any_success = False
-    # Exclude special 'mem' suffix
-    parts = [p for p in parts if p.get('suffix') != 'מ']
-    parts_sorted = sorted(parts, key=lambda p: hebrew_suffix_key(p.get('suffix')))
+    def __init__(self, leading=TRIAGE_LEADING_PAGES):
+        self.leading = leading
+        self.result = {'kind': None, 'pages': 0, 'sampled': 0, 'text_pages': 0, 'image_pages': 0, 'chars': 0}
 
-    for part in parts_sorted:
-        part_path = part['path']
-        part_name = part['name']
-        pdf_path = find_matching_pdf(part_path, part_name)
+    def start(self, page_count):
+        self.result.update(kind='text', pages=page_count)
+        self.leading = min(self.leading, page_count)
+
+    @property
+    def sampling(self):
+        return self.result['sampled'] < self.leading
+
+    def add_page(self, chars, image_area, page_area):
+        result = self.result
+        coverage = image_area / page_area if page_area else 0.0
+        result['sampled'] += 1
+        result['chars'] += chars
+        if chars >= MIN_TEXT_CHARS:
+            result['text_pages'] += 1
+        elif coverage >= MIN_IMAGE_COVERAGE:
+            result['image_pages'] += 1
+        if result['image_pages']:
+            result['kind'] = 'mixed' if result['text_pages'] else 'image'
+        if not self.sampling and result['kind'] == 'image':
+            raise NeedsOCR(result)
+
+
+def layout_image_area(layout):
+    """Page area covered by images: recorded by text-only devices, summed from the layout otherwise"""
+    if hasattr(layout, 'image_area'):
+        return layout.image_area
+    return page_content_stats(layout)[1]
 
-        if not pdf_path:
-            print(f"  ❌ PDF not found for {part_name}")
-            continue
 
+def triage_page_numbers(page_count, leading=TRIAGE_LEADING_PAGES):
+    """0-based page numbers sampled by triage_pdf"""
+    numbers = set(range(min(leading, page_count)))
+    if page_count > leading:
+        numbers.update((page_count // 2, page_count - 1))
+    return numbers
+
+
+def page_content_stats(container):
+    """(character count, total image area) of a pdfminer layout, recursing into figures"""
+    chars = 0
+    image_area = 0.0
+    for obj in container:
+        if isinstance(obj, LTChar):
+            chars += 1
+        elif isinstance(obj, LTImage):
+            image_area += obj.width * obj.height
+        elif isinstance(obj, LTContainer):
+            inner_chars, inner_area = page_content_stats(obj)
+            chars += inner_chars
+            image_area += inner_area
+    return chars, image_area
+
+
+def triage_pdf(source, leading=TRIAGE_LEADING_PAGES):
+    """
+    Classify a PDF from a sample of its pages (see triage_page_numbers),
+    without extracting it (extraction classifies as it goes, see PageTriage):
+    'text' (text layer on the sampled pages), 'image' (scanned pages only, no
+    text layer: needs OCR) or 'mixed' (both).
+    source: a path or a file object (rewound afterwards)
+    Returns dict: { 'kind', 'pages', 'sampled', 'text_pages', 'image_pages', 'chars' }
+    """
+    should_close = not hasattr(source, 'read')
+    fp = open(source, 'rb') if should_close else source
+    try:
+        doc = PDFDocument(PDFParser(fp))
         try:
-            print(f"  📖 Reading {part_name}...")
-            cleaned = clean_and_structure_pdf(pdf_path)
-            print(f"  🔄 Fixing Hebrew for {part_name}...")
-            fixed = reverse_hebrew_in_text(cleaned)
-
-            out_individual = os.path.join(part_path, f"{part_name}_CLEANED.txt")
-            with open(out_individual, 'w', encoding='utf-8') as f:
-                f.write(fixed)
-            print(f"  ✅ Saved {os.path.basename(out_individual)}")
-
-            texts.append(fixed)
-            any_success = True
-        except Exception as e:
-            print(f"  ❌ Error processing {part_name}: {str(e)}")
-
-    if len(texts) >= 2:
-        merged = "\n\n".join(texts)
-        merged_name = f"{base_name}_cleaned_merged.txt"
-        # Save merged into the first part's folder (origin folder), not the mother folder
-        dest_dir = parts_sorted[0]['path']
-        merged_path = os.path.join(dest_dir, merged_name)
-        with open(merged_path, 'w', encoding='utf-8') as f:
-            f.write(merged)
-        print(f"💾 Merged saved: {merged_path}")
-        return True
-    elif any_success:
+            page_count = int(resolve1(resolve1(doc.catalog['Pages'])['Count']))
+        except Exception:
+            page_count = leading
+        sample = triage_page_numbers(page_count, leading)
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = TriageAggregator(rsrcmgr, laparams=None)
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        result = {'kind': 'text', 'pages': page_count, 'sampled': 0,
+                  'text_pages': 0, 'image_pages': 0, 'chars': 0}
+        for number, page in enumerate(PDFPage.create_pages(doc)):
+            if number > max(sample, default=-1):
+                break
+            if number not in sample:
+                continue
+            interpreter.process_page(page)
+            layout = device.get_result()
+            chars, image_area = page_content_stats(layout)
+            coverage = image_area / (layout.width * layout.height) if layout.width * layout.height else 0.0
+            result['sampled'] += 1
+            result['chars'] += chars
+            if chars >= MIN_TEXT_CHARS:
+                result['text_pages'] += 1
+            elif coverage >= MIN_IMAGE_COVERAGE:
+                result['image_pages'] += 1
+        if result['image_pages']:
+            result['kind'] = 'mixed' if result['text_pages'] else 'image'
+        return result
+    finally:
+        if should_close:
+            fp.close()
+        else:
+            fp.seek(0)
+
+
+def finish_pages(page_texts, stages=NO_TIMINGS, strip_headers=False, source_key=None, templates=None,
+                 dedupe=False, records=False, keep_pages=False):
+    """
+    Turn extracted page texts into the final text: header/footer stripping,
+    dedupe, cleanup, the Hebrew fix and encounter records. Shared by
+    extract_pdf_job and ocr_pdf_job, so both paths post-process the same way.
+    keep_pages: also return the page texts the final text was built from
+    Returns dict: { 'text', 'template', 'stripped_lines', 'duplicate_pages',
+                    'duplicate_encounters', 'records', 'page_texts' } (see extract_pdf_job)
+    """
+    from pdf_batch_merge import unique_pages, EncounterDeduplicator
+
+    template = None
+    stripped_lines = 0
+    if strip_headers:
+        with stages.span('headers'):
+            page_texts, template, stripped_lines = remove_headers_footers(page_texts, source_key, templates)
+    page_numbers = list(range(1, len(page_texts) + 1))
+    duplicate_pages = 0
+    if dedupe:
+        with stages.span('dedupe'):
+            kept = unique_pages(page_texts)
+        duplicate_pages = len(page_texts) - len(kept)
+        page_texts = [page_texts[i] for i in kept]
+        page_numbers = [page_numbers[i] for i in kept]
+    with stages.span('cleanup'):
+        cleaned = clean_pdf_text(join_pages(page_texts))
+    with stages.span('hebrew'):
+        fixed = reverse_hebrew_in_text(cleaned)
+    duplicate_encounters = 0
+    if dedupe:
+        with stages.span('dedupe'):
+            deduplicator = EncounterDeduplicator()
+            fixed = deduplicator.filter(fixed)
+        duplicate_encounters = deduplicator.removed
+    encounters = None
+    if records:
+        from pdf_batch_records import encounter_records
+        with stages.span('records'):
+            encounters = encounter_records(fixed, page_texts, page_numbers)
+    return {'text': fixed, 'template': template, 'stripped_lines': stripped_lines,
+            'duplicate_pages': duplicate_pages, 'duplicate_encounters': duplicate_encounters,
+            'records': encounters, 'page_texts': page_texts if keep_pages else None}
+
+
+def clean_and_structure_pdf(input_pdf_path, backend=DEFAULT_BACKEND, text_only=True, timings=NO_TIMINGS,
+                            **finish_options):
+    """
+    Clean and structure PDF text: the final text extract_pdf_job writes,
+    without triage (timings: see pdf_batch_timing; finish_options: see finish_pages)
+    """
+    page_texts, _ = extract_pages(input_pdf_path, backend, text_only, timings)
+    return finish_pages(page_texts, timings, **finish_options)['text']
+
+
+def extract_pdf_job(source, backend=DEFAULT_BACKEND, text_only=True, triage=True,
+                    strip_headers=False, templates=None, dedupe=False, records=False, timings=False,
+                    keep_pages=False):
+    """
+    Worker entry point: extract, clean and fix the Hebrew of one PDF.
+    source: a path, or the PDF's bytes (prefetched by the reader stage)
+    backend: extraction backend (see EXTRACTION_BACKENDS)
+    text_only: skip paths and images while parsing
+    triage: classify the leading pages as they are parsed and raise NeedsOCR
+            for image-only scans (see PageTriage)
+    strip_headers: remove repeated header/footer lines (see pdf_batch_templates)
+    templates: cached header/footer templates, source -> line keys
+    dedupe: drop repeated pages and repeated encounter blocks within this PDF (see pdf_batch_merge)
+    records: also build structured encounter records (see pdf_batch_records)
+    timings: time each stage (see pdf_batch_timing)
+    keep_pages: also return the page texts, for dedupe across split parts at merge time
+    Returns dict: { 'text': fixed text, 'pages': page count, 'seconds': processing time,
+                    'kind': triage result ('text', 'mixed', or None without triage),
+                    'source': document source, 'template': newly learned line keys or None,
+                    'stripped_lines': header/footer lines removed,
+                    'duplicate_pages', 'duplicate_encounters': duplicates removed,
+                    'records': encounter records, or None unless requested,
+                    'page_texts': the page texts, or None unless requested,
+                    'timings': StageTimings.stages, or None unless requested }
+    """
+    start = time.perf_counter()
+    stages = StageTimings() if timings else NO_TIMINGS
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    page_triage = PageTriage() if triage else None
+    source_key = None
+    if strip_headers:
+        with stages.span('source'):
+            source_key = document_source(source)
+    page_texts, page_count = extract_pages(source, backend, text_only, stages, page_triage)
+    result = finish_pages(page_texts, stages, strip_headers, source_key, templates, dedupe, records, keep_pages)
+    result.update(pages=page_count, seconds=time.perf_counter() - start,
+                  kind=page_triage.result['kind'] if page_triage else None, source=source_key,
+                  timings=stages.stages if timings else None)
+    return result
+
+
+def print_event(event, data):
+    """Print orchestrator progress events (see pdf_batch_async) to the console"""
+    if event == 'groups':
+        groups = data['groups']
+        print(f"Found {sum(len(v) for v in groups.values())} folders in {len(groups)} group(s):")
+        for base, parts in sorted(groups.items()):
+            if len(parts) >= 2:
+                part_names = ", ".join(p['name'] for p in sorted(parts, key=lambda p: hebrew_suffix_key(p.get('suffix'))))
+                print(f"  • {base} → [{part_names}] (split)")
+            else:
+                print(f"  • {parts[0]['name']}")
+        print("\n" + "="*60)
+        print("🚀 Starting batch processing...")
+        print("="*60)
+        print(f"\n🔎 Prescanning page counts...")
+    elif event == 'prescan':
+        print(f"✓ {data['pages']:,} pages in {data['total']} group(s), estimated {format_eta(data['eta'])}")
+        if data['workers'] > 1:
+            print(f"⚙ {data['workers']} workers (largest first)")
+    elif event == 'group_start':
+        job = data['job']
+        kind = "split group" if job['merged'] else "folder"
+        print(f"\n[{data['index']}/{data['total']}] Processing {kind}: {job['base']} - ETA {format_eta(data['eta'])}")
+        for name in job['missing']:
+            print(f"  ❌ PDF not found: {name}")
+    elif event == 'file_start':
+        print(f"  📖 Reading {data['file']['label']}...")
+    elif event == 'file_done':
+        print(f"  ✅ Saved {os.path.basename(data['file']['output'])} ({data['chars']:,} chars)")
+    elif event == 'file_failed':
+        print(f"  ❌ Error processing {data['file']['label']}: {data['reason']}")
+    elif event == 'needs_ocr':
+        print(f"  🔍 {data['file']['label']}: no text layer (scanned) - queued for OCR")
+    elif event == 'ocr_start':
+        print(f"  🔍 {data['file']['label']}: no text layer (scanned) - running OCR on {data['triage']['pages']} pages...")
+    elif event == 'ocr_done':
+        print(f"  🔍 OCR: {data['ocr_pages']} page(s), {data['cached_pages']} from cache")
+    elif event == 'merged':
+        print(f"💾 Merged saved: {data['path']}")
+    elif event == 'merge_skipped':
         print("⚠ Only one part processed; merged file not created.")
-        return True
-    else:
-        return False
+    elif event == 'warning':
+        print(f"⚠ {data['message']}")
 
 
-def batch_process(mother_folder):
-    """Process all folders in mother folder (supports split groups like ננ449א/ננ449ב)"""
+def batch_process(mother_folder, workers=1, pool_options=None, prefetch_mb=DEFAULT_PREFETCH_MB,
+                  backend=DEFAULT_BACKEND, text_only=True, triage=True, strip_headers=False,
+                  dedupe=True, dedupe_within=False, ocr=False, ocr_options=None, merge_order=None,
+                  records=False, index=True, search_index=True, codec='none', manifest=True, manifest_path=None,
+                  timings=False, timings_json=None, profile=False, profile_only=None):
+    """
+    Process all folders in mother folder (supports split groups like ננ449א/ננ449ב)
+    Runs the asyncio orchestrator (pdf_batch_async): every PDF is extracted in
+    an isolated worker process (pool_options: timeout, max_rss_mb, recycling),
+    upcoming PDFs are prefetched into memory (up to prefetch_mb, 0 = off), and
+    with workers > 1 groups run in parallel, largest first.
+    backend selects the text extraction backend ('layout' or 'fast'); with
+    text_only, paths and images are skipped while parsing; with triage,
+    image-only scans are detected early and listed as needing OCR, or OCR'd
+    when ocr is set (ocr_options: lang, dpi, workers, timeout; see pdf_batch_ocr).
+    strip_headers removes repeated header/footer lines (see pdf_batch_templates);
+    dedupe drops pages and encounters repeated across the parts of a split
+    group when they are merged; dedupe_within also drops repeated pages and encounters
+    within each PDF (see pdf_batch_merge).
+    merge_order: split groups are merged in 'suffix' order (default) or
+    'chronological' order by encounter date.
+    records also writes <name>_ENCOUNTERS.jsonl per output (see pdf_batch_records);
+    index writes a <file>.idx encounter offset index next to each text output
+    (see pdf_batch_index); search_index keeps the full-text search index up to
+    date (see pdf_batch_search). codec compresses the text outputs ('none',
+    'gzip' or 'zstd'; see pdf_batch_codec). manifest writes a batch manifest
+    (default path: batch_manifest.json in the mother folder; see pdf_batch_manifest).
+    timings times every extraction stage and prints a per-stage summary; with
+    timings_json the statistics are also written to that file (see pdf_batch_timing).
+    profile extracts the files whose label matches profile_only (fnmatch patterns,
+    None = all) under cProfile / tracemalloc (see pdf_batch_profile).
+    """
+    from pdf_batch_async import BatchOrchestrator
+    from pdf_batch_merge import DEFAULT_MERGE_ORDER
+    from pdf_batch_codec import CODEC_SUFFIXES
+    from pdf_batch_timing import report_lines
+    from pdf_batch_profile import report_lines as profile_report_lines
     
     print("\n" + "="*60)
     print("🏥 PDF Medical Report Batch Processor")
@@ -373,75 +969,185 @@ def batch_process(mother_folder):
         print(f"❌ Error: Folder not found: {mother_folder}")
         return
     
-    # Discover folders and group by base name (supporting split suffix)
-    all_items = os.listdir(mother_folder)
-    groups = {}  # base -> list of parts dicts
-    
-    for item in all_items:
-        item_path = os.path.join(mother_folder, item)
-        if not os.path.isdir(item_path):
-            continue
-        base, suffix = parse_folder_name(item)
-        if base:
-            if suffix == 'מ':  # exclude special mem-suffix folders
-                continue
-            groups.setdefault(base, []).append({'path': item_path, 'name': item, 'suffix': suffix})
+    orchestrator = BatchOrchestrator(mother_folder, workers=workers, pool_options=pool_options,
+                                     prefetch_mb=prefetch_mb, backend=backend, text_only=text_only,
+                                     triage=triage, strip_headers=strip_headers, dedupe=dedupe,
+                                     dedupe_within=dedupe_within, ocr=ocr,
+                                     ocr_options=ocr_options, merge_order=merge_order or DEFAULT_MERGE_ORDER,
+                                     records=records, index=index, search_index=search_index,
+                                     codec=codec, manifest=manifest, manifest_path=manifest_path,
+                                     timings=timings or bool(timings_json), profile=profile or bool(profile_only),
+                                     profile_only=profile_only, on_event=print_event)
+    summary = asyncio.run(orchestrator.run())
     
-    if not groups:
+    if not summary['total']:
         print("❌ No valid folders found!")
         print("   Looking for folders named: 2 Hebrew letters + 3 digits (and optional Hebrew suffix)")
         print("   Example: אה456, ננ449א, ננ449ב")
         return
     
-    total_groups = len(groups)
-    print(f"Found {sum(len(v) for v in groups.values())} folders in {total_groups} group(s):")
-    for base, parts in sorted(groups.items()):
-        if len(parts) >= 2:
-            part_names = ", ".join(p['name'] for p in sorted(parts, key=lambda p: hebrew_suffix_key(p.get('suffix'))))
-            print(f"  • {base} → [{part_names}] (split)")
-        else:
-            print(f"  • {parts[0]['name']}")
-    
-    print("\n" + "="*60)
-    print("🚀 Starting batch processing...")
-    print("="*60)
-    
-    success_count = 0
-    failed_count = 0
-    
-    for i, (base, parts) in enumerate(sorted(groups.items()), 1):
-        if len(parts) == 1 and parts[0]['suffix'] is None:
-            folder_path = parts[0]['path']
-            folder_name = parts[0]['name']
-            print(f"\n[{i}/{total_groups}] Processing folder: {folder_name}")
-            if process_folder(folder_path, folder_name):
-                success_count += 1
-            else:
-                failed_count += 1
-        else:
-            print(f"\n[{i}/{total_groups}] Processing split group: {base}")
-            if process_split_group(mother_folder, base, parts):
-                success_count += 1
-            else:
-                failed_count += 1
-    
     # Final summary
     print("\n" + "="*60)
     print("📊 BATCH PROCESSING COMPLETE")
     print("="*60)
-    print(f"\n✅ Successful groups: {success_count}")
-    print(f"❌ Failed groups: {failed_count}")
-    print(f"📁 Total groups: {total_groups}")
+    print(f"\n✅ Successful groups: {summary['success']}")
+    print(f"❌ Failed groups: {summary['failed']}")
+    print(f"📁 Total groups: {summary['total']}")
+    
+    if summary['failed_files']:
+        print(f"\n⚠ Failed files ({len(summary['failed_files'])}):")
+        for failure in summary['failed_files']:
+            print(f"   • {failure['path']}: {failure['reason']}")
+    if summary['needs_ocr']:
+        print(f"\n🔍 Needs OCR - no text layer ({len(summary['needs_ocr'])}):")
+        for item in summary['needs_ocr']:
+            print(f"   • {item['path']} ({item['pages']} pages)")
+    if summary['stripped_lines']:
+        print(f"\n🧹 Removed {summary['stripped_lines']:,} repeated header/footer line(s)")
+    if summary['duplicate_pages'] or summary['duplicate_encounters']:
+        print(f"\n🧬 Removed duplicates: {summary['duplicate_pages']} page(s), "
+              f"{summary['duplicate_encounters']} encounter(s)")
+    if summary['ocr_files']:
+        print(f"\n🔍 OCR: {summary['ocr_files']} file(s), {summary['ocr_pages']} page(s) "
+              f"({summary['ocr_cached_pages']} from cache)")
+    if summary['search_indexed']:
+        print(f"\n🔎 Search index: {summary['search_indexed']} file(s) updated "
+              f"(python pdf_batch_processor.py search \"...\")")
+    if summary['unchanged_outputs']:
+        print(f"\n⏭ {summary['unchanged_outputs']:,} output(s) unchanged, left untouched")
+    if summary['recycled']:
+        print(f"\n♻ Recycled {summary['recycled']} worker(s)")
+    if summary['timings']:
+        print(f"\n⏱ Stage timings:")
+        for line in report_lines(summary['timings']):
+            print(line)
+        if timings_json:
+            try:
+                with open(timings_json, 'w', encoding='utf-8') as f:
+                    json.dump(summary['timings'], f, indent=2)
+                print(f"   Saved to {timings_json}")
+            except OSError as e:
+                print(f"   ❌ Could not write {timings_json}: {str(e)}")
+    if summary['profiled']:
+        print(f"\n🔥 Hot functions across {summary['profiled']} profiled file(s) (own time):")
+        for line in profile_report_lines(summary['hot_functions']):
+            print(line)
+        if summary['profile']:
+            print(f"   Combined profile: {summary['profile']} (per file: [folder_name]_PROFILE.pstats, _ALLOC.txt)")
+    if summary['manifest']:
+        print(f"\n🧾 Batch manifest: {summary['manifest']}")
     
-    if success_count > 0:
+    if summary['success'] > 0:
         print(f"\n💾 Cleaned files saved in their respective folders")
-        print(f"   Format: [folder_name]_CLEANED.txt")
-        print(f"   Merged (when applicable): [base]_cleaned_merged.txt in the mother folder")
+        suffix = CODEC_SUFFIXES[codec]
+        print(f"   Format: [folder_name]_CLEANED.txt{suffix}")
+        print(f"   Merged (when applicable): [base]_cleaned_merged.txt{suffix} in the mother folder")
+        if records:
+            print(f"   Encounter records: [folder_name]_ENCOUNTERS.jsonl")
     
+    print(f"\n⏱ Elapsed: {format_eta(summary['elapsed'])}")
     print("\n🎉 Done!\n")
 
 
-def main():
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    from pdf_batch_ocr import DEFAULT_OCR_LANG, DEFAULT_OCR_DPI, DEFAULT_OCR_WORKERS, DEFAULT_OCR_TIMEOUT
+    from pdf_batch_merge import MERGE_ORDERS, DEFAULT_MERGE_ORDER
+    from pdf_batch_codec import available_codecs
+    
+    parser = argparse.ArgumentParser(description="Batch PDF Processor for Medical Reports",
+                                     epilog="Dry run with a time estimate: %(prog)s plan FOLDER; "
+                                            "search processed outputs: %(prog)s search QUERY; "
+                                            "export a processed batch to SQLite: %(prog)s export FOLDER "
+                                            "(see --help of each)")
+    parser.add_argument('mother_folder', nargs='?', help="Mother folder (prompted for when omitted)")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="Number of groups to process in parallel (default: 1)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Per-file time limit in seconds, 0 = none (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument('--max-rss', type=int, default=DEFAULT_MAX_RSS_MB,
+                        help=f"Per-worker memory limit in MB, 0 = none (default: {DEFAULT_MAX_RSS_MB})")
+    parser.add_argument('--prefetch-mb', type=int, default=DEFAULT_PREFETCH_MB,
+                        help=f"Memory budget for reading PDFs ahead, 0 = off (default: {DEFAULT_PREFETCH_MB})")
+    parser.add_argument('--recycle-files', type=int, default=DEFAULT_RECYCLE_FILES,
+                        help=f"Recycle a worker after N files, 0 = never (default: {DEFAULT_RECYCLE_FILES})")
+    parser.add_argument('--recycle-mb', type=int, default=DEFAULT_RECYCLE_MB,
+                        help=f"Recycle a worker after N MB of input, 0 = never (default: {DEFAULT_RECYCLE_MB})")
+    parser.add_argument('--recycle-rss', type=int, default=DEFAULT_RECYCLE_RSS_MB,
+                        help=f"Recycle a worker whose RSS exceeds N MB, 0 = never (default: {DEFAULT_RECYCLE_RSS_MB})")
+    parser.add_argument('--backend', choices=sorted(EXTRACTION_BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"Text extraction backend: 'layout' (pdfplumber) or 'fast' (pdfminer, "
+                             f"no layout analysis) (default: {DEFAULT_BACKEND})")
+    parser.add_argument('--all-objects', action='store_true',
+                        help="Parse paths and images too (slower; by default only text is parsed)")
+    parser.add_argument('--no-triage', action='store_true',
+                        help="Do not sample pages first to detect scanned (image-only) PDFs")
+    parser.add_argument('--strip-headers', action='store_true',
+                        help="Detect and remove repeated page headers/footers (encounter and section "
+                             "lines are always kept)")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="Keep pages and encounters repeated across the parts of a split group (by "
+                             "default exact duplicates are dropped when the parts are merged)")
+    parser.add_argument('--dedupe-within', action='store_true',
+                        help="Also drop repeated pages and encounters within each PDF (off by default: a "
+                             "medical PDF can legitimately repeat a page)")
+    parser.add_argument('--merge-order', choices=MERGE_ORDERS, default=DEFAULT_MERGE_ORDER,
+                        help=f"Order of encounters in merged split groups: 'suffix' (part by part) or "
+                             f"'chronological' (by encounter date) (default: {DEFAULT_MERGE_ORDER})")
+    parser.add_argument('--jsonl', action='store_true',
+                        help="Also write [folder_name]_ENCOUNTERS.jsonl: one record per encounter with "
+                             "its date, pages and sections")
+    parser.add_argument('--no-index', action='store_true',
+                        help="Do not write the .idx encounter offset index next to each output")
+    parser.add_argument('--no-search-index', action='store_true',
+                        help="Do not update the full-text search index (see the search subcommand)")
+    parser.add_argument('--compress', choices=available_codecs(), default='none',
+                        help="Compress the cleaned and merged text outputs: gzip (.gz) or zstd (.zst, "
+                             "requires zstandard) (default: none)")
+    parser.add_argument('--manifest', metavar='PATH',
+                        help="Where to write the batch manifest (JSON: inputs, outputs, hashes, timings) "
+                             "(default: batch_manifest.json in the mother folder)")
+    parser.add_argument('--no-manifest', action='store_true', help="Do not write a batch manifest")
+    parser.add_argument('--timings', action='store_true',
+                        help="Time each extraction stage (PDF open, per-page parsing and text, cleanup, "
+                             "Hebrew fix, ...) and print per-stage statistics")
+    parser.add_argument('--timings-json', metavar='PATH',
+                        help="Also write the stage timings to this JSON file (implies --timings)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile each extraction with cProfile and tracemalloc; writes "
+                             "[folder_name]_PROFILE.pstats and _ALLOC.txt next to the outputs and lists the "
+                             "batch's hot functions (slow: raise --timeout for large files)")
+    parser.add_argument('--profile-only', metavar='PATTERN', action='append',
+                        help="Only profile files whose name matches this pattern, e.g. 'ננ449*' "
+                             "(repeatable; implies --profile)")
+    parser.add_argument('--ocr', action='store_true',
+                        help="OCR scanned (image-only) PDFs with Tesseract instead of just listing them")
+    parser.add_argument('--ocr-lang', default=DEFAULT_OCR_LANG,
+                        help=f"Tesseract language(s), e.g. heb+eng (default: {DEFAULT_OCR_LANG})")
+    parser.add_argument('--ocr-dpi', type=int, default=DEFAULT_OCR_DPI,
+                        help=f"Page rendering resolution for OCR (default: {DEFAULT_OCR_DPI})")
+    parser.add_argument('--ocr-workers', type=int, default=DEFAULT_OCR_WORKERS,
+                        help=f"OCR worker processes, separate from -j (default: {DEFAULT_OCR_WORKERS})")
+    parser.add_argument('--ocr-timeout', type=float, default=DEFAULT_OCR_TIMEOUT,
+                        help=f"Per-file time limit for OCR in seconds, 0 = none; --timeout applies to "
+                             f"extraction only (default: {DEFAULT_OCR_TIMEOUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'search':
+        from pdf_batch_search import main as search_main
+        return search_main(argv[1:])
+    if argv and argv[0] == 'plan':
+        from pdf_batch_plan import main as plan_main
+        return plan_main(argv[1:])
+    if argv and argv[0] == 'export':
+        from pdf_batch_export import main as export_main
+        return export_main(argv[1:])
+    args = parse_args(argv)
+    
     print("\n" + "="*60)
     print("🏥 PDF Medical Report Batch Processor")
     print("="*60)
@@ -452,9 +1158,11 @@ def main():
     print("\nEach subfolder should contain a PDF with the same name.")
     print("="*60)
     
-    # Ask for folder path
-    print("\n📂 Please enter the path to the mother folder:")
-    mother_folder = input("➤ ").strip()
+    mother_folder = args.mother_folder
+    if mother_folder is None:
+        # Ask for folder path
+        print("\n📂 Please enter the path to the mother folder:")
+        mother_folder = input("➤ ").strip()
     
     # Remove quotes if user added them
     if mother_folder.startswith('"') and mother_folder.endswith('"'):
@@ -466,7 +1174,25 @@ def main():
         print("\n❌ Error: No folder path provided")
         sys.exit(1)
     
-    batch_process(mother_folder)
+    pool_options = {
+        'timeout': args.timeout or None,
+        'max_rss_mb': args.max_rss or None,
+        'recycle_files': args.recycle_files or None,
+        'recycle_mb': args.recycle_mb or None,
+        'recycle_rss_mb': args.recycle_rss or None,
+    }
+    batch_process(mother_folder, workers=max(1, args.workers), pool_options=pool_options,
+                  prefetch_mb=args.prefetch_mb, backend=args.backend,
+                  text_only=not args.all_objects, triage=not args.no_triage,
+                  strip_headers=args.strip_headers, dedupe=not args.keep_duplicates,
+                  dedupe_within=args.dedupe_within, ocr=args.ocr,
+                  ocr_options={'lang': args.ocr_lang, 'dpi': args.ocr_dpi, 'workers': args.ocr_workers,
+                               'timeout': args.ocr_timeout or None},
+                  merge_order=args.merge_order, records=args.jsonl, index=not args.no_index,
+                  search_index=not args.no_search_index, codec=args.compress,
+                  manifest=not args.no_manifest, manifest_path=args.manifest,
+                  timings=args.timings, timings_json=args.timings_json,
+                  profile=args.profile, profile_only=args.profile_only)
 
 
 if __name__ == "__main__":
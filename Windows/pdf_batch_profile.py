@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-file profiling for the PDF Batch Processor
+
+    python pdf_batch_processor.py FOLDER --profile [--profile-only 'ננ449*']
+
+Each selected PDF is extracted under cProfile and tracemalloc, in its worker
+process, and next to its output the batch writes
+
+    <name>_PROFILE.pstats   cProfile statistics (python -m pstats, snakeviz, ...)
+    <name>_ALLOC.txt        peak traced memory and the top allocation sites
+
+The statistics of all profiled files are also combined into
+batch_profile.pstats in the mother folder, and the run summary lists the
+functions with the most time spent in them across the batch (e.g. pdfminer
+or pdfplumber hotspots, with the evidence to report them).
+
+Profiling slows extraction down considerably (tracemalloc most of all);
+raise --timeout when profiling large files.
+"""
+
+import os
+import marshal
+import pstats
+import fnmatch
+import cProfile
+import tracemalloc
+
+DEFAULT_TOP_ALLOCATIONS = 25
+DEFAULT_TOP_FUNCTIONS = 15
+BATCH_PROFILE_NAME = "batch_profile.pstats"
+
+
+def profile_paths(output_path):
+    """(<name>_PROFILE.pstats, <name>_ALLOC.txt) next to <name>_CLEANED.txt"""
+    base = output_path[:-len("_CLEANED.txt")] if output_path.endswith("_CLEANED.txt") else output_path
+    return base + "_PROFILE.pstats", base + "_ALLOC.txt"
+
+
+def selected(label, patterns):
+    """True if a file (by label) is to be profiled: patterns are fnmatch patterns, None = every file"""
+    return patterns is None or any(fnmatch.fnmatch(label, pattern) for pattern in patterns)
+
+
+def profiled_job(fn, source, top=DEFAULT_TOP_ALLOCATIONS, **options):
+    """
+    Worker entry point: fn(source, **options) under cProfile and tracemalloc.
+    Adds 'profile' to fn's result dict:
+    { 'stats': marshalled cProfile stats, 'peak_bytes', 'allocations': [{ 'where', 'bytes', 'blocks' }] }
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        profiler.enable()
+        try:
+            result = fn(source, **options)
+        finally:
+            profiler.disable()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    profiler.create_stats()
+    allocations = [{'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'bytes': stat.size, 'blocks': stat.count}
+                   for stat in snapshot.statistics('lineno')[:top]]
+    result['profile'] = {'stats': marshal.dumps(profiler.stats), 'peak_bytes': peak, 'allocations': allocations}
+    return result
+
+
+def write_profile(output_path, label, profile):
+    """Write a file's profile next to its output; returns the .pstats path"""
+    stats_path, alloc_path = profile_paths(output_path)
+    with open(stats_path, 'wb') as f:
+        f.write(profile['stats'])
+    lines = [f"{label}: peak traced memory {profile['peak_bytes'] / (1024 * 1024):.1f} MB",
+             f"Top {len(profile['allocations'])} allocation sites still allocated at the end of the extraction:"]
+    for allocation in profile['allocations']:
+        lines.append(f"  {allocation['bytes'] / 1024:10,.1f} KB {allocation['blocks']:>9,} blocks  "
+                     f"{allocation['where']}")
+    with open(alloc_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return stats_path
+
+
+def hot_functions(stats_paths, batch_path=None, top=DEFAULT_TOP_FUNCTIONS):
+    """
+    Combine the .pstats files of a batch (written to batch_path if given) and
+    return its top functions by own time:
+    [{ 'function', 'calls', 'tottime', 'cumtime' }]
+    """
+    stats = pstats.Stats(*stats_paths)
+    if batch_path:
+        stats.dump_stats(batch_path)
+    ranked = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:top]
+    return [{'function': name if filename == '~' else f"{name} ({os.path.basename(filename)}:{line})",
+             'calls': calls,
+             'tottime': round(tottime, 6), 'cumtime': round(cumtime, 6)}
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in ranked]
+
+
+def report_lines(functions):
+    """Text table of hot_functions() (for the CLI summary and the GUI log)"""
+    lines = [f"   {'own time':>9} {'cumulative':>10} {'calls':>10}  function"]
+    for function in functions:
+        lines.append(f"   {function['tottime']:>8.3f}s {function['cumtime']:>9.3f}s {function['calls']:>10,}  "
+                     f"{function['function']}")
+    return lines
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Isolated worker pool for the PDF Batch Processor
+
+Each task runs in a separate worker process. A worker that exceeds the
+wall-clock timeout or the RSS limit (or crashes) is killed and replaced;
+its task fails with a WorkerError carrying the reason, and the rest of the
+batch keeps going.
+
+Workers are also recycled (stopped cleanly between tasks and replaced) after
+a number of files or megabytes processed, or once their RSS has grown past a
+threshold, so pdfminer's caches and heap fragmentation cannot accumulate
+over a long batch.
+"""
+
+import os
+import sys
+import time
+import signal
+import itertools
+import threading
+import subprocess
+import collections
+import multiprocessing
+from multiprocessing.connection import wait
+from concurrent.futures import Executor, Future
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 30 * 60      # seconds per file
+DEFAULT_MAX_RSS_MB = 4096      # per worker
+DEFAULT_RECYCLE_FILES = 200    # files per worker before recycling
+DEFAULT_RECYCLE_MB = 2048      # input MB per worker before recycling
+DEFAULT_RECYCLE_RSS_MB = 1024  # worker RSS checked between tasks
+POLL_INTERVAL = 0.25           # seconds between limit checks
+PS_POLL_INTERVAL = 5.0         # seconds between RSS checks of a worker when they fork ps
+STOP_GRACE = 5.0               # seconds a recycled worker gets to exit before it is killed
+
+# Without psutil or /proc (macOS), measuring RSS forks a ps process
+RSS_IS_CHEAP = PSUTIL_AVAILABLE or os.path.exists('/proc/self/statm')
+
+
+class WorkerError(Exception):
+    """
+    A task failed because its worker was killed or died
+    ('timeout', 'memory', 'crashed', 'cancelled')
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def process_rss_mb(pid):
+    """Resident set size of a process in MB, or None if it cannot be measured"""
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if sys.platform != 'win32':
+        try:
+            out = subprocess.run(['ps', '-o', 'rss=', '-p', str(pid)],
+                                 capture_output=True, text=True, timeout=5).stdout
+            return int(out.strip()) / 1024
+        except (OSError, ValueError, subprocess.SubprocessError):
+            pass
+    return None
+
+
+def _worker_main(conn):
+    """Worker process loop: run tasks until told to stop"""
+    # Ctrl+C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        task_id, fn, args, kwargs = task
+        try:
+            conn.send((task_id, True, fn(*args, **kwargs)))
+        except Exception as e:
+            try:
+                conn.send((task_id, False, e))
+            except Exception:
+                # The exception itself could not be pickled
+                conn.send((task_id, False, Exception(f"{type(e).__name__}: {e}")))
+    conn.close()
+
+
+class _Worker:
+    """Parent-side handle of one worker process"""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None      # (task_id, future, size_bytes) while busy
+        self.started = None   # monotonic time the current task was sent
+        self.files = 0        # tasks completed
+        self.bytes = 0        # input bytes of completed tasks
+        self.rss_checked = 0  # monotonic time of the last RSS limit check
+        self.stopping = None  # monotonic time the worker was asked to exit (retire)
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(5)
+        except Exception:
+            pass
+        self.conn.close()
+
+    def stop(self):
+        self.retire()
+        try:
+            self.process.join(STOP_GRACE)
+        except Exception:
+            pass
+        self.reap(force=True)
+
+    def retire(self):
+        """Ask the worker to exit after its current task, without waiting"""
+        self.stopping = time.monotonic()
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+
+    def reap(self, force=False):
+        """
+        Release a retired worker once it has exited; kill it if it is past
+        STOP_GRACE (or force). Returns True when the worker is gone.
+        """
+        if self.process.is_alive():
+            if not force and time.monotonic() - self.stopping < STOP_GRACE:
+                return False
+            self.kill()
+            return True
+        self.process.join()
+        self.conn.close()
+        return True
+
+
+class IsolatedProcessPool(Executor):
+    """
+    Executor that runs every task in a killable worker process.
+    - timeout:        wall-clock seconds per task (None = unlimited)
+    - max_rss_mb:     worker RSS limit in MB, enforced while a task runs (None = unlimited)
+    - recycle_files:  replace a worker after this many tasks (None = never)
+    - recycle_mb:     replace a worker after this many input MB (see submit_sized)
+    - recycle_rss_mb: replace a worker whose RSS exceeds this after a task
+    Tasks and results must be picklable (top-level functions).
+    """
+
+    def __init__(self, max_workers=1, timeout=DEFAULT_TIMEOUT, max_rss_mb=DEFAULT_MAX_RSS_MB,
+                 recycle_files=DEFAULT_RECYCLE_FILES, recycle_mb=DEFAULT_RECYCLE_MB,
+                 recycle_rss_mb=DEFAULT_RECYCLE_RSS_MB):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.recycle_files = recycle_files
+        self.recycle_mb = recycle_mb
+        self.recycle_rss_mb = recycle_rss_mb
+        self.recycled = 0
+        self._ctx = multiprocessing.get_context('spawn')
+        self._cond = threading.Condition()
+        self._pending = collections.deque()
+        self._workers = []
+        self._retiring = []   # recycled workers not reaped yet
+        self._ids = itertools.count()
+        self._shutdown = False
+        self._kill = False
+        self._manager = threading.Thread(target=self._manage, daemon=True)
+        self._manager.start()
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self.submit_sized(0, fn, *args, **kwargs)
+
+    def submit_sized(self, size_bytes, fn, /, *args, **kwargs):
+        """Submit a task whose input is size_bytes long (counted towards recycle_mb)"""
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new tasks after shutdown")
+            future = Future()
+            self._pending.append((next(self._ids), future, size_bytes, fn, args, kwargs))
+            self._cond.notify()
+            return future
+
+    def worker_pids(self):
+        """PIDs of the live worker processes"""
+        return [w.process.pid for w in list(self._workers)]
+
+    def shutdown(self, wait=True, *, cancel_futures=False, kill=False):
+        """
+        Stop the pool. Running tasks are waited for, unless kill: then their
+        workers are killed and the tasks fail with WorkerError('cancelled')
+        (e.g. on Ctrl+C, so an interrupted batch does not wait for them).
+        """
+        with self._cond:
+            self._shutdown = True
+            self._kill = self._kill or kill
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft()[1].cancel()
+            self._cond.notify()
+        if wait:
+            self._manager.join()
+
+    # -- manager thread --
+
+    def _manage(self):
+        while True:
+            with self._cond:
+                busy = [w for w in self._workers if w.task]
+                if self._kill:
+                    for worker in busy:
+                        self._replace(worker, WorkerError('cancelled', "cancelled by shutdown"))
+                    busy = []
+                if self._shutdown and not self._pending and not busy:
+                    break
+                self._dispatch()
+                busy = [w for w in self._workers if w.task]
+                if not busy:
+                    self._cond.wait(POLL_INTERVAL)
+                    continue
+            handles = [w.conn for w in busy] + [w.process.sentinel for w in busy]
+            ready = wait(handles, timeout=POLL_INTERVAL)
+            for worker in busy:
+                if worker.conn in ready or worker.process.sentinel in ready:
+                    self._collect(worker)
+            self._check_limits()
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+        for worker in self._retiring:
+            worker.stop()
+        self._retiring = []
+
+    def _dispatch(self):
+        """Send pending tasks to idle workers, starting workers as needed (lock held)"""
+        self._reap()
+        while self._pending:
+            worker = next((w for w in self._workers if not w.task), None)
+            if worker is None:
+                if len(self._workers) >= self.max_workers:
+                    return
+                worker = _Worker(self._ctx)
+                self._workers.append(worker)
+            task_id, future, size_bytes, fn, args, kwargs = self._pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                worker.conn.send((task_id, fn, args, kwargs))
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            worker.task = (task_id, future, size_bytes)
+            worker.started = time.monotonic()
+
+    def _collect(self, worker):
+        """Receive a finished task's result, or fail it if the worker died"""
+        _, future, size_bytes = worker.task
+        try:
+            if worker.conn.poll():
+                _, ok, value = worker.conn.recv()
+                worker.task = None
+                worker.files += 1
+                worker.bytes += size_bytes
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+                self._maybe_recycle(worker)
+                return
+        except (EOFError, OSError):
+            pass
+        if worker.process.is_alive():
+            return
+        self._replace(worker, WorkerError(
+            'crashed', f"worker crashed (exit code {worker.process.exitcode})"))
+
+    def _check_limits(self):
+        now = time.monotonic()
+        for worker in [w for w in self._workers if w.task]:
+            if self.timeout and now - worker.started > self.timeout:
+                self._replace(worker, WorkerError(
+                    'timeout', f"timed out after {self.timeout:g}s"))
+                continue
+            if self.max_rss_mb and (RSS_IS_CHEAP or now - worker.rss_checked >= PS_POLL_INTERVAL):
+                worker.rss_checked = now
+                rss = process_rss_mb(worker.process.pid)
+                if rss is not None and rss > self.max_rss_mb:
+                    self._replace(worker, WorkerError(
+                        'memory', f"worker memory {rss:.0f} MB exceeded limit of {self.max_rss_mb} MB"))
+
+    def _maybe_recycle(self, worker):
+        """
+        Retire an idle worker that has done enough work or grown too large
+        (it exits in the background and is reaped by _reap)
+        """
+        recycle = (
+            (self.recycle_files and worker.files >= self.recycle_files)
+            or (self.recycle_mb and worker.bytes >= self.recycle_mb * 1024 * 1024)
+        )
+        if not recycle and self.recycle_rss_mb:
+            rss = process_rss_mb(worker.process.pid)
+            recycle = rss is not None and rss > self.recycle_rss_mb
+        if recycle:
+            with self._cond:
+                self._workers.remove(worker)
+                self._retiring.append(worker)
+            worker.retire()
+            self.recycled += 1
+
+    def _reap(self):
+        """Release recycled workers that have exited (killing stragglers)"""
+        self._retiring = [w for w in self._retiring if not w.reap()]
+
+    def _replace(self, worker, error):
+        """Kill a worker and fail its task; a new worker is started on demand"""
+        _, future, _ = worker.task
+        worker.task = None
+        worker.kill()
+        with self._cond:
+            self._workers.remove(worker)
+        future.set_exception(error)